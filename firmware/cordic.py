@@ -0,0 +1,286 @@
+# MicroPython driver for the CORDIC peripheral (src/tqvp_CORDIC.v) on TinyQV.
+#
+# The same operations as the cocotb helpers (test/tqv.py, test/test_utils.py), on the
+# memory-mapped registers, in raw fixed point: Q2.(width-2) angles and sin/cos/sinh/cosh,
+# Q(width-s).s with s = shift for the LINEAR operands and results.
+#
+#   from cordic import Cordic, CIRCULAR
+#   c = Cordic(peripheral_num)
+#   cos_q, sin_q = c.run(CIRCULAR, 1, 0x2183)          # one operation, like run_cordic
+#
+#   angles = c.buffer(n)                               # array('h') at 16 bits, 'i' at 32
+#   out = c.buffer(2 * n)
+#   c.sin_cos_into(angles, out)                        # cos in out[0:n], sin in out[n:2n]
+#
+# The batch methods allocate nothing: the caller owns the buffers, the loop runs on locals
+# and writes A and B only when they change. With the native emitter, the loop is the
+# viper code of cordic_viper.py; without it (or with viper=False) it is the plain loop below.
+#
+# On a Linux host, test/micropython_host.py puts a register-level model of the peripheral
+# behind machine.mem8/16/32 and checks this module against the bit-exact model.
+#
+# Aligned register addresses: A, B, out1 and out2 are read and written with mem16/mem32
+# (ptr16/ptr32 in the viper loops), which need addresses aligned to the access, 2 bytes at 16
+# bits and 4 at 32; machine.mem16/mem32 raise ValueError("address ... is not aligned")
+# otherwise. The register map of src/tqvp_CORDIC.v has them at byte offsets 1, 2, 4 and 5,
+# so this driver does NOT run on it as is: Cordic() raises ValueError for a map with
+# unaligned wide registers, rather than fail on the first access. A wide register cannot
+# be split into byte accesses either, the next byte address is the next register. regs=
+# gives the offsets of a register map with aligned wide registers (the host check runs
+# on one, micropython_host.ALIGNED_REGS).
+
+from array import array
+
+try:
+    import micropython
+    from micropython import const
+    _native = micropython.native
+except ImportError:
+    def const(x):
+        return x
+
+    def _native(f):
+        return f
+
+try:
+    from machine import mem8, mem16, mem32
+except ImportError:
+    mem8 = mem16 = mem32 = None
+
+try:
+    from cordic_viper import run_batch16, run_batch32
+except (ImportError, SyntaxError):
+    run_batch16 = run_batch32 = None
+
+CIRCULAR = const(0)
+LINEAR = const(1)
+HYPERBOLIC = const(2)
+
+# register offsets, byte addresses within the peripheral
+REG_CONFIG = const(0)
+REG_A = const(1)
+REG_B = const(2)
+REG_SHIFT = const(3)
+REG_OUT1 = const(4)
+REG_OUT2 = const(5)
+REG_STATUS = const(6)
+
+# the register map of src/tqvp_CORDIC.v in the order of the regs argument of Cordic
+REGS = (REG_CONFIG, REG_A, REG_B, REG_SHIFT, REG_OUT1, REG_OUT2, REG_STATUS)
+
+STATUS_READY = const(0)
+STATUS_BUSY = const(1)
+STATUS_DONE = const(2)
+
+# config bits
+START = const(1)
+MODE_BITS = const(1)
+IS_ROTATING_BIT = const(3)
+BINARY_ANGLE_BIT = const(4)
+BINARY_ANGLE = const(16)
+EARLY_EXIT_BIT = const(5)
+EARLY_EXIT = const(32)            # LINEAR: done as soon as the residual is zero
+FORWARD_A_BIT = const(6)
+FORWARD_A = const(64)             # A = out1 of the last operation (chaining)
+FORWARD_B_BIT = const(7)
+FORWARD_B = const(128)            # B = out2 of the last operation
+
+# TinyQV full peripherals: 64 bytes each from 0x8000000
+PERIPHERAL_BASE = const(0x8000000)
+PERIPHERAL_SIZE = const(0x40)
+
+# ctl words of the batch loops: the loop parameters, then the register addresses
+_CTL_CONFIG = const(0)
+_CTL_N = const(1)
+_CTL_HAS_B = const(2)
+_CTL_MAX_POLLS = const(3)
+_CTL_WIDE = const(4)
+_CTL_CONFIG_ADDR = const(5)
+_CTL_A_ADDR = const(6)
+_CTL_B_ADDR = const(7)
+_CTL_OUT1_ADDR = const(8)
+_CTL_OUT2_ADDR = const(9)
+_CTL_STATUS_ADDR = const(10)
+
+
+def pack_config(mode, is_rotating, flags=0):
+    """ Config word that starts an operation (test_utils.pack_config with start=1) """
+    return flags | (mode << MODE_BITS) | (is_rotating << IS_ROTATING_BIT) | START
+
+
+@_native
+def _run_batch(ctl, a, b, out):
+    """ Plain-Python batch loop: operation i runs on a[i] (and b[i]), out1 goes to out[i] and
+    out2 to out[n + i]. Returns the number of operations completed, less than n on a timeout. """
+    config = ctl[_CTL_CONFIG]
+    n = ctl[_CTL_N]
+    has_b = ctl[_CTL_HAS_B]
+    max_polls = ctl[_CTL_MAX_POLLS]
+    reg8 = mem8
+    if ctl[_CTL_WIDE]:
+        reg = mem32
+        sign = 0x80000000
+    else:
+        reg = mem16
+        sign = 0x8000
+    config_addr = ctl[_CTL_CONFIG_ADDR]
+    a_addr = ctl[_CTL_A_ADDR]
+    b_addr = ctl[_CTL_B_ADDR]
+    out1_addr = ctl[_CTL_OUT1_ADDR]
+    out2_addr = ctl[_CTL_OUT2_ADDR]
+    status_addr = ctl[_CTL_STATUS_ADDR]
+    last_a = last_b = 0
+    i = 0
+    while i < n:
+        v = a[i]
+        if i == 0 or v != last_a:
+            reg[a_addr] = v
+            last_a = v
+        if has_b:
+            v = b[i]
+            if i == 0 or v != last_b:
+                reg[b_addr] = v
+                last_b = v
+        reg8[config_addr] = config
+        polls = 0
+        while reg8[status_addr] != STATUS_DONE:
+            polls += 1
+            if polls > max_polls:
+                return i
+        # zero-extended on the bus
+        out[i] = (reg[out1_addr] ^ sign) - sign
+        out[n + i] = (reg[out2_addr] ^ sign) - sign
+        i += 1
+    return n
+
+
+class Cordic:
+    def __init__(self, peripheral_num=0, base=None, width=16, max_polls=100, viper=True, regs=REGS):
+        """ base defaults to the address of full peripheral peripheral_num. width is the
+        FIXED_WIDTH of the build, 16 or 32. viper=False keeps the plain batch loop. regs are
+        the byte offsets of (config, A, B, shift, out1, out2, status); A, B, out1 and out2
+        have to be aligned to the width for mem16/mem32, ValueError otherwise (see the top
+        of this file: the default REGS of src/tqvp_CORDIC.v are not). """
+        if width not in (16, 32):
+            raise ValueError("width must be 16 or 32")
+        self.base = PERIPHERAL_BASE + PERIPHERAL_SIZE * peripheral_num if base is None else base
+        self.width = width
+        self.wide = width > 16
+        self.mask = (1 << width) - 1
+        self.max_polls = max_polls
+        self.typecode = "i" if self.wide else "h"
+        addr = [self.base + reg for reg in regs]
+        align = 4 if self.wide else 2
+        for name, i in (("A", 1), ("B", 2), ("out1", 4), ("out2", 5)):
+            if addr[i] % align:
+                raise ValueError("CORDIC: register %s at %#x is not %d-byte aligned, mem%d needs aligned "
+                                 "register addresses" % (name, addr[i], align, width))
+        (self._config_addr, self._a_addr, self._b_addr, self._shift_addr,
+         self._out1_addr, self._out2_addr, self._status_addr) = addr
+        self._ctl = array("i", (0, 0, 0, max_polls, self.wide, self._config_addr, self._a_addr,
+                                self._b_addr, self._out1_addr, self._out2_addr, self._status_addr))
+        batch = run_batch32 if self.wide else run_batch16
+        self._batch = batch if viper and batch is not None else _run_batch
+        # register 3 holds its value between operations, but reads as 0: unknown until written
+        self._shift = None
+
+    # Register access, the methods of test/tqv.py TinyQV; reg is the byte offset, the
+    # hword and word accesses need it aligned
+
+    def write_byte_reg(self, reg, value):
+        mem8[self.base + reg] = value
+
+    def read_byte_reg(self, reg):
+        return mem8[self.base + reg]
+
+    def write_hword_reg(self, reg, value):
+        mem16[self.base + reg] = value
+
+    def read_hword_reg(self, reg):
+        return mem16[self.base + reg]
+
+    def write_word_reg(self, reg, value):
+        mem32[self.base + reg] = value
+
+    def read_word_reg(self, reg):
+        return mem32[self.base + reg]
+
+    # Single operations, like test_utils
+
+    def set_shift(self, shift):
+        """ The 1.0 position of the LINEAR modes (register 3), only written when it changes """
+        if shift != self._shift:
+            mem8[self._shift_addr] = shift
+            self._shift = shift
+
+    def wait_done(self):
+        """ Poll the status register until DONE, returns the number of polls """
+        status_addr = self._status_addr
+        for polls in range(1, self.max_polls + 1):
+            if mem8[status_addr] == STATUS_DONE:
+                return polls
+        raise OSError("CORDIC: timeout waiting for DONE")
+
+    def read_out_pair(self):
+        """ (out1, out2), sign-extended """
+        read = mem32 if self.wide else mem16
+        sign = 1 << (self.width - 1)
+        return (((read[self._out1_addr] & self.mask) ^ sign) - sign,
+                ((read[self._out2_addr] & self.mask) ^ sign) - sign)
+
+    def run(self, mode, is_rotating, A, B=None, shift=None, flags=0):
+        """ Run one operation on raw register values, returns (out1, out2) sign-extended
+        (test_utils.run_cordic without the cycle count) """
+        write = mem32 if self.wide else mem16
+        write[self._a_addr] = A & self.mask
+        if B is not None:
+            write[self._b_addr] = B & self.mask
+        if shift is not None:
+            self.set_shift(shift)
+        mem8[self._config_addr] = pack_config(mode, is_rotating, flags)
+        self.wait_done()
+        return self.read_out_pair()
+
+    # Batches
+
+    def buffer(self, n):
+        """ A zeroed buffer of n operands or results in the width of the build """
+        return array(self.typecode, bytearray(n * (4 if self.wide else 2)))
+
+    def run_into(self, config, a, b, out, n=None):
+        """ Run n operations (default len(a)) with config (pack_config) on a[i] and, unless b
+        is None, b[i]; out1 goes to out[i] and out2 to out[n + i]. The buffers are from
+        buffer(), out holds 2 * n values. Returns out. """
+        if n is None:
+            n = len(a)
+        if len(out) < 2 * n:
+            raise ValueError("out needs 2 * n entries")
+        ctl = self._ctl
+        ctl[_CTL_CONFIG] = config
+        ctl[_CTL_N] = n
+        ctl[_CTL_HAS_B] = b is not None
+        done = self._batch(ctl, a, a if b is None else b, out)
+        if done != n:
+            raise OSError("CORDIC: timeout waiting for DONE")
+        return out
+
+    def sin_cos_into(self, angles, out, n=None, binary_angle=False):
+        """ cos in out[0:n], sin in out[n:2n]; angles in Q2.(width-2) radians within
+        +-1.7178, or binary angles (2^width = one turn) with binary_angle=True """
+        return self.run_into(pack_config(CIRCULAR, 1, BINARY_ANGLE if binary_angle else 0), angles, None, out, n)
+
+    def sinh_cosh_into(self, x, out, n=None):
+        """ cosh in out[0:n], sinh in out[n:2n]; x in Q2.(width-2) within +-1.1161 """
+        return self.run_into(pack_config(HYPERBOLIC, 1), x, None, out, n)
+
+    def mul_into(self, a, b, out, shift, n=None, early_exit=False):
+        """ a[i] * b[i] in out[0:n], all in Q(width-shift).shift; early_exit ends an operation
+        as soon as b[i] is used up, e.g. for short filter coefficients in b """
+        self.set_shift(shift)
+        return self.run_into(pack_config(LINEAR, 1, EARLY_EXIT if early_exit else 0), a, b, out, n)
+
+    def div_into(self, a, b, out, shift, n=None, early_exit=False):
+        """ b[i] / a[i] in out[0:n] (the divisor is A, like the register), a[i] > 0, all in
+        Q(width-shift).shift; early_exit ends an operation as soon as the quotient is exact """
+        self.set_shift(shift)
+        return self.run_into(pack_config(LINEAR, 0, EARLY_EXIT if early_exit else 0), a, b, out, n)
@@ -0,0 +1,61 @@
+# Operations per second of the CORDIC driver (cordic.py), on the board or on the host
+# stand-in (test/micropython_host.py):
+#
+#   import cordic, cordic_bench
+#   cordic_bench.bench(cordic.Cordic(peripheral_num, regs=...))   # aligned registers, see cordic.py
+#
+# run() is one operation per call as the firmware wrote it so far; the batch rows run the
+# same angles through run_into() with the plain loop and, where it compiled, the viper loop.
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:
+    from time import perf_counter
+
+    def ticks_us():
+        return int(perf_counter() * 1000000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+import cordic
+
+
+def _ops_per_s(n, t0, t1):
+    return n * 1000000 // max(1, ticks_diff(t1, t0))
+
+
+def bench(c, n=256, rounds=4):
+    """ Print and return [(name, ops/s)] for n circular rotations, best of rounds """
+    angles = c.buffer(n)
+    # a ramp over -1.5 .. 1.5 rad in Q2.(width-2)
+    step = (3 << (c.width - 3)) // n
+    for i in range(n):
+        angles[i] = -(3 << (c.width - 4)) + i * step
+    out = c.buffer(2 * n)
+    config = cordic.pack_config(cordic.CIRCULAR, 1)
+
+    loops = [("run", None), ("run_into", cordic._run_batch)]
+    viper = cordic.run_batch32 if c.wide else cordic.run_batch16
+    if viper is not None:
+        loops.append(("run_into viper", viper))
+
+    results = []
+    for name, loop in loops:
+        best = 0
+        for _ in range(rounds):
+            if loop is None:
+                t0 = ticks_us()
+                for i in range(n):
+                    c.run(cordic.CIRCULAR, 1, angles[i])
+                t1 = ticks_us()
+            else:
+                batch, c._batch = c._batch, loop
+                t0 = ticks_us()
+                c.run_into(config, angles, None, out)
+                t1 = ticks_us()
+                c._batch = batch
+            best = max(best, _ops_per_s(n, t0, t1))
+        print("%-16s %8d ops/s" % (name, best))
+        results.append((name, best))
+    return results
@@ -0,0 +1,87 @@
+# Viper batch loops of cordic.py, one per datapath width.
+#
+# Same contract as cordic._run_batch: ctl holds (config, n, has_b, max_polls, wide) and the
+# addresses of (config, A, B, out1, out2, status), the wide ones aligned (see cordic.py),
+# operation i runs on a[i] (and b[i]), out1 goes to out[i] and out2 to out[n + i], and the
+# return value is the number of operations completed. The registers are machine-word
+# pointer accesses, so nothing is allocated and no sign extension is needed: a 16-bit
+# (or 32-bit) store into the 'h' (or 'i') buffer is the signed result. Needs a port with
+# the native emitter; cordic.py falls back to its plain loop when this does not compile.
+#
+# Viper functions take at most four arguments, hence ctl.
+
+import micropython
+
+
+@micropython.viper
+def run_batch16(ctl: ptr32, a: ptr16, b: ptr16, out: ptr16) -> int:
+    config = ctl[0]
+    n = ctl[1]
+    has_b = ctl[2]
+    max_polls = ctl[3]
+    config_reg = ptr8(ctl[5])
+    a_reg = ptr16(ctl[6])
+    b_reg = ptr16(ctl[7])
+    out1_reg = ptr16(ctl[8])
+    out2_reg = ptr16(ctl[9])
+    status_reg = ptr8(ctl[10])
+    last_a = 0
+    last_b = 0
+    i = 0
+    while i < n:
+        v = a[i]
+        if i == 0 or v != last_a:
+            a_reg[0] = v
+            last_a = v
+        if has_b:
+            v = b[i]
+            if i == 0 or v != last_b:
+                b_reg[0] = v
+                last_b = v
+        config_reg[0] = config
+        polls = 0
+        while status_reg[0] != 2:
+            polls += 1
+            if polls > max_polls:
+                return i
+        out[i] = out1_reg[0]
+        out[n + i] = out2_reg[0]
+        i += 1
+    return n
+
+
+@micropython.viper
+def run_batch32(ctl: ptr32, a: ptr32, b: ptr32, out: ptr32) -> int:
+    config = ctl[0]
+    n = ctl[1]
+    has_b = ctl[2]
+    max_polls = ctl[3]
+    config_reg = ptr8(ctl[5])
+    a_reg = ptr32(ctl[6])
+    b_reg = ptr32(ctl[7])
+    out1_reg = ptr32(ctl[8])
+    out2_reg = ptr32(ctl[9])
+    status_reg = ptr8(ctl[10])
+    last_a = 0
+    last_b = 0
+    i = 0
+    while i < n:
+        v = a[i]
+        if i == 0 or v != last_a:
+            a_reg[0] = v
+            last_a = v
+        if has_b:
+            v = b[i]
+            if i == 0 or v != last_b:
+                b_reg[0] = v
+                last_b = v
+        config_reg[0] = config
+        polls = 0
+        while status_reg[0] != 2:
+            polls += 1
+            if polls > max_polls:
+                return i
+        out[i] = out1_reg[0]
+        out[n + i] = out2_reg[0]
+        i += 1
+    return n
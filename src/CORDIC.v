@@ -4,12 +4,17 @@
 
 module CORDIC #(
     parameter ITERATIONS  = 9,
-    parameter FIXED_WIDTH = 16
+    parameter FIXED_WIDTH = 16,
+    // circular rotation: 0 = start from (1/K, 0) at iteration 0; 1..4 = seed x/y from
+    // (cos, sin) of z rounded to 2^-CIRC_LUT_BITS rad and start at iteration CIRC_LUT_BITS+1
+    parameter CIRC_LUT_BITS = 0
 )(
     input                                   clk,
     input                                   rst_n,
     input                                   start,
     input                                   is_rotating,            // LINEAR: 1=multiply, 0=divide
+    input                                   binary_angle,           // CIRCULAR rotate: A is a fraction of a full turn
+    input                                   early_exit,             // LINEAR: done as soon as the residual is zero
     input [1:0]                             mode,                   // `CIRCULAR_MODE / `LINEAR_MODE / `HYPERBOLIC_MODE
     input [$clog2(FIXED_WIDTH):0]         alpha_one_left_shift,
 
@@ -54,12 +59,16 @@ module CORDIC #(
     localparam integer ITER_W = $clog2(ITERATIONS);
 
 
+    localparam integer    LAST_ITER_I = ITERATIONS - 1;
+    localparam [ITER_W:0] LAST_ITER   = LAST_ITER_I[ITER_W:0];
+
     reg      [ITER_W:0] iteration;
-    wire     last_iter = (iteration == (ITERATIONS-1));
+    wire     last_iter = (iteration == LAST_ITER);
 
     reg running;
     reg [1:0] mode_latched;
     reg       rot_latched;
+    reg       early_latched;
 
     reg  signed [FIXED_WIDTH-1:0] x, y, z;
     wire signed  [FIXED_WIDTH-1:0] next_x, next_y, next_z;
@@ -116,12 +125,76 @@ module CORDIC #(
         .next_x(next_x), .next_y(next_y), .next_z(next_z)
     );
 
-    // K^-1 for circular rotate (Q2.14)
-    localparam signed [FIXED_WIDTH-1:0] K_INV_Q = 16'sd9949;
+    // Constants are given in Q2.30 and rounded to Q2.(FIXED_WIDTH-2), like the ROM outputs
+    localparam integer Q30_DROP = 32 - FIXED_WIDTH;
+
+    function signed [31:0] round_q30;
+        input signed [31:0] v;
+        begin
+            round_q30 = (v + ((32'sd1 <<< Q30_DROP) >>> 1)) >>> Q30_DROP;
+        end
+    endfunction
 
-    // K for hyperbolic rotation
-    localparam signed [FIXED_WIDTH-1:0] K_HYP = 16'b0100110101001000; // 1.20751953125 in Q2.14
-    //localparam signed [FIXED_WIDTH-1:0] K_HYP = 16'b0010011010100100; // 1.20751953125 in Q3.13
+    // K^-1 for circular rotate, 0.607252935 (9949 in Q2.14)
+    localparam signed [31:0] K_INV_Q30 = 32'sh26DD3B6A;
+    localparam signed [31:0] K_INV_QW  = round_q30(K_INV_Q30);
+    localparam signed [FIXED_WIDTH-1:0] K_INV_Q = K_INV_QW[FIXED_WIDTH-1:0];
+
+    // K for hyperbolic rotation, 1.207497068 with iterations 4 and 13 repeated (1.20751953125 in Q2.14)
+    localparam signed [31:0] K_HYP_Q30 = 32'sh4D47A1C8;
+    localparam signed [31:0] K_HYP_QW  = round_q30(K_HYP_Q30);
+    localparam signed [FIXED_WIDTH-1:0] K_HYP = K_HYP_QW[FIXED_WIDTH-1:0];
+
+    // ---------------- circular rotation seed ----------------
+    // With CIRC_LUT_BITS > 0 the top bits of z (rounded) pick a table angle, x/y start from its
+    // (cos, sin), already divided by the gain of the remaining iterations, and z keeps only the
+    // residual |z - angle| <= 2^-(CIRC_LUT_BITS+1), which the iterations from CIRC_LUT_BITS+1 on cover.
+    localparam [ITER_W:0] CIRC_FIRST_ITER = (CIRC_LUT_BITS > 0) ? CIRC_LUT_BITS + 1 : 0;
+    wire signed [FIXED_WIDTH-1:0] circ_x0, circ_y0, circ_z0;
+
+    // Binary angle input: A is unsigned, 2^FIXED_WIDTH = one full turn (2*pi), so a phase
+    // accumulator wraps around for free. An angle in the left half-plane is turned by half
+    // a turn (MSB flipped) into [-pi/2, pi/2), where the iterations converge, and the seed
+    // is negated instead: (cos(a), sin(a)) = -(cos(a - pi), sin(a - pi)). The remaining
+    // quarter turns are converted to Q2.(W-2) radians with one constant multiply by pi/2.
+    localparam signed [31:0] PI_HALF_Q30 = 32'sh6487ED51;                       // pi/2 in Q2.30
+    localparam signed [31:0] PI_HALF_Q   = round_q30(PI_HALF_Q30);
+
+    wire                              circ_fold  = binary_angle & (A[FIXED_WIDTH-1] ^ A[FIXED_WIDTH-2]);
+    wire signed [FIXED_WIDTH-1:0]     turns      = {A[FIXED_WIDTH-1] ^ circ_fold, A[FIXED_WIDTH-2:0]};
+    wire signed [2*FIXED_WIDTH-1:0]   turns_rad  = turns * $signed(PI_HALF_Q[FIXED_WIDTH-1:0])
+                                                 + $signed({{(FIXED_WIDTH+2){1'b0}}, 1'b1, {(FIXED_WIDTH-3){1'b0}}});
+    wire signed [FIXED_WIDTH-1:0]     circ_angle = binary_angle ? turns_rad[2*FIXED_WIDTH-3:FIXED_WIDTH-2] : $signed(A);
+    // |turns| <= a quarter turn, so the top bits of the product are sign bits, the low ones are rounded off
+    wire _unused_turns = &{turns_rad[2*FIXED_WIDTH-1:2*FIXED_WIDTH-2], turns_rad[FIXED_WIDTH-3:0], 1'b0};
+
+    generate
+        if (CIRC_LUT_BITS > 0) begin : circ_lut
+            // LSBs of z per table step
+            localparam integer SEG_SHIFT = FIXED_WIDTH - 2 - CIRC_LUT_BITS;
+
+            wire signed [FIXED_WIDTH:0] z_rounded = $signed({circ_angle[FIXED_WIDTH-1], circ_angle}) + $signed({{(FIXED_WIDTH-SEG_SHIFT+1){1'b0}}, 1'b1, {(SEG_SHIFT-1){1'b0}}});
+            wire signed [CIRC_LUT_BITS+2:0] segment = z_rounded[FIXED_WIDTH:SEG_SHIFT];
+            wire signed [FIXED_WIDTH:0] z_residual = $signed({circ_angle[FIXED_WIDTH-1], circ_angle}) - $signed({segment, {SEG_SHIFT{1'b0}}});
+
+            CORDIC_sincos_ROM_comb #(
+                .FIXED_WIDTH(FIXED_WIDTH),
+                .LUT_BITS   (CIRC_LUT_BITS)
+            ) sincos_rom (
+                .segment(segment),
+                .cos_out(circ_x0),
+                .sin_out(circ_y0)
+            );
+            assign circ_z0 = z_residual[FIXED_WIDTH-1:0];
+
+            // only the segment bits of z_rounded are used, the residual fits in FIXED_WIDTH bits
+            wire _unused = &{z_rounded[SEG_SHIFT-1:0], z_residual[FIXED_WIDTH], 1'b0};
+        end else begin : circ_k_inv
+            assign circ_x0 = K_INV_Q;
+            assign circ_y0 = '0;
+            assign circ_z0 = circ_angle;
+        end
+    endgenerate
 
     // ---------------- single-cycle prescaler ----------------
     localparam integer K_W = $clog2(FIXED_WIDTH);
@@ -139,19 +212,29 @@ module CORDIC #(
 
     wire [K_W:0] k_comb =(mode == `LINEAR_MODE) ? (is_rotating ? k_mul : k_div) : {(K_W+1){1'b0}};
 
+    // ---------------- early exit ----------------
+    // The LINEAR iterations have no gain: once the residual (z multiplying, y dividing) is exactly
+    // zero, x and y hold the exact result and the remaining iterations would only move it away and
+    // back. With early_exit the operation finishes there; out1 is still post-shifted by k_lat.
+    // The circular and hyperbolic iterations scale x and y by their gain, so they always run to the end.
+    wire early_linear   = early_latched && (mode_latched == `LINEAR_MODE);
+    wire converged      = early_linear && ((rot_latched ? z : y) == '0);           // before the first iteration
+    wire next_converged = early_linear && ((rot_latched ? next_z : next_y) == '0);
+
     // hyperbolic mode : does iteration needs repeating 
     // hyperbolic mode requires repeition on i = 4, and i = 13 
     wire repeat_signal = (mode == `HYPERBOLIC_MODE && ((iteration == 4) || (iteration == 13)));
     reg skipped_already;
 
-    // set the outputs based on the mode
+    // set the outputs based on the mode of the last operation, so that they hold while the next
+    // config is written (tqvp_CORDIC.v forwards them into A and B on a chained start)
     always @(*)
     begin
         // default values to avoid latches
         out1 = 0;
         out2 = 0;
 
-        case (mode)
+        case (mode_latched)
             `CIRCULAR_MODE:
             begin
                 if (rot_latched)
@@ -207,6 +290,7 @@ module CORDIC #(
             iteration        <= 'd0;
             mode_latched     <= 2'b00;
             rot_latched      <= 1'b0;
+            early_latched    <= 1'b0;
             x                <= '0; 
             y                <= '0; 
             z                <= '0;
@@ -219,6 +303,7 @@ module CORDIC #(
             if (start && !running) begin
                 mode_latched    <= mode;
                 rot_latched     <= is_rotating;
+                early_latched   <= early_exit;
                 k_lat           <= k_comb;       // latch k (constant-latency prescale)
                 iteration       <= 'd0;
                 running         <= 1'b1;
@@ -227,9 +312,10 @@ module CORDIC #(
                 case (mode)
                   `CIRCULAR_MODE: begin
                       if (is_rotating) begin
-                          z <= $signed(A);
-                          x <= K_INV_Q; 
-                          y <= '0;
+                          iteration <= CIRC_FIRST_ITER;
+                          z <= circ_z0;
+                          x <= circ_fold ? -circ_x0 : circ_x0;
+                          y <= circ_fold ? -circ_y0 : circ_y0;
                       end else begin
                           x <= $signed(A); 
                           y <= $signed(B); 
@@ -269,13 +355,19 @@ module CORDIC #(
                   end
                 endcase
 
+            end else if (running && converged) begin
+                // a zero operand: the result is already there, finish without iterating
+                running         <= 1'b0;
+                done            <= 1'b1;
+                skipped_already <= 0;
+
             end else if (running) begin
                 // perform iteration
                 x <= next_x; 
                 y <= next_y;
                 z <= next_z;
 
-                if (last_iter) 
+                if (last_iter || next_converged) 
                 begin
                     running <= 1'b0;
                     // post-scale once (barrel left shift) and finish
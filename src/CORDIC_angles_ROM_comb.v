@@ -1,32 +1,69 @@
+// Generated by test/gen_roms.py from cordic_model.atan_rom, do not edit.
+//
+// atan(2^-i) in Q2.30, rounded to Q2.(FIXED_WIDTH-2) on the way out.
 module CORDIC_angles_ROM_comb #(
     parameter FIXED_WIDTH = 16,
     parameter ITERATIONS  = 9
 )(
-    // 5-bits is a more then iterations but  
-    input  wire [$clog2(ITERATIONS):0] which_angle,                   
+    input  wire [$clog2(ITERATIONS):0]  which_angle,
     output wire signed [FIXED_WIDTH-1:0] angle_out
 );
-    wire [$clog2(ITERATIONS):0] idx = (which_angle > (ITERATIONS-1)) ? (ITERATIONS-1) : which_angle;
+    localparam integer DROP = 32 - FIXED_WIDTH;
 
-    function [FIXED_WIDTH-1:0] atan_lut;
+    localparam integer                LAST_I = ITERATIONS - 1;
+    localparam [$clog2(ITERATIONS):0] LAST   = LAST_I[$clog2(ITERATIONS):0];
+    wire [$clog2(ITERATIONS):0] idx = (which_angle > LAST) ? LAST : which_angle;
+
+    function [31:0] atan_lut;
         input [$clog2(ITERATIONS):0] i;
         begin
             case (i)
-                'd0:        atan_lut = 16'b0011001001000100; // atan(2^-0)
-                'd1:        atan_lut = 16'b0001110110101100; // atan(2^-1)
-                'd2:        atan_lut = 16'b0000111110101110; // atan(2^-2)
-                'd3:        atan_lut = 16'b0000011111110101; // atan(2^-3)
-                'd4:        atan_lut = 16'b0000001111111111; // atan(2^-4)
-                'd5:        atan_lut = 16'b0000001000000000; // atan(2^-5)
-                'd6:        atan_lut = 16'b0000000100000000; // atan(2^-6)
-                'd7:        atan_lut = 16'b0000000010000000; // atan(2^-7)
-                'd8:        atan_lut = 16'b0000000001000000; // atan(2^-8)
-                'd9:        atan_lut = 16'b0000000000100000; // atan(2^-9)
-                'd10:       atan_lut = 16'b0000000000010000; // atan(2^-10)
-                default:    atan_lut = 16'b0000000000001000; // default case
+                'd0:     atan_lut = 32'sh3243F6A9; // atan(2^-0)
+                'd1:     atan_lut = 32'sh1DAC6705; // atan(2^-1)
+                'd2:     atan_lut = 32'sh0FADBAFD; // atan(2^-2)
+                'd3:     atan_lut = 32'sh07F56EA7; // atan(2^-3)
+                'd4:     atan_lut = 32'sh03FEAB77; // atan(2^-4)
+                'd5:     atan_lut = 32'sh01FFD55C; // atan(2^-5)
+                'd6:     atan_lut = 32'sh00FFFAAB; // atan(2^-6)
+                'd7:     atan_lut = 32'sh007FFF55; // atan(2^-7)
+                'd8:     atan_lut = 32'sh003FFFEB; // atan(2^-8)
+                'd9:     atan_lut = 32'sh001FFFFD; // atan(2^-9)
+                'd10:    atan_lut = 32'sh00100000; // atan(2^-10)
+                'd11:    atan_lut = 32'sh00080000; // atan(2^-11)
+                'd12:    atan_lut = 32'sh00040000; // atan(2^-12)
+                'd13:    atan_lut = 32'sh00020000; // atan(2^-13)
+                'd14:    atan_lut = 32'sh00010000; // atan(2^-14)
+                'd15:    atan_lut = 32'sh00008000; // atan(2^-15)
+                'd16:    atan_lut = 32'sh00004000; // atan(2^-16)
+                'd17:    atan_lut = 32'sh00002000; // atan(2^-17)
+                'd18:    atan_lut = 32'sh00001000; // atan(2^-18)
+                'd19:    atan_lut = 32'sh00000800; // atan(2^-19)
+                'd20:    atan_lut = 32'sh00000400; // atan(2^-20)
+                'd21:    atan_lut = 32'sh00000200; // atan(2^-21)
+                'd22:    atan_lut = 32'sh00000100; // atan(2^-22)
+                'd23:    atan_lut = 32'sh00000080; // atan(2^-23)
+                'd24:    atan_lut = 32'sh00000040; // atan(2^-24)
+                'd25:    atan_lut = 32'sh00000020; // atan(2^-25)
+                'd26:    atan_lut = 32'sh00000010; // atan(2^-26)
+                'd27:    atan_lut = 32'sh00000008; // atan(2^-27)
+                'd28:    atan_lut = 32'sh00000004; // atan(2^-28)
+                'd29:    atan_lut = 32'sh00000002; // atan(2^-29)
+                'd30:    atan_lut = 32'sh00000001; // atan(2^-30)
+                'd31:    atan_lut = 32'sh00000000; // atan(2^-31)
+                default: atan_lut = 32'sd0;
             endcase
         end
     endfunction
 
-    assign angle_out = $signed(atan_lut(idx));
+    wire signed [31:0] angle_q = atan_lut(idx);
+
+    generate
+        if (DROP > 0) begin : round_out
+            wire signed [31:0] angle_r = angle_q + (32'sd1 <<< (DROP-1));
+            assign angle_out = angle_r[31:DROP];
+            wire _unused = &{angle_r[DROP-1:0], 1'b0};
+        end else begin : full_out
+            assign angle_out = angle_q;
+        end
+    endgenerate
 endmodule
@@ -1,36 +1,68 @@
-module CORDIC_atanh_ROM_comb #(parameter FIXED_WIDTH = 16,
-                               parameter ITERATIONS = 9)
-                               (
-                                    input wire [$clog2(ITERATIONS):0] which_angle,
-                                    output wire signed [FIXED_WIDTH-1:0] angle_out
-                               );
+// Generated by test/gen_roms.py from cordic_model.atanh_rom, do not edit.
+//
+// atanh(2^-i), i >= 1 (the hyperbolic iterations start at 1) in Q2.30, rounded to Q2.(FIXED_WIDTH-2) on the way out.
+module CORDIC_atanh_ROM_comb #(
+    parameter FIXED_WIDTH = 16,
+    parameter ITERATIONS  = 9
+)(
+    input  wire [$clog2(ITERATIONS):0]  which_angle,
+    output wire signed [FIXED_WIDTH-1:0] angle_out
+);
+    localparam integer DROP = 32 - FIXED_WIDTH;
 
+    localparam integer                LAST_I = ITERATIONS - 1;
+    localparam [$clog2(ITERATIONS):0] LAST   = LAST_I[$clog2(ITERATIONS):0];
+    wire [$clog2(ITERATIONS):0] idx = (which_angle > LAST) ? LAST : which_angle;
 
-    wire [$clog2(ITERATIONS):0] idx = (which_angle > (ITERATIONS-1)) ? (ITERATIONS-1) : which_angle;
-
-    function [FIXED_WIDTH-1:0] atanh_lut;
+    function [31:0] atanh_lut;
         input [$clog2(ITERATIONS):0] i;
-
-        begin 
-            case(i)
-                // Q2.14 
-                'd1: atanh_lut     = 16'b0010001100101000;     // atanh(2^-1)
-                'd2: atanh_lut     = 16'b0001000001011001;     // atanh(2^-2)
-                'd3: atanh_lut     = 16'b0000100000001011;     // atanh(2^-3)
-                'd4: atanh_lut     = 16'b0000010000000001;     // atanh(2^-4)
-                'd5: atanh_lut     = 16'b0000001000000000;     // atanh(2^-5)
-                'd6: atanh_lut     = 16'b0000000100000000;     // atanh(2^-6)
-                'd7: atanh_lut     = 16'b0000000010000000;     // atanh(2^-7)
-                'd8: atanh_lut     = 16'b0000000001000000;     // atanh(2^-8)
-                'd9: atanh_lut     = 16'b0000000000100000;     // atanh(2^-9)
-                'd10: atanh_lut    = 16'b0000000000010000;     // atanh(2^-10)
-                'd11: atanh_lut    = 16'b0000000000001000;     // atanh(2^-11)
-                default: atanh_lut = 16'b0000000000000100;     // atanh(2^-12)
-            endcase 
-        end 
+        begin
+            case (i)
+                'd1:     atanh_lut = 32'sh2327D4F5; // atanh(2^-1)
+                'd2:     atanh_lut = 32'sh1058AEFB; // atanh(2^-2)
+                'd3:     atanh_lut = 32'sh080AC48E; // atanh(2^-3)
+                'd4:     atanh_lut = 32'sh04015623; // atanh(2^-4)
+                'd5:     atanh_lut = 32'sh02002AB1; // atanh(2^-5)
+                'd6:     atanh_lut = 32'sh01000556; // atanh(2^-6)
+                'd7:     atanh_lut = 32'sh008000AB; // atanh(2^-7)
+                'd8:     atanh_lut = 32'sh00400015; // atanh(2^-8)
+                'd9:     atanh_lut = 32'sh00200003; // atanh(2^-9)
+                'd10:    atanh_lut = 32'sh00100000; // atanh(2^-10)
+                'd11:    atanh_lut = 32'sh00080000; // atanh(2^-11)
+                'd12:    atanh_lut = 32'sh00040000; // atanh(2^-12)
+                'd13:    atanh_lut = 32'sh00020000; // atanh(2^-13)
+                'd14:    atanh_lut = 32'sh00010000; // atanh(2^-14)
+                'd15:    atanh_lut = 32'sh00008000; // atanh(2^-15)
+                'd16:    atanh_lut = 32'sh00004000; // atanh(2^-16)
+                'd17:    atanh_lut = 32'sh00002000; // atanh(2^-17)
+                'd18:    atanh_lut = 32'sh00001000; // atanh(2^-18)
+                'd19:    atanh_lut = 32'sh00000800; // atanh(2^-19)
+                'd20:    atanh_lut = 32'sh00000400; // atanh(2^-20)
+                'd21:    atanh_lut = 32'sh00000200; // atanh(2^-21)
+                'd22:    atanh_lut = 32'sh00000100; // atanh(2^-22)
+                'd23:    atanh_lut = 32'sh00000080; // atanh(2^-23)
+                'd24:    atanh_lut = 32'sh00000040; // atanh(2^-24)
+                'd25:    atanh_lut = 32'sh00000020; // atanh(2^-25)
+                'd26:    atanh_lut = 32'sh00000010; // atanh(2^-26)
+                'd27:    atanh_lut = 32'sh00000008; // atanh(2^-27)
+                'd28:    atanh_lut = 32'sh00000004; // atanh(2^-28)
+                'd29:    atanh_lut = 32'sh00000002; // atanh(2^-29)
+                'd30:    atanh_lut = 32'sh00000001; // atanh(2^-30)
+                'd31:    atanh_lut = 32'sh00000000; // atanh(2^-31)
+                default: atanh_lut = 32'sd0;
+            endcase
+        end
     endfunction
 
-    assign angle_out = $signed(atanh_lut(idx));
+    wire signed [31:0] angle_q = atanh_lut(idx);
 
+    generate
+        if (DROP > 0) begin : round_out
+            wire signed [31:0] angle_r = angle_q + (32'sd1 <<< (DROP-1));
+            assign angle_out = angle_r[31:DROP];
+            wire _unused = &{angle_r[DROP-1:0], 1'b0};
+        end else begin : full_out
+            assign angle_out = angle_q;
+        end
+    endgenerate
 endmodule
-
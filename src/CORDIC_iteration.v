@@ -19,22 +19,11 @@ module CORDIC_iteration #(parameter FIXED_WIDTH = 16,
                          output reg signed [FIXED_WIDTH-1:0] next_y,
                          output reg signed [FIXED_WIDTH-1:0] next_z);
 
-        // clamp shift to [0 ... FIXED_WIDTH-1]
-        //localparam integer SHIFT_W = $clog2(ITERATIONS);
-        
-        // if (FIXED_WIDTH == 16)
-        // begin
-        //    wire [7:0] sh = (shift > (FIXED_WIDTH-1)) ? (FIXED_WIDTH-1) : shift;
-        //end
-        //else 
-        //begin
-        wire [4:0] sh = shift;
-        //end
-        
+        // shift is already clamped to [0 ... FIXED_WIDTH-1] by CORDIC.v, its width follows ITERATIONS
 
         // precompute shifts once
-        wire signed [FIXED_WIDTH-1:0] x_s = x >>> sh;
-        wire signed [FIXED_WIDTH-1:0] y_s = y >>> sh;
+        wire signed [FIXED_WIDTH-1:0] x_s = x >>> shift;
+        wire signed [FIXED_WIDTH-1:0] y_s = y >>> shift;
 
         always @(*)
         begin
@@ -0,0 +1,180 @@
+// Generated by test/gen_roms.py from cordic_model.sincos_rom, do not edit.
+//
+// (cos, sin) of the angle segment * 2^-LUT_BITS rad, divided by the gain of the CORDIC
+// iterations LUT_BITS+1 onwards, in Q2.30. The outputs are rounded to Q2.(FIXED_WIDTH-2).
+module CORDIC_sincos_ROM_comb #(
+    parameter FIXED_WIDTH = 16,
+    parameter LUT_BITS    = 3
+)(
+    input  wire signed [LUT_BITS+2:0]       segment,
+    output wire signed [FIXED_WIDTH-1:0]    cos_out,
+    output wire signed [FIXED_WIDTH-1:0]    sin_out
+);
+    localparam integer DROP = 32 - FIXED_WIDTH;
+
+    reg signed [31:0] cos_q, sin_q;
+    generate
+        if (LUT_BITS == 1) begin : lut1
+            always @* begin
+                case (segment)
+                    -'sd4:     begin cos_q = 32'shE66D8B9C; sin_q = 32'shC81FBC52; end // -2.0000 rad
+                    -'sd3:     begin cos_q = 32'sh0458C674; sin_q = 32'shC2B44A1B; end // -1.5000 rad
+                    -'sd2:     begin cos_q = 32'sh21338F13; sin_q = 32'shCC4AB8A9; end // -1.0000 rad
+                    -'sd1:     begin cos_q = 32'sh35ED5AA8; sin_q = 32'shE28A19C6; end // -0.5000 rad
+                    'sd0:      begin cos_q = 32'sh3D731E00; sin_q = 32'sh00000000; end // +0.0000 rad
+                    'sd1:      begin cos_q = 32'sh35ED5AA8; sin_q = 32'sh1D75E63A; end // +0.5000 rad
+                    'sd2:      begin cos_q = 32'sh21338F13; sin_q = 32'sh33B54757; end // +1.0000 rad
+                    'sd3:      begin cos_q = 32'sh0458C674; sin_q = 32'sh3D4BB5E5; end // +1.5000 rad
+                    'sd4:      begin cos_q = 32'shE66D8B9C; sin_q = 32'sh37E043AE; end // +2.0000 rad
+                    default:  begin cos_q = 32'sd0; sin_q = 32'sd0; end
+                endcase
+            end
+        end else if (LUT_BITS == 2) begin : lut2
+            always @* begin
+                case (segment)
+                    -'sd8:     begin cos_q = 32'shE5A411AA; sin_q = 32'shC6678074; end // -2.0000 rad
+                    -'sd7:     begin cos_q = 32'shF4B5B16D; sin_q = 32'shC1AC685D; end // -1.7500 rad
+                    -'sd6:     begin cos_q = 32'sh047B05BE; sin_q = 32'shC0D15AE2; end // -1.5000 rad
+                    -'sd5:     begin cos_q = 32'sh13F90916; sin_q = 32'shC3E3F6A5; end // -1.2500 rad
+                    -'sd4:     begin cos_q = 32'sh2239250F; sin_q = 32'shCAB35352; end // -1.0000 rad
+                    -'sd3:     begin cos_q = 32'sh2E58874B; sin_q = 32'shD4D30C19; end // -0.7500 rad
+                    -'sd2:     begin cos_q = 32'sh37963BBA; sin_q = 32'shE1A1FCF5; end // -0.5000 rad
+                    -'sd1:     begin cos_q = 32'sh3D5F2BD0; sin_q = 32'shF0544785; end // -0.2500 rad
+                    'sd0:      begin cos_q = 32'sh3F5743B2; sin_q = 32'sh00000000; end // +0.0000 rad
+                    'sd1:      begin cos_q = 32'sh3D5F2BD0; sin_q = 32'sh0FABB87B; end // +0.2500 rad
+                    'sd2:      begin cos_q = 32'sh37963BBA; sin_q = 32'sh1E5E030B; end // +0.5000 rad
+                    'sd3:      begin cos_q = 32'sh2E58874B; sin_q = 32'sh2B2CF3E7; end // +0.7500 rad
+                    'sd4:      begin cos_q = 32'sh2239250F; sin_q = 32'sh354CACAE; end // +1.0000 rad
+                    'sd5:      begin cos_q = 32'sh13F90916; sin_q = 32'sh3C1C095B; end // +1.2500 rad
+                    'sd6:      begin cos_q = 32'sh047B05BE; sin_q = 32'sh3F2EA51E; end // +1.5000 rad
+                    'sd7:      begin cos_q = 32'shF4B5B16D; sin_q = 32'sh3E5397A3; end // +1.7500 rad
+                    'sd8:      begin cos_q = 32'shE5A411AA; sin_q = 32'sh39987F8C; end // +2.0000 rad
+                    default:  begin cos_q = 32'sd0; sin_q = 32'sd0; end
+                endcase
+            end
+        end else if (LUT_BITS == 3) begin : lut3
+            always @* begin
+                case (segment)
+                    -'sd16:    begin cos_q = 32'shE56F8E1D; sin_q = 32'shC5F4C1C2; end // -2.0000 rad
+                    -'sd15:    begin cos_q = 32'shECE12FC7; sin_q = 32'shC318D998; end // -1.8750 rad
+                    -'sd14:    begin cos_q = 32'shF49F3338; sin_q = 32'shC1303CDE; end // -1.7500 rad
+                    -'sd13:    begin cos_q = 32'shFC8AAAB2; sin_q = 32'shC0428B7C; end // -1.6250 rad
+                    -'sd12:    begin cos_q = 32'sh0483F2E5; sin_q = 32'shC0537AFB; end // -1.5000 rad
+                    -'sd11:    begin cos_q = 32'sh0C6B3151; sin_q = 32'shC162C7B3; end // -1.3750 rad
+                    -'sd10:    begin cos_q = 32'sh1420D385; sin_q = 32'shC36C35DC; end // -1.2500 rad
+                    -'sd9:     begin cos_q = 32'sh1B860D3D; sin_q = 32'shC667A273; end // -1.1250 rad
+                    -'sd8:     begin cos_q = 32'sh227D536F; sin_q = 32'shCA4923BE; end // -1.0000 rad
+                    -'sd7:     begin cos_q = 32'sh28EAD249; sin_q = 32'shCF0138E7; end // -0.8750 rad
+                    -'sd6:     begin cos_q = 32'sh2EB4DC61; sin_q = 32'shD47D07E0; end // -0.7500 rad
+                    -'sd5:     begin cos_q = 32'sh33C45145; sin_q = 32'shDAA6A8BE; end // -0.6250 rad
+                    -'sd4:     begin cos_q = 32'sh3804F9E1; sin_q = 32'shE1657D33; end // -0.5000 rad
+                    -'sd3:     begin cos_q = 32'sh3B65D93D; sin_q = 32'shE89E92EA; end // -0.3750 rad
+                    -'sd2:     begin cos_q = 32'sh3DD9705C; sin_q = 32'shF0350F2E; end // -0.2500 rad
+                    -'sd1:     begin cos_q = 32'sh3F55F426; sin_q = 32'shF80AA229; end // -0.1250 rad
+                    'sd0:      begin cos_q = 32'sh3FD57486; sin_q = 32'sh00000000; end // +0.0000 rad
+                    'sd1:      begin cos_q = 32'sh3F55F426; sin_q = 32'sh07F55DD7; end // +0.1250 rad
+                    'sd2:      begin cos_q = 32'sh3DD9705C; sin_q = 32'sh0FCAF0D2; end // +0.2500 rad
+                    'sd3:      begin cos_q = 32'sh3B65D93D; sin_q = 32'sh17616D16; end // +0.3750 rad
+                    'sd4:      begin cos_q = 32'sh3804F9E1; sin_q = 32'sh1E9A82CD; end // +0.5000 rad
+                    'sd5:      begin cos_q = 32'sh33C45145; sin_q = 32'sh25595742; end // +0.6250 rad
+                    'sd6:      begin cos_q = 32'sh2EB4DC61; sin_q = 32'sh2B82F820; end // +0.7500 rad
+                    'sd7:      begin cos_q = 32'sh28EAD249; sin_q = 32'sh30FEC719; end // +0.8750 rad
+                    'sd8:      begin cos_q = 32'sh227D536F; sin_q = 32'sh35B6DC42; end // +1.0000 rad
+                    'sd9:      begin cos_q = 32'sh1B860D3D; sin_q = 32'sh39985D8D; end // +1.1250 rad
+                    'sd10:     begin cos_q = 32'sh1420D385; sin_q = 32'sh3C93CA24; end // +1.2500 rad
+                    'sd11:     begin cos_q = 32'sh0C6B3151; sin_q = 32'sh3E9D384D; end // +1.3750 rad
+                    'sd12:     begin cos_q = 32'sh0483F2E5; sin_q = 32'sh3FAC8505; end // +1.5000 rad
+                    'sd13:     begin cos_q = 32'shFC8AAAB2; sin_q = 32'sh3FBD7484; end // +1.6250 rad
+                    'sd14:     begin cos_q = 32'shF49F3338; sin_q = 32'sh3ECFC322; end // +1.7500 rad
+                    'sd15:     begin cos_q = 32'shECE12FC7; sin_q = 32'sh3CE72668; end // +1.8750 rad
+                    'sd16:     begin cos_q = 32'shE56F8E1D; sin_q = 32'sh3A0B3E3E; end // +2.0000 rad
+                    default:  begin cos_q = 32'sd0; sin_q = 32'sd0; end
+                endcase
+            end
+        end else if (LUT_BITS == 4) begin : lut4
+            always @* begin
+                case (segment)
+                    -'sd32:    begin cos_q = 32'shE5624934; sin_q = 32'shC5D7C360; end // -2.0000 rad
+                    -'sd31:    begin cos_q = 32'shE9117FB0; sin_q = 32'shC44B409C; end // -1.9375 rad
+                    -'sd30:    begin cos_q = 32'shECD7A2C2; sin_q = 32'shC2FA6D9E; end // -1.8750 rad
+                    -'sd29:    begin cos_q = 32'shF0B0EC99; sin_q = 32'shC1E69B1C; end // -1.8125 rad
+                    -'sd28:    begin cos_q = 32'shF499843D; sin_q = 32'shC110DCD2; end // -1.7500 rad
+                    -'sd27:    begin cos_q = 32'shF88D8169; sin_q = 32'shC07A086E; end // -1.6875 rad
+                    -'sd26:    begin cos_q = 32'shFC88F076; sin_q = 32'shC022B4B6; end // -1.6250 rad
+                    -'sd25:    begin cos_q = 32'sh0087D648; sin_q = 32'shC00B38F6; end // -1.5625 rad
+                    -'sd24:    begin cos_q = 32'sh0486344E; sin_q = 32'shC033ACAA; end // -1.5000 rad
+                    -'sd23:    begin cos_q = 32'sh08800C82; sin_q = 32'shC09BE760; end // -1.4375 rad
+                    -'sd22:    begin cos_q = 32'sh0C71655D; sin_q = 32'shC14380E7; end // -1.3750 rad
+                    -'sd21:    begin cos_q = 32'sh10564DDD; sin_q = 32'shC229D1B3; end // -1.3125 rad
+                    -'sd20:    begin cos_q = 32'sh142AE16C; sin_q = 32'shC34DF385; end // -1.2500 rad
+                    -'sd19:    begin cos_q = 32'sh17EB4BC7; sin_q = 32'shC4AEC256; end // -1.1875 rad
+                    -'sd18:    begin cos_q = 32'sh1B93CCD5; sin_q = 32'shC64ADD73; end // -1.1250 rad
+                    -'sd17:    begin cos_q = 32'sh1F20BC62; sin_q = 32'shC820A8E4; end // -1.0625 rad
+                    -'sd16:    begin cos_q = 32'sh228E8DCB; sin_q = 32'shCA2E4F04; end // -1.0000 rad
+                    -'sd15:    begin cos_q = 32'sh25D9D387; sin_q = 32'shCC71C259; end // -0.9375 rad
+                    -'sd14:    begin cos_q = 32'sh28FF4297; sin_q = 32'shCEE8BFA0; end // -0.8750 rad
+                    -'sd13:    begin cos_q = 32'sh2BFBB5CF; sin_q = 32'shD190D010; end // -0.8125 rad
+                    -'sd12:    begin cos_q = 32'sh2ECC30FB; sin_q = 32'shD4674BD2; end // -0.7500 rad
+                    -'sd11:    begin cos_q = 32'sh316DE3DD; sin_q = 32'shD7695CA5; end // -0.6875 rad
+                    -'sd10:    begin cos_q = 32'sh33DE2CF8; sin_q = 32'shDA9400BB; end // -0.6250 rad
+                    -'sd9:     begin cos_q = 32'sh361A9C3A; sin_q = 32'shDDE40DB1; end // -0.5625 rad
+                    -'sd8:     begin cos_q = 32'sh3820F561; sin_q = 32'shE15633C3; end // -0.5000 rad
+                    -'sd7:     begin cos_q = 32'sh39EF3240; sin_q = 32'shE4E70112; end // -0.4375 rad
+                    -'sd6:     begin cos_q = 32'sh3B8384C1; sin_q = 32'shE892E51E; end // -0.3750 rad
+                    -'sd5:     begin cos_q = 32'sh3CDC58B2; sin_q = 32'shEC563452; end // -0.3125 rad
+                    -'sd4:     begin cos_q = 32'sh3DF8555D; sin_q = 32'shF02D2BAE; end // -0.2500 rad
+                    -'sd3:     begin cos_q = 32'sh3ED65EDC; sin_q = 32'shF413F48C; end // -0.1875 rad
+                    -'sd2:     begin cos_q = 32'sh3F759739; sin_q = 32'shF806A878; end // -0.1250 rad
+                    -'sd1:     begin cos_q = 32'sh3FD55F48; sin_q = 32'shFC015511; end // -0.0625 rad
+                    'sd0:      begin cos_q = 32'sh3FF5574A; sin_q = 32'sh00000000; end // +0.0000 rad
+                    'sd1:      begin cos_q = 32'sh3FD55F48; sin_q = 32'sh03FEAAEF; end // +0.0625 rad
+                    'sd2:      begin cos_q = 32'sh3F759739; sin_q = 32'sh07F95788; end // +0.1250 rad
+                    'sd3:      begin cos_q = 32'sh3ED65EDC; sin_q = 32'sh0BEC0B74; end // +0.1875 rad
+                    'sd4:      begin cos_q = 32'sh3DF8555D; sin_q = 32'sh0FD2D452; end // +0.2500 rad
+                    'sd5:      begin cos_q = 32'sh3CDC58B2; sin_q = 32'sh13A9CBAE; end // +0.3125 rad
+                    'sd6:      begin cos_q = 32'sh3B8384C1; sin_q = 32'sh176D1AE2; end // +0.3750 rad
+                    'sd7:      begin cos_q = 32'sh39EF3240; sin_q = 32'sh1B18FEEE; end // +0.4375 rad
+                    'sd8:      begin cos_q = 32'sh3820F561; sin_q = 32'sh1EA9CC3D; end // +0.5000 rad
+                    'sd9:      begin cos_q = 32'sh361A9C3A; sin_q = 32'sh221BF24F; end // +0.5625 rad
+                    'sd10:     begin cos_q = 32'sh33DE2CF8; sin_q = 32'sh256BFF45; end // +0.6250 rad
+                    'sd11:     begin cos_q = 32'sh316DE3DD; sin_q = 32'sh2896A35B; end // +0.6875 rad
+                    'sd12:     begin cos_q = 32'sh2ECC30FB; sin_q = 32'sh2B98B42E; end // +0.7500 rad
+                    'sd13:     begin cos_q = 32'sh2BFBB5CF; sin_q = 32'sh2E6F2FF0; end // +0.8125 rad
+                    'sd14:     begin cos_q = 32'sh28FF4297; sin_q = 32'sh31174060; end // +0.8750 rad
+                    'sd15:     begin cos_q = 32'sh25D9D387; sin_q = 32'sh338E3DA7; end // +0.9375 rad
+                    'sd16:     begin cos_q = 32'sh228E8DCB; sin_q = 32'sh35D1B0FC; end // +1.0000 rad
+                    'sd17:     begin cos_q = 32'sh1F20BC62; sin_q = 32'sh37DF571C; end // +1.0625 rad
+                    'sd18:     begin cos_q = 32'sh1B93CCD5; sin_q = 32'sh39B5228D; end // +1.1250 rad
+                    'sd19:     begin cos_q = 32'sh17EB4BC7; sin_q = 32'sh3B513DAA; end // +1.1875 rad
+                    'sd20:     begin cos_q = 32'sh142AE16C; sin_q = 32'sh3CB20C7B; end // +1.2500 rad
+                    'sd21:     begin cos_q = 32'sh10564DDD; sin_q = 32'sh3DD62E4D; end // +1.3125 rad
+                    'sd22:     begin cos_q = 32'sh0C71655D; sin_q = 32'sh3EBC7F19; end // +1.3750 rad
+                    'sd23:     begin cos_q = 32'sh08800C82; sin_q = 32'sh3F6418A0; end // +1.4375 rad
+                    'sd24:     begin cos_q = 32'sh0486344E; sin_q = 32'sh3FCC5356; end // +1.5000 rad
+                    'sd25:     begin cos_q = 32'sh0087D648; sin_q = 32'sh3FF4C70A; end // +1.5625 rad
+                    'sd26:     begin cos_q = 32'shFC88F076; sin_q = 32'sh3FDD4B4A; end // +1.6250 rad
+                    'sd27:     begin cos_q = 32'shF88D8169; sin_q = 32'sh3F85F792; end // +1.6875 rad
+                    'sd28:     begin cos_q = 32'shF499843D; sin_q = 32'sh3EEF232E; end // +1.7500 rad
+                    'sd29:     begin cos_q = 32'shF0B0EC99; sin_q = 32'sh3E1964E4; end // +1.8125 rad
+                    'sd30:     begin cos_q = 32'shECD7A2C2; sin_q = 32'sh3D059262; end // +1.8750 rad
+                    'sd31:     begin cos_q = 32'shE9117FB0; sin_q = 32'sh3BB4BF64; end // +1.9375 rad
+                    'sd32:     begin cos_q = 32'shE5624934; sin_q = 32'sh3A283CA0; end // +2.0000 rad
+                    default:  begin cos_q = 32'sd0; sin_q = 32'sd0; end
+                endcase
+            end
+        end else begin : unsupported
+            always @* begin cos_q = 32'sd0; sin_q = 32'sd0; end
+        end
+
+        if (DROP > 0) begin : round_out
+            wire signed [31:0] cos_r = cos_q + (32'sd1 <<< (DROP-1));
+            wire signed [31:0] sin_r = sin_q + (32'sd1 <<< (DROP-1));
+            assign cos_out = cos_r[31:DROP];
+            assign sin_out = sin_r[31:DROP];
+            wire _unused = &{cos_r[DROP-1:0], sin_r[DROP-1:0], 1'b0};
+        end else begin : full_out
+            assign cos_out = cos_q;
+            assign sin_out = sin_q;
+        end
+    endgenerate
+endmodule
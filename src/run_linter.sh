@@ -1 +1 @@
-verilator --lint-only -Wall CORDIC.v CORDIC_angles_ROM_comb.v CORDIC_atanh_ROM_comb.v CORDIC_iteration.v tqvp_CORDIC.v
+verilator --lint-only -Wall CORDIC.v CORDIC_angles_ROM_comb.v CORDIC_atanh_ROM_comb.v CORDIC_sincos_ROM_comb.v CORDIC_iteration.v tqvp_CORDIC.v
@@ -5,12 +5,26 @@
 
 `default_nettype none
 
+// Circular rotation seeded from a (cos, sin) table (CORDIC.v CIRC_LUT_BITS), off by default.
+// The test Makefile sets it with CIRC_LUT=<n>.
+`ifndef CORDIC_CIRC_LUT_BITS
+`define CORDIC_CIRC_LUT_BITS 0
+`endif
+
+// Width of A, B and the outputs (16 or 32, multiple of 8). Above 16 bits the full value is
+// written and read with 32-bit accesses. The test Makefile sets it with WIDTH=<n>.
+`ifndef CORDIC_FIXED_WIDTH
+`define CORDIC_FIXED_WIDTH 16
+`endif
+
 // Change the name of this module to something that reflects its functionality and includes your name for uniqueness
 // For example tqvp_yourname_spi for an SPI peripheral.
 // Then edit tt_wrapper.v line 41 and change tqvp_example to your chosen module name.
 module tqvp_CORDIC
-    #(parameter ITERATIONS=12,
-      parameter FIXED_WIDTH=16)
+    #(parameter FIXED_WIDTH=`CORDIC_FIXED_WIDTH,
+      // 12 iterations for 16 bits, one per fraction bit less a few for wider datapaths
+      parameter ITERATIONS=(FIXED_WIDTH > 16) ? FIXED_WIDTH - 4 : 12,
+      parameter CIRC_LUT_BITS=`CORDIC_CIRC_LUT_BITS)
      (
     input         clk,          // Clock - the TinyQV project clock is normally set to 64MHz.
     input         rst_n,        // Reset_n - low to reset.
@@ -33,7 +47,8 @@ module tqvp_CORDIC
 
     output        user_interrupt  // Dedicated interrupt request for this peripheral
 );
-    // register 0 : {is_rotating, mode, start}
+    // register 0 : {forward_b, forward_a, early_exit, binary_angle, is_rotating, mode, start}
+    //              forward_a / forward_b: this operation takes out1 / out2 of the last one as A / B
     // register 1 : A
     // register 2 : B
     // register 3 : {shift}
@@ -47,7 +62,7 @@ module tqvp_CORDIC
 
 
     reg [1:0] mode_reg;
-    reg is_rotating_reg, start_reg;
+    reg is_rotating_reg, start_reg, binary_angle_reg, early_exit_reg;
 
     reg [FIXED_WIDTH-1:0]           A, B;
     reg [$clog2(FIXED_WIDTH):0]   shift;
@@ -57,6 +72,7 @@ module tqvp_CORDIC
     reg                             done_reg;                        
 
     reg [1:0] status_reg;
+    integer hi_byte;
     // Implement a 32-bit read/write register at address 0
     generate
     always @(posedge clk) begin
@@ -64,6 +80,8 @@ module tqvp_CORDIC
         begin
             mode_reg <= 0;
             is_rotating_reg <= 0;
+            binary_angle_reg <= 0;
+            early_exit_reg <= 0;
             start_reg <= 0;
             A <= 0;
             B <= 0;
@@ -86,8 +104,15 @@ module tqvp_CORDIC
                begin
                     mode_reg <= data_in[2:1];
                     is_rotating_reg <= data_in[3];
+                    binary_angle_reg <= data_in[4];
+                    early_exit_reg <= data_in[5];
                     start_reg <= data_in[0];
 
+                    // chaining: the outputs of the last operation become the operands of this one,
+                    // without a round trip over the bus
+                    if (data_in[0] && data_in[6]) A <= out1;
+                    if (data_in[0] && data_in[7]) B <= out2;
+
                     if (data_in[0] && !done)
                     begin
                         status_reg <= 1;
@@ -98,22 +123,16 @@ module tqvp_CORDIC
             begin
                 if (data_write_n != 2'b11)              A[7:0]   <= data_in[7:0];
                 if (data_write_n[1] != data_write_n[0]) A[15:8]  <= data_in[15:8];
-                
-                /*
-                if (FIXED_WIDTH > 16) begin : A_hi_bits
-                if (data_write_n == 2'b10)              A[FIXED_WIDTH-1:16] <= data_in[FIXED_WIDTH-1:16];                
-                end
-                */
+                // bytes above 16 bits only on a 32-bit write
+                for (hi_byte = 2; hi_byte < FIXED_WIDTH/8; hi_byte = hi_byte + 1)
+                    if (data_write_n == 2'b10)          A[8*hi_byte +: 8] <= data_in[8*hi_byte +: 8];
             end
             else if (address == 6'h2)
             begin
                 if (data_write_n != 2'b11)              B[7:0]   <= data_in[7:0];
                 if (data_write_n[1] != data_write_n[0]) B[15:8]  <= data_in[15:8];
-                /*
-                if (FIXED_WIDTH > 16) begin : B_hi_bits
-                if (data_write_n == 2'b10)              B[FIXED_WIDTH-1:16] <= data_in[FIXED_WIDTH-1:16];                
-                end
-                */
+                for (hi_byte = 2; hi_byte < FIXED_WIDTH/8; hi_byte = hi_byte + 1)
+                    if (data_write_n == 2'b10)          B[8*hi_byte +: 8] <= data_in[8*hi_byte +: 8];
             end
             else if (address == 6'h3)
             begin
@@ -126,11 +145,14 @@ module tqvp_CORDIC
 
     CORDIC #(
     .ITERATIONS(ITERATIONS),
-    .FIXED_WIDTH(FIXED_WIDTH)
+    .FIXED_WIDTH(FIXED_WIDTH),
+    .CIRC_LUT_BITS(CIRC_LUT_BITS)
     )cordic_module (.clk(clk),
                     .rst_n(rst_n),
                     .start(start_reg),
                     .is_rotating(is_rotating_reg), 
+                    .binary_angle(binary_angle_reg), // CIRCULAR rotate: A in turns (2^FIXED_WIDTH = 2*pi) instead of Q2.(FIXED_WIDTH-2) radians
+                    .early_exit(early_exit_reg),    // LINEAR: done as soon as the residual is exactly zero
                     .mode(mode_reg),                // `CIRCULAR_MODE`, `LINEAR_MODE`, `HYPERBOLIC_MODE`
                     .alpha_one_left_shift(shift),   // on which bit, the 1.0 is stored 
                                                     // for example for WIDTH=16 and this value set to 10
@@ -143,12 +165,25 @@ module tqvp_CORDIC
                     .done(done)                     // 1-cycle pulse on finish, pluggable to interrupt ? 
 );
 
+    // outputs zero-extended to the 32-bit data bus, the software sign-extends them
+    wire [31:0] out1_word, out2_word;
+    generate
+        if (FIXED_WIDTH < 32) begin : out_pad
+            assign out1_word = {{(32-FIXED_WIDTH){1'b0}}, out1};
+            assign out2_word = {{(32-FIXED_WIDTH){1'b0}}, out2};
+            wire _unused_data_in = &{data_in[31:FIXED_WIDTH], 1'b0};
+        end else begin : out_full
+            assign out1_word = out1;
+            assign out2_word = out2;
+        end
+    endgenerate
+
     // Address 0 reads the example data register.  
     // Address 4 reads ui_in
     // All other addresses read 0.
     assign data_out = (address == 6'h0) ? 32'hbadcaffe :
-                      (address == 6'h4) ?  { {(32-FIXED_WIDTH){1'b0}}, out1} :
-                      (address == 6'h5) ?  { {(32-FIXED_WIDTH){1'b0}}, out2} :
+                      (address == 6'h4) ? out1_word :
+                      (address == 6'h5) ? out2_word :
                       (address == 6'h6) ? {30'b0, status_reg} :
                       32'h0;
 
@@ -163,7 +198,6 @@ module tqvp_CORDIC
     // registers are being read.
     wire _unused = &{data_read_n, 1'b0};
     wire _unused2 = &{ui_in, 1'b0}; // ui_in is unused as we don't use the PMOD inputs in this example
-    wire _unused3 = &data_in[31:16];
 
     // or show something useful, e.g. status bits:
     assign uo_out = {6'b0, status_reg};
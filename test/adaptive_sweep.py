@@ -0,0 +1,113 @@
+# Adaptive-density sweep driver.
+#
+# By default a sweep simulates every point of its uniform grid. With CORDIC_ADAPTIVE=1
+# it starts from a coarse subset of that grid instead and bisects the intervals where
+# the residual, or its change between neighbouring points, is above a threshold, most
+# suspicious interval first. It stops when the budget of operations is used up or when
+# no interval is left above the thresholds (or narrower than MIN_FRACTION of a grid
+# step). Flat, low-error regions then cost a handful of operations, and the saved
+# budget goes to the places where the worst case hides. The points are then denser
+# where the error is high, so means over an adaptive sweep have to be weighted by the
+# width each point stands for (sweep_mean, sweep_weights), or they would be biased upwards.
+#
+# The points are spread over every harness instance in tqvs (tb.v with INSTANCES=<n>,
+# see test_utils.all_instances): the uniform grid is split between them, an adaptive
+# sweep bisects the len(tqvs) most suspicious intervals at once.
+#
+# Environment variables:
+#   CORDIC_ADAPTIVE=1           enable the adaptive driver
+#   CORDIC_ADAPTIVE_BUDGET      max. operations per sweep (default: half of the uniform grid)
+#   CORDIC_ADAPTIVE_COARSE      points of the initial coarse grid (default: 17)
+#   CORDIC_ADAPTIVE_SCALE       multiplies the thresholds the sweeps pass in (default: 1.0)
+
+import heapq
+import os
+
+import numpy as np
+
+from test_utils import map_concurrent
+
+# intervals are not split below this fraction of the uniform grid step
+MIN_FRACTION = 0.125
+
+
+def adaptive_enabled():
+    return os.getenv("CORDIC_ADAPTIVE", "0").lower() not in ("0", "off", "no", "")
+
+
+async def run_sweep(measure, tqvs, grid, residual_threshold, slope_threshold, log=None):
+    """ Evaluate measure(tqv, x) -> residual over the sweep range given by the uniform `grid`,
+    spread over the instances in tqvs.
+
+    Without CORDIC_ADAPTIVE this is just every x in grid. Otherwise an interval
+    [a, b] is bisected while max(|r(a)|, |r(b)|) > residual_threshold or its residual changes by
+    more than slope_threshold per uniform grid step. Returns the evaluated points, sorted. """
+    grid = np.asarray(grid, dtype=np.float64)
+    if not adaptive_enabled() or len(grid) < 3:
+        await map_concurrent(measure, grid, tqvs)
+        return grid
+
+    scale = float(os.getenv("CORDIC_ADAPTIVE_SCALE", 1.0))
+    residual_threshold *= scale
+    slope_threshold *= scale
+    budget = int(os.getenv("CORDIC_ADAPTIVE_BUDGET", max(3, len(grid) // 2)))
+    coarse = min(len(grid), int(os.getenv("CORDIC_ADAPTIVE_COARSE", 17)))
+    step = (grid[-1] - grid[0]) / (len(grid) - 1)
+    min_width = step * MIN_FRACTION
+
+    residuals = {}
+
+    async def refine(points):
+        for x, r in zip(points, await map_concurrent(measure, points, tqvs)):
+            residuals[x] = abs(r)
+
+    await refine([float(x) for x in np.linspace(grid[0], grid[-1], coarse)])
+
+    def score(a, b):
+        """ How suspicious [a, b] is, 0 when it does not need refining """
+        if b - a <= min_width:
+            return 0.0
+        level = max(residuals[a], residuals[b]) / residual_threshold
+        slope = abs(residuals[b] - residuals[a]) * step / (b - a) / slope_threshold
+        worst = max(level, slope)
+        return worst if worst > 1.0 else 0.0
+
+    points = sorted(residuals)
+    heap = []
+    for a, b in zip(points, points[1:]):
+        s = score(a, b)
+        if s > 0:
+            heapq.heappush(heap, (-s, a, b))
+
+    while heap and len(residuals) < budget:
+        # one midpoint per instance, as far as the budget goes
+        batch = [heapq.heappop(heap)[1:] for _ in range(min(len(tqvs), len(heap), budget - len(residuals)))]
+        await refine([(a + b) / 2 for a, b in batch])
+        for a, b in batch:
+            mid = (a + b) / 2
+            for lo, hi in ((a, mid), (mid, b)):
+                s = score(lo, hi)
+                if s > 0:
+                    heapq.heappush(heap, (-s, lo, hi))
+
+    if log is not None:
+        reason = "budget used up" if heap else "no interval above the thresholds"
+        log(f"adaptive sweep: {len(residuals)} operations instead of {len(grid)} ({reason}), "
+            f"max residual {max(residuals.values()):.3g}")
+    return np.array(sorted(residuals))
+
+
+def sweep_weights(points):
+    """ The weight of every point in a mean over the sweep range: None (equal weights) for the
+    uniform grid, the interval each point covers (half the distance to each neighbour) for an
+    adaptive one """
+    if not adaptive_enabled() or len(points) < 2:
+        return None
+    points = np.asarray(points, dtype=np.float64)
+    edges = np.concatenate([points[:1], (points[1:] + points[:-1]) / 2, points[-1:]])
+    return np.diff(edges)
+
+
+def sweep_mean(values, points):
+    """ Mean of values over the sweep range, weighted by sweep_weights """
+    return float(np.average(np.asarray(values, dtype=np.float64), weights=sweep_weights(points)))
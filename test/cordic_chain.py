@@ -0,0 +1,81 @@
+# Chained operations: the result of one operation as the operands of the next, inside the
+# peripheral (tqvp_CORDIC.v config bits 6 and 7).
+#
+# A config write that starts an operation with FORWARD_A / FORWARD_B set first copies out1
+# of the last operation into A / out2 into B. A composition then costs one config write
+# and the DONE polls per further step, instead of reading both outputs, converting them
+# and writing them back:
+#
+#   tan = [Step(CIRCULAR, 1, A=angle),                            # cos, sin in Q2.(W-2)
+#          Step(LINEAR, 0, A=PREV_OUT1, B=PREV_OUT2, shift=W - 2)]  # sin / cos in Q2.(W-2)
+#   out1, out2 = await run_chain(tqv, tan)
+#
+# Forwarding only goes out1 -> A and out2 -> B: the pair a rotation hands to a divide
+# (tan = sin / cos, tanh = sinh / cosh), or a magnitude (out1) to a multiply by a factor
+# written to B. The formats are the caller's: a LINEAR step reads A and B in the Q format
+# of its shift. run_chain drives anything with the register methods of tqv.TinyQV through
+# the transport of cordic_device.CordicDevice (or a CordicDevice itself); forward=False runs
+# the same chain the way the CPU has to without chaining, as a reference for the results
+# and the bus accesses.
+
+from cordic_model import FORWARD_A, FORWARD_B, REG_A, REG_B, REG_SHIFT, REG_OUT1, REG_OUT2
+from cordic_device import CordicDevice
+from test_utils import pack_config
+
+# operand sources of a Step besides a raw value
+PREV_OUT1, PREV_OUT2 = "out1", "out2"
+
+
+class Step:
+    """ One operation of a chain. A and B are raw register values, None (the register keeps what
+    it holds) or PREV_OUT1 / PREV_OUT2 (forwarded from the previous operation); shift is written
+    when given, flags are the other config option bits. """
+
+    def __init__(self, mode, is_rotating, A=None, B=None, shift=None, flags=0):
+        if A == PREV_OUT2 or B == PREV_OUT1:
+            raise ValueError("forwarding only goes out1 -> A and out2 -> B")
+        self.mode = mode
+        self.is_rotating = is_rotating
+        self.A = A
+        self.B = B
+        self.shift = shift
+        self.flags = flags
+
+    @property
+    def forwards(self):
+        """ [(operand register, output register)] this step takes from the previous operation """
+        return [(reg, out) for reg, out, src in ((REG_A, REG_OUT1, self.A), (REG_B, REG_OUT2, self.B)) if isinstance(src, str)]
+
+    def config(self, forward=True):
+        """ The config word that starts the step, with the forwarding bits unless forward=False """
+        flags = self.flags
+        if forward:
+            flags |= (FORWARD_A if self.A == PREV_OUT1 else 0) | (FORWARD_B if self.B == PREV_OUT2 else 0)
+        return pack_config(self.mode, self.is_rotating, 1, flags)
+
+
+async def run_chain(backend, steps, width=None, forward=True, max_polls=100, stats=None):
+    """ Run the steps one after the other and return (out1, out2) of the last one, sign-extended.
+    backend is a register interface or a CordicDevice (lane 0 runs the chain). forward=False
+    reads the outputs a step takes and writes them back over the bus instead. stats, a dict,
+    gets the register writes and reads counted. """
+    dev = backend if isinstance(backend, CordicDevice) else CordicDevice(backend, width=width, max_polls=max_polls)
+    before = dict(dev.stats)
+
+    for step in steps:
+        for reg, value in ((REG_A, step.A), (REG_B, step.B)):
+            if value is not None and not isinstance(value, str):
+                await dev._write(0, reg, value & dev.mask)
+        if not forward:
+            for reg, out in step.forwards:
+                await dev._write(0, reg, await dev._read(0, out) & dev.mask)
+        if step.shift is not None:
+            await dev._write(0, REG_SHIFT, step.shift)
+        await dev._start(0, step.config(forward))
+        dev.stats["operations"] += 1
+
+    out = (await dev._read(0, REG_OUT1), await dev._read(0, REG_OUT2))
+    if stats is not None:
+        for key in ("writes", "reads"):
+            stats[key] = stats.get(key, 0) + dev.stats[key] - before[key]
+    return out
@@ -0,0 +1,265 @@
+# NumPy-in, NumPy-out interface to the CORDIC peripheral.
+#
+# CordicDevice hides the register map, the config bits, the Q formats and the decode
+# of every mode behind array methods:
+#
+#   dev = CordicDevice(backend)
+#   cos, sin = await dev.sin_cos(angles)
+#   p = await dev.mul(a, b)
+#
+# Inputs outside the range of the core are reduced on the host first (angles modulo
+# 2*pi, mantissa/exponent splits for mul, div, sqrt and ln, ln(2) steps for sinh/cosh),
+# so every method takes any float; non-finite inputs and the trivial cases (zeros,
+# negative sqrt/ln) are answered like NumPy without an operation.
+#
+# A backend is anything with the register access methods of tqv.TinyQV:
+#
+#   TinyQV(dut, n)                 the cocotb SPI harness; a list of them (all_instances)
+#                                  spreads a batch over the harness instances
+#   TqvpCordicModel()              the register-level software model (cordic_model.py),
+#                                  no simulator needed: asyncio.run(dev.sin_cos(x))
+#   TinyQVBus(read, write, base)   memory-mapped registers on the TinyQV bus, or the
+#                                  TinyQV class of the SoC test bench, which has the same methods
+#
+# A batch costs as few register accesses as possible: identical operations run once,
+# they run sorted so that A and B are only written when they change, shift only when
+# it changes, and only the outputs the method needs are read. dev.stats counts them.
+
+import math
+
+import numpy as np
+
+from fixed_point import sign_extend
+from cordic_model import (CordicModel, default_fixed_width, FORWARD_A, FORWARD_B, REG_CONFIG, REG_A, REG_B, REG_SHIFT,
+                          REG_OUT1, REG_OUT2, REG_STATUS, STATUS_DONE)
+from test_utils import Mode, pack_config, map_concurrent, POLAR_HEADROOM
+
+# outputs an operation reads
+OUT1, OUT2 = 1, 2
+
+
+class TinyQVBus:
+    """ The peripheral's registers on a memory bus: read(addr, nbytes) -> int and
+    write(addr, value, nbytes) access the byte address base + register """
+
+    def __init__(self, read, write, base):
+        self.read = read
+        self.write = write
+        self.base = base
+
+    async def write_byte_reg(self, reg, value):
+        self.write(self.base + reg, value, 1)
+
+    async def read_byte_reg(self, reg):
+        return self.read(self.base + reg, 1)
+
+    async def write_hword_reg(self, reg, value):
+        self.write(self.base + reg, value, 2)
+
+    async def read_hword_reg(self, reg):
+        return self.read(self.base + reg, 2)
+
+    async def write_word_reg(self, reg, value):
+        self.write(self.base + reg, value, 4)
+
+    async def read_word_reg(self, reg):
+        return self.read(self.base + reg, 4)
+
+
+class CordicDevice:
+    def __init__(self, backend, width=None, iterations=None, max_polls=100):
+        """ backend: one register interface or a list of them (independent instances, driven
+        concurrently inside a cocotb test). width defaults to the FIXED_WIDTH of the build. """
+        self.lanes = list(backend) if isinstance(backend, (list, tuple)) else [backend]
+        self.width = default_fixed_width() if width is None else width
+        self.frac = self.width - 2                  # every operand and result is Q2.(width-2)
+        self.mask = (1 << self.width) - 1
+        self.max_polls = max_polls
+        model = CordicModel(width=self.width, iterations=iterations)
+        self.k_circular = model.circular_gain()
+        self.k_hyperbolic = model.hyperbolic_gain()
+        # last value written to A, B and shift per lane, None when unknown
+        self._written = [dict.fromkeys((REG_A, REG_B, REG_SHIFT)) for _ in self.lanes]
+        self.stats = {"operations": 0, "writes": 0, "reads": 0, "shift_writes": 0}
+
+    def held(self, reg):
+        """ Values the instances are known to hold in register reg (REG_A, REG_B or REG_SHIFT) """
+        return {written[reg] for written in self._written if written[reg] is not None}
+
+    # ---------------- transport ----------------
+    async def _write(self, lane, reg, value):
+        written = self._written[lane]
+        if reg in written and written[reg] == value:
+            return
+        await self.lanes[lane].write_word_reg(reg, value)
+        self.stats["writes"] += 1
+        if reg == REG_SHIFT:
+            self.stats["shift_writes"] += 1
+        if reg in written:
+            written[reg] = value
+
+    async def _read(self, lane, reg):
+        self.stats["reads"] += 1
+        if reg == REG_STATUS:
+            return await self.lanes[lane].read_byte_reg(reg)
+        # wider outputs need a 32-bit read, the registers are zero-extended to the bus
+        read = self.lanes[lane].read_hword_reg if self.width <= 16 else self.lanes[lane].read_word_reg
+        return sign_extend(await read(reg), self.width)
+
+    async def _start(self, lane, config, detail=""):
+        """ Write the config that starts an operation and poll the status until DONE """
+        await self._write(lane, REG_CONFIG, config)
+        # a chained start (cordic_chain.py) loads A / B from the outputs, their value is not known here
+        for reg, bit in ((REG_A, FORWARD_A), (REG_B, FORWARD_B)):
+            if config & bit:
+                self._written[lane][reg] = None
+        for _ in range(self.max_polls):
+            if await self._read(lane, REG_STATUS) == STATUS_DONE:
+                return
+        raise TimeoutError(f"CORDIC operation {config:#04x}{detail} did not finish")
+
+    async def _run_ops(self, lane, config, ops, shift, outputs):
+        results = []
+        for A, B in ops:
+            await self._write(lane, REG_A, int(A))
+            if B >= 0:
+                await self._write(lane, REG_B, int(B))
+            if shift is not None:
+                await self._write(lane, REG_SHIFT, shift)
+            await self._start(lane, config, f" A={A:#x} B={B:#x}")
+            results.append((await self._read(lane, REG_OUT1) if outputs & OUT1 else 0,
+                            await self._read(lane, REG_OUT2) if outputs & OUT2 else 0))
+            self.stats["operations"] += 1
+        return results
+
+    async def run(self, config, A, B=None, shift=None, outputs=OUT1 | OUT2, where=None):
+        """ Raw (out1, out2) arrays of the operations (A[i], B[i]) with one config, signed.
+        B=None leaves B alone, shift=None leaves the shift register alone. Points where
+        `where` is False are not run and read 0. """
+        A = np.asarray(A, dtype=np.int64)
+        shape = A.shape
+        A = A.ravel() & self.mask
+        # -1 marks "B not written", the raw values themselves are unsigned
+        B = np.full_like(A, -1) if B is None else np.broadcast_to(np.asarray(B, dtype=np.int64), shape).ravel() & self.mask
+        run = np.ones(A.shape, dtype=bool) if where is None else np.broadcast_to(where, shape).ravel()
+
+        out1 = np.zeros(A.shape, dtype=np.int64)
+        out2 = np.zeros(A.shape, dtype=np.int64)
+        if not np.any(run):
+            return out1.reshape(shape), out2.reshape(shape)
+
+        # every distinct operation once, sorted by A then B so that consecutive ones share their inputs
+        ops, inverse = np.unique(np.stack([A[run], B[run]], axis=1), axis=0, return_inverse=True)
+        chunks = [chunk for chunk in np.array_split(np.arange(len(ops)), len(self.lanes)) if len(chunk)]
+        if len(chunks) == 1:
+            results = await self._run_ops(0, config, ops, shift, outputs)
+        else:
+            # one contiguous chunk per instance, keeps the sorted order within each
+            lane_of = {id(backend): lane for lane, backend in enumerate(self.lanes)}
+
+            async def run_chunk(backend, chunk):
+                return await self._run_ops(lane_of[id(backend)], config, ops[chunk], shift, outputs)
+
+            parts = await map_concurrent(run_chunk, chunks, self.lanes[:len(chunks)])
+            results = [r for part in parts for r in part]
+
+        results = np.array(results, dtype=np.int64).reshape(-1, 2)
+        out1[run] = results[np.ravel(inverse), 0]
+        out2[run] = results[np.ravel(inverse), 1]
+        return out1.reshape(shape), out2.reshape(shape)
+
+    # ---------------- fixed point ----------------
+    def _to_fixed(self, v):
+        return np.rint(np.where(np.isfinite(v), v, 0.0) * (1 << self.frac)).astype(np.int64)
+
+    def _to_float(self, raw):
+        return raw / (1 << self.frac)
+
+    # ---------------- functions ----------------
+    async def sin_cos(self, angle):
+        """ (cos, sin) of angle in radians, any value """
+        angle = np.asarray(angle, dtype=np.float64)
+        # to [-pi, pi], then the left half-plane turned by pi with the results negated
+        r = angle - 2 * math.pi * np.round(angle / (2 * math.pi))
+        flip = np.abs(r) > math.pi / 2
+        r = np.where(flip, r - np.copysign(math.pi, r), r)
+        ok = np.isfinite(angle)
+        out1, out2 = await self.run(pack_config(Mode.CIRCULAR, 1, 1), self._to_fixed(r), where=ok)
+        sign = np.where(flip, -1.0, 1.0)
+        return (np.where(ok, sign * self._to_float(out1), np.nan),
+                np.where(ok, sign * self._to_float(out2), np.nan))
+
+    async def sinh_cosh(self, x):
+        """ (cosh, sinh) of x: x = k ln(2) + r, the core computes cosh(r), sinh(r) with |r| <= ln(2)/2 """
+        x = np.asarray(x, dtype=np.float64)
+        ok = np.isfinite(x)
+        k = np.where(ok, np.round(x / math.log(2)), 0.0)
+        r = x - k * math.log(2)
+        out1, out2 = await self.run(pack_config(Mode.HYPERBOLIC, 1, 1), self._to_fixed(r), where=ok)
+        c, s = self._to_float(out1), self._to_float(out2)
+        # e^x = 2^k (cosh r + sinh r), e^-x = 2^-k (cosh r - sinh r)
+        with np.errstate(over="ignore"):
+            up, down = np.ldexp(c + s, k.astype(np.int64)), np.ldexp(c - s, -k.astype(np.int64))
+        return (np.where(ok, (up + down) / 2, np.cosh(x)),
+                np.where(ok, (up - down) / 2, np.sinh(x)))
+
+    async def mul(self, a, b):
+        """ a * b: the mantissas in [0.5, 1) are multiplied by the core (linear rotating), the exponents added """
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+        ok = np.isfinite(a) & np.isfinite(b) & (a != 0) & (b != 0)
+        ma, ea = np.frexp(a)
+        mb, eb = np.frexp(b)
+        out1, _ = await self.run(pack_config(Mode.LINEAR, 1, 1), self._to_fixed(ma), self._to_fixed(mb),
+                                 shift=self.frac, outputs=OUT1, where=ok)
+        return np.where(ok, np.ldexp(self._to_float(out1), ea + eb), a * b)
+
+    async def div(self, a, b):
+        """ a / b: the mantissas in [0.5, 1) are divided by the core (linear vectoring), the exponents subtracted """
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+        ok = np.isfinite(a) & np.isfinite(b) & (a != 0) & (b != 0)
+        ma, ea = np.frexp(a)
+        mb, eb = np.frexp(b)
+        # the core converges for a positive divisor, the sign goes to the dividend
+        ma, mb = np.where(mb < 0, -ma, ma), np.abs(mb)
+        out1, _ = await self.run(pack_config(Mode.LINEAR, 0, 1), self._to_fixed(mb), self._to_fixed(ma),
+                                 shift=self.frac, outputs=OUT1, where=ok)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(ok, np.ldexp(self._to_float(out1), ea - eb), a / b)
+
+    async def sqrt(self, x):
+        """ sqrt(x) = sqrt(m) 2^e with x = m 4^e, m in [0.25, 1): hyperbolic vectoring of (m + 1/4, m - 1/4) """
+        x = np.asarray(x, dtype=np.float64)
+        ok = np.isfinite(x) & (x > 0)
+        m, e = np.frexp(np.where(ok, x, 1.0))
+        odd = (e % 2) == 1
+        m, e = np.where(odd, m / 2, m), np.where(odd, e + 1, e) // 2
+        out1, _ = await self.run(pack_config(Mode.HYPERBOLIC, 0, 1), self._to_fixed(m + 0.25), self._to_fixed(m - 0.25),
+                                 outputs=OUT1, where=ok)
+        with np.errstate(invalid="ignore"):
+            return np.where(ok, np.ldexp(self._to_float(out1) / self.k_hyperbolic, e), np.sqrt(x))
+
+    async def ln(self, x):
+        """ ln(x) = 2 atanh((m - 1) / (m + 1)) + e ln(2) with x = m 2^e, m in [0.5, 1): hyperbolic vectoring """
+        x = np.asarray(x, dtype=np.float64)
+        ok = np.isfinite(x) & (x > 0)
+        m, e = np.frexp(np.where(ok, x, 1.0))
+        # halved, so that m + 1 fits Q2.(width-2); the ratio, and z, stay the same
+        _, out2 = await self.run(pack_config(Mode.HYPERBOLIC, 0, 1), self._to_fixed((m + 1) / 2), self._to_fixed((m - 1) / 2),
+                                 outputs=OUT2, where=ok)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(ok, 2 * self._to_float(out2) + e * math.log(2), np.log(x))
+
+    async def atan2(self, y, x):
+        """ atan2(y, x) in [-pi, pi]: circular vectoring of the point scaled to fill the registers,
+        mirrored through the origin when x < 0 """
+        y, x = np.broadcast_arrays(np.asarray(y, dtype=np.float64), np.asarray(x, dtype=np.float64))
+        magnitude = np.hypot(x, y)
+        ok = np.isfinite(magnitude) & (magnitude > 0)
+        mirrored = x < 0
+        scale = POLAR_HEADROOM * ((1 << (self.width - 1)) - 1) / self.k_circular / np.where(ok, magnitude, 1.0)
+        A = np.rint(np.where(ok, np.where(mirrored, -x, x) * scale, 0.0)).astype(np.int64)
+        B = np.rint(np.where(ok, np.where(mirrored, -y, y) * scale, 0.0)).astype(np.int64)
+        _, out2 = await self.run(pack_config(Mode.CIRCULAR, 0, 1), A, B, outputs=OUT2, where=ok)
+        theta = self._to_float(out2)
+        theta = np.where(mirrored, np.where(y >= 0, theta + math.pi, theta - math.pi), theta)
+        return np.where(ok, theta, np.arctan2(y, x))
@@ -0,0 +1,367 @@
+# Bit-exact Python model of the CORDIC core (src/CORDIC.v, CORDIC_iteration.v and the ROMs).
+#
+# The model works on the raw register values the tests write and read: A, B and
+# alpha_one_left_shift in, (out1, out2) out, with the same FIXED_WIDTH wrap-around,
+# arithmetic shifts, LINEAR prescale (k_comb) and HYPERBOLIC repeats as the RTL.
+# It is meant as a reference for differential tests, so any change to the datapath
+# must be mirrored here. early_exit=True models config bit 5: a LINEAR operation ends
+# as soon as its residual is zero (CORDIC.v early_exit).
+#
+#   from cordic_model import CordicModel
+#   out1, out2 = CordicModel().run(mode=0, is_rotating=1, A=0x1922)
+#
+# TqvpCordicModel wraps it in the register map of tqvp_CORDIC.v, behind the same
+# access methods as tqv.TinyQV (the software backend of cordic_device.py).
+
+import math
+import os
+
+CIRCULAR, LINEAR, HYPERBOLIC = 0, 1, 2
+
+# The ROMs and constants are held in Q2.30 and rounded to Q2.(FIXED_WIDTH-2) in the RTL
+# (gen_roms.py writes the ROMs from the functions below), so the same tables serve every width
+ROM_FRAC = 30
+ROM_ENTRIES = 32
+
+# CORDIC.v start values in Q2.30: 1/K (circular), K (hyperbolic, iterations 4 and 13 repeated)
+K_INV_Q30 = 0x26DD3B6A
+K_HYP_Q30 = 0x4D47A1C8
+
+# hyperbolic iterations that are run twice
+HYPERBOLIC_REPEATS = (4, 13)
+
+# pi/2 in Q2.30, rounded to FIXED_WIDTH for the binary angle conversion
+PI_HALF_Q30 = 0x6487ED51
+
+
+def clog2(n):
+    return (n - 1).bit_length()
+
+
+def atan_rom():
+    """ CORDIC_angles_ROM_comb: atan(2^-i) in Q2.30, index 0..ROM_ENTRIES-1 """
+    return [round(math.atan(2.0 ** -i) * (1 << ROM_FRAC)) for i in range(ROM_ENTRIES)]
+
+
+def atanh_rom():
+    """ CORDIC_atanh_ROM_comb: atanh(2^-i) in Q2.30, index 1..ROM_ENTRIES-1 (hyperbolic mode starts at 1) """
+    return [0] + [round(math.atanh(2.0 ** -i) * (1 << ROM_FRAC)) for i in range(1, ROM_ENTRIES)]
+
+
+def sincos_rom(lut_bits):
+    """ {segment: (cos, sin)} of CORDIC_sincos_ROM_comb in Q2.30.
+
+    Segment k stands for the angle k * 2^-lut_bits rad, k covers the whole Q2.x range of z. The
+    values are divided by the gain of the iterations that still follow (lut_bits+1 onwards, the
+    infinite product: the tail past iteration 11 changes them by less than 1e-7). """
+    gain = math.prod(math.sqrt(1 + 2.0 ** (-2 * i)) for i in range(lut_bits + 1, 64))
+    one = 1 << ROM_FRAC
+    limit = 1 << (lut_bits + 1)
+    return {k: (round(math.cos(k / (1 << lut_bits)) / gain * one), round(math.sin(k / (1 << lut_bits)) / gain * one))
+            for k in range(-limit, limit + 1)}
+
+
+def default_fixed_width():
+    """ FIXED_WIDTH the RTL was built with (make WIDTH=<n> exports CORDIC_FIXED_WIDTH) """
+    return int(os.getenv("CORDIC_FIXED_WIDTH", 16))
+
+
+def default_iterations(width):
+    """ tqvp_CORDIC ITERATIONS for a FIXED_WIDTH: 12 up to 16 bits, width - 4 above """
+    return 12 if width <= 16 else width - 4
+
+
+def default_circ_lut_bits():
+    """ CIRC_LUT_BITS the RTL was built with (make CIRC_LUT=<n> exports CORDIC_CIRC_LUT) """
+    return int(os.getenv("CORDIC_CIRC_LUT", 0))
+
+
+class CordicModel:
+    def __init__(self, width=None, iterations=None, circ_lut_bits=None):
+        if width is None:
+            width = default_fixed_width()
+        self.width = width
+        self.iterations = default_iterations(width) if iterations is None else iterations
+        self.mask = (1 << width) - 1
+        # register widths in the RTL
+        self.shift_mask = (1 << (clog2(width) + 1)) - 1       # alpha_one_left_shift
+        self.rom_index_max = self.iterations - 1              # ROM index clamp
+        # CORDIC.v CIRC_LUT_BITS: circular rotation seeded from the (cos, sin) table
+        if circ_lut_bits is None:
+            circ_lut_bits = default_circ_lut_bits()
+        self.circ_lut_bits = circ_lut_bits
+        self.sincos = sincos_rom(circ_lut_bits) if circ_lut_bits else None
+        self.atan = [self.from_q30(v) for v in atan_rom()]
+        self.atanh = [self.from_q30(v) for v in atanh_rom()]
+        self.k_inv = self.from_q30(K_INV_Q30)
+        self.k_hyp = self.from_q30(K_HYP_Q30)
+
+    # ---------------- fixed-point helpers ----------------
+    def wrap(self, v):
+        """ Truncate to FIXED_WIDTH bits and sign-extend, like assigning to a signed reg """
+        v &= self.mask
+        return v - (1 << self.width) if v >> (self.width - 1) else v
+
+    def sra(self, v, n):
+        """ Arithmetic right shift of a signed FIXED_WIDTH value (>>>) """
+        return self.wrap(v) >> n
+
+    def shl(self, v, n):
+        """ Left shift truncated to FIXED_WIDTH (<<<) """
+        return self.wrap(v << n)
+
+    def msb_index(self, v):
+        """ Highest set bit of an unsigned FIXED_WIDTH value, 0 for 0 """
+        v &= self.mask
+        return v.bit_length() - 1 if v else 0
+
+    def from_q30(self, v):
+        """ Q2.30 constant rounded to Q2.(width-2), like the ROM outputs """
+        drop = ROM_FRAC + 2 - self.width
+        return self.wrap((v + (1 << (drop - 1))) >> drop if drop > 0 else v)
+
+    def abs_tc(self, v):
+        """ Two's complement absolute value as an unsigned FIXED_WIDTH value (-2^(W-1) stays 2^(W-1)) """
+        v = self.wrap(v)
+        return (-v) & self.mask if v < 0 else v
+
+    # ---------------- ROMs and per-iteration constants ----------------
+    def atan_rom(self, i):
+        i = min(i, self.rom_index_max)
+        return self.atan[i] if i < ROM_ENTRIES else 0
+
+    def atanh_rom(self, i):
+        i = min(i, self.rom_index_max)
+        return self.atanh[i] if i < ROM_ENTRIES else 0
+
+    def alpha_linear(self, sh, shift):
+        if sh > shift:
+            return 0
+        diff = (shift - sh) & self.shift_mask
+        return self.shl(1, diff) if diff < self.width else 0
+
+    def delta_z(self, mode, sh, shift):
+        if mode == CIRCULAR:
+            return self.atan_rom(sh)
+        if mode == LINEAR:
+            return self.alpha_linear(sh, shift)
+        if mode == HYPERBOLIC:
+            return self.atanh_rom(sh)
+        return 1
+
+    def k_comb(self, mode, is_rotating, A, B, shift):
+        """ LINEAR prescale: multiply keeps |z| < 2.0, divide keeps |y| < 2|x| """
+        if mode != LINEAR:
+            return 0
+        msb_b = self.msb_index(self.abs_tc(B))
+        if is_rotating:
+            return (msb_b - shift) & self.shift_mask if msb_b >= shift + 1 else 0
+        msb_a = self.msb_index(self.abs_tc(A))
+        return msb_b - msb_a if msb_b > msb_a else 0
+
+    # ---------------- datapath ----------------
+    def iteration(self, mode, x, y, z, sh, delta_z, sigma_positive):
+        """ CORDIC_iteration: one micro-rotation, returns (next_x, next_y, next_z) """
+        x_s = x >> sh           # x, y are already sign-extended, so >> is >>>
+        y_s = y >> sh
+        if mode == CIRCULAR:
+            if sigma_positive:
+                return self.wrap(x - y_s), self.wrap(y + x_s), self.wrap(z - delta_z)
+            return self.wrap(x + y_s), self.wrap(y - x_s), self.wrap(z + delta_z)
+        if mode == LINEAR:
+            if sigma_positive:
+                return x, self.wrap(y + x_s), self.wrap(z - delta_z)
+            return x, self.wrap(y - x_s), self.wrap(z + delta_z)
+        if mode == HYPERBOLIC:
+            if sigma_positive:
+                return self.wrap(x + y_s), self.wrap(y + x_s), self.wrap(z - delta_z)
+            return self.wrap(x - y_s), self.wrap(y - x_s), self.wrap(z + delta_z)
+        return 0, 0, 0
+
+    def turns_to_angle(self, A):
+        """ Binary angle (2^width = one turn) to (Q2.(width-2) radians in [-pi/2, pi/2), folded): an
+        angle in the left half-plane is turned by half a turn and folded is set, the seed is negated """
+        w = self.width
+        a = A & self.mask
+        folded = ((a >> (w - 1)) ^ (a >> (w - 2))) & 1
+        turns = self.wrap(a ^ (folded << (w - 1)))
+        pi_half = self.from_q30(PI_HALF_Q30)
+        return self.wrap((turns * pi_half + (1 << (w - 3))) >> (w - 2)), bool(folded)
+
+    def sincos_seed(self, A):
+        """ (x, y, z, first iteration) of a circular rotation with the (cos, sin) table: A rounded to
+        the nearest table angle picks the seed, z keeps the residual angle """
+        seg_shift = self.width - 2 - self.circ_lut_bits
+        segment = (A + (1 << (seg_shift - 1))) >> seg_shift
+        drop = ROM_FRAC - (self.width - 2)
+        cos_q, sin_q = self.sincos[segment]
+        if drop > 0:
+            cos_q, sin_q = (cos_q + (1 << (drop - 1))) >> drop, (sin_q + (1 << (drop - 1))) >> drop
+        return self.wrap(cos_q), self.wrap(sin_q), self.wrap(A - (segment << seg_shift)), self.circ_lut_bits + 1
+
+    def start(self, mode, is_rotating, A, B, binary_angle=False):
+        """ (x, y, z, first iteration) loaded on start, before any prescale """
+        A, B = self.wrap(A), self.wrap(B)
+        if mode == CIRCULAR:
+            if not is_rotating:
+                return A, B, 0, 0
+            folded = False
+            if binary_angle:
+                A, folded = self.turns_to_angle(A)
+            x, y, z, iteration = self.sincos_seed(A) if self.sincos is not None else (self.k_inv, 0, A, 0)
+            if folded:
+                x, y = self.wrap(-x), self.wrap(-y)
+            return x, y, z, iteration
+        if mode == LINEAR:
+            return (A, 0, B, 0) if is_rotating else (A, B, 0, 0)
+        if mode == HYPERBOLIC:
+            return (self.k_hyp, 0, A, 1) if is_rotating else (A, B, 0, 1)
+        return 0, 0, 0, 0
+
+    def steps(self, mode, is_rotating, A, B=0, shift=11, binary_angle=False, early_exit=False):
+        """ Yield (iteration, sh, delta_z, x, y, z) before every clock the core spends running,
+        and finally (None, None, None, x, y, z) with the state after the last iteration. """
+        shift &= self.shift_mask
+        k = self.k_comb(mode, is_rotating, A, B, shift)
+        x, y, z, iteration = self.start(mode, is_rotating, A, B, binary_angle)
+        if mode == LINEAR:
+            if is_rotating:
+                z = self.sra(z, k)
+            else:
+                y = self.sra(y, k)
+
+        # the residual the iterations drive to zero, LINEAR early exit stops on it
+        early_exit = early_exit and mode == LINEAR
+        residual = 2 if is_rotating else 1
+
+        repeated = False
+        while True:
+            sh = min(iteration, self.width - 1)
+            dz = self.delta_z(mode, sh, shift)
+            sigma_positive = z >= 0 if is_rotating else y < 0
+            yield iteration, sh, dz, x, y, z
+            if early_exit and (x, y, z)[residual] == 0:
+                # zero from the start: one clock, no iteration
+                break
+            x, y, z = self.iteration(mode, x, y, z, sh, dz, sigma_positive)
+
+            if iteration == self.iterations - 1 or (early_exit and (x, y, z)[residual] == 0):
+                break
+            if repeated:
+                repeated = False
+                iteration += 1
+            elif mode == HYPERBOLIC and iteration in HYPERBOLIC_REPEATS:
+                repeated = True
+            else:
+                iteration += 1
+        yield None, None, None, x, y, z
+
+    def outputs(self, mode, is_rotating, x, y, z, k):
+        """ Output mux of CORDIC.v, as signed values """
+        if mode == LINEAR:
+            if is_rotating:
+                return self.shl(y, k), z
+            return self.shl(z, k), y
+        if mode in (CIRCULAR, HYPERBOLIC) and is_rotating:
+            return x, y
+        return x, z
+
+    def run(self, mode, is_rotating, A, B=0, shift=11, binary_angle=False, early_exit=False):
+        """ Final (out1, out2) of one operation, sign-extended like read_out_pair_signed """
+        *_, (_, _, _, x, y, z) = self.steps(mode, is_rotating, A, B, shift, binary_angle, early_exit)
+        k = self.k_comb(mode, is_rotating, A, B, shift & self.shift_mask)
+        return self.outputs(mode, is_rotating, x, y, z, k)
+
+    def circular_gain(self):
+        """ K_C: circular vectoring ends with x = K_C * sqrt(x0^2 + y0^2) """
+        return math.prod(math.sqrt(1 + 2.0 ** (-2 * min(i, self.width - 1))) for i in range(self.iterations))
+
+    def hyperbolic_gain(self):
+        """ K_H: hyperbolic vectoring ends with x = K_H * sqrt(x0^2 - y0^2) (iterations 4 and 13 counted twice) """
+        return math.prod(math.sqrt(1 - 2.0 ** (-2 * sh)) for it, sh, *_ in self.steps(HYPERBOLIC, 0, 0) if it is not None)
+
+    def cycles(self, mode, is_rotating, A=0, B=0, shift=11, binary_angle=False, early_exit=False):
+        """ Clocks from start to done """
+        return sum(1 for step in self.steps(mode, is_rotating, A, B, shift, binary_angle, early_exit)
+                   if step[0] is not None)
+
+
+# tqvp_CORDIC.v register map
+REG_CONFIG, REG_A, REG_B, REG_SHIFT, REG_OUT1, REG_OUT2, REG_STATUS = range(7)
+STATUS_READY, STATUS_BUSY, STATUS_DONE = 0, 1, 2
+MAGIC = 0xBADCAFFE
+
+
+# config bits 6 and 7: the operation takes out1 / out2 of the last one as A / B
+FORWARD_A, FORWARD_B = 0x40, 0x80
+
+
+def decode_config(value):
+    """ (mode, is_rotating, binary_angle, early_exit) of a config register write """
+    return (value >> 1) & 3, (value >> 3) & 1, bool(value & 0x10), bool(value & 0x20)
+
+
+class TqvpCordicModel:
+    """ Register-level model of tqvp_CORDIC.v with the access methods of tqv.TinyQV, so code
+    written against the harness runs on it unchanged, without a simulator. An operation
+    completes as soon as its config write starts it, the status register reads DONE after. """
+
+    def __init__(self, width=None, iterations=None, circ_lut_bits=None):
+        self.core = CordicModel(width=width, iterations=iterations, circ_lut_bits=circ_lut_bits)
+        self.width = self.core.width
+        self._reset()
+
+    def _reset(self):
+        self.A = self.B = 0
+        self.shift = 11
+        self.out1 = self.out2 = 0
+        self.status = STATUS_READY
+
+    async def reset(self):
+        self._reset()
+
+    def write(self, reg, value, nbytes):
+        """ The register accesses without await, nbytes = 1, 2 or 4 (bus stand-ins build on these) """
+        if reg == REG_CONFIG:
+            if value & 1:
+                if value & FORWARD_A:
+                    self.A = self.out1
+                if value & FORWARD_B:
+                    self.B = self.out2
+                mode, is_rotating, binary_angle, early_exit = decode_config(value)
+                out1, out2 = self.core.run(mode, is_rotating, self.A, self.B, self.shift, binary_angle, early_exit)
+                self.out1, self.out2 = out1 & self.core.mask, out2 & self.core.mask
+                self.status = STATUS_DONE
+        elif reg in (REG_A, REG_B):
+            # 8- and 16-bit writes only change the low bytes, like the RTL
+            keep = self.core.mask & ~((1 << (8 * nbytes)) - 1)
+            old = self.A if reg == REG_A else self.B
+            new = (old & keep) | (value & self.core.mask & ~keep)
+            if reg == REG_A:
+                self.A = new
+            else:
+                self.B = new
+        elif reg == REG_SHIFT:
+            self.shift = value & self.core.shift_mask
+
+    def read(self, reg, nbytes):
+        value = {REG_CONFIG: MAGIC, REG_OUT1: self.out1, REG_OUT2: self.out2, REG_STATUS: self.status}.get(reg, 0)
+        return value & ((1 << (8 * nbytes)) - 1)
+
+    async def write_byte_reg(self, reg, value):
+        self.write(reg, value, 1)
+
+    async def read_byte_reg(self, reg):
+        return self.read(reg, 1)
+
+    async def write_hword_reg(self, reg, value):
+        self.write(reg, value, 2)
+
+    async def read_hword_reg(self, reg):
+        return self.read(reg, 2)
+
+    async def write_word_reg(self, reg, value):
+        self.write(reg, value, 4)
+
+    async def read_word_reg(self, reg):
+        return self.read(reg, 4)
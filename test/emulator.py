@@ -0,0 +1,283 @@
+# In-process emulator of tqvp_CORDIC behind the SPI test harness, for test development
+# and CI smoke runs without a simulator (run_emulated.py runs the test modules on it).
+#
+# EmulatedTinyQV has the methods of tqv.TinyQV and EmulatedDut stands in for the dut of a
+# cocotb test. The values come from cordic_model.py; the timing is counted in clock cycles
+# of the harness and matches the RTL to about a cycle:
+#
+#   register write   262 cycles, the register changes on the last one
+#   register read    263 cycles, the register is sampled after the 131 of the address phase
+#   operation        start pulse on the config write, done pulse CordicModel.cycles() + 1
+#                    cycles later (the iterations, hyperbolic repeats, table seeding and
+#                    LINEAR early exit included); status reads BUSY from the write and DONE
+#                    after the pulse, is_interrupt_asserted() reads the pulse one clock
+#                    later, like on the RTL
+#
+# The tests await cocotb's ClockCycles and start_soon; run_emulated.py swaps them for the
+# Scheduler below, a discrete-event loop over the emulated clock, so several tasks (e.g.
+# map_concurrent over --instances) interleave by cycle like they do in the simulator.
+
+import heapq
+import logging
+import types
+
+from cordic_model import TqvpCordicModel, decode_config, REG_CONFIG, REG_STATUS, STATUS_BUSY
+from reg_log import RegisterLog, WRITE, READ, RESET
+
+# cycles of one SPI transaction of tqv_reg.py
+WRITE_CYCLES = 262
+READ_CYCLES = 263
+READ_SAMPLE = 131
+RESET_CYCLES = 10
+
+
+class _Wait:
+    """ What a task yields to the scheduler: resume after this many cycles """
+
+    def __init__(self, cycles):
+        self.cycles = cycles
+
+
+class Task:
+    """ A coroutine run by the Scheduler; awaiting it waits for its result """
+
+    def __init__(self, scheduler, coro):
+        self.scheduler = scheduler
+        self.coro = coro
+        self.done = False
+        self.result = None
+        self.exception = None
+        self.waiters = []
+
+    def step(self, value=None):
+        try:
+            command = self.coro.send(value)
+        except StopIteration as stop:
+            self._finish(stop.value, None)
+        except BaseException as exc:
+            self._finish(None, exc)
+        else:
+            if isinstance(command, _Wait):
+                self.scheduler.wake(self, command.cycles)
+            elif isinstance(command, Task):
+                if command.done:
+                    self.scheduler.wake(self, 0)
+                else:
+                    command.waiters.append(self)
+            else:
+                self._finish(None, RuntimeError(f"the emulator cannot await {command!r}, only ClockCycles and tasks"))
+
+    def _finish(self, result, exception):
+        self.done, self.result, self.exception = True, result, exception
+        for waiter in self.waiters:
+            self.scheduler.wake(waiter, 0)
+        self.waiters = []
+        if exception is not None and not isinstance(exception, Exception):
+            raise exception
+
+    def kill(self):
+        if not self.done:
+            self.coro.close()
+            self._finish(None, None)
+
+    def __await__(self):
+        if not self.done:
+            yield self
+        if self.exception is not None:
+            raise self.exception
+        return self.result
+
+
+class Scheduler:
+    """ Runs tasks in the order of the emulated clock cycle they wait for """
+
+    def __init__(self):
+        self.cycle = 0
+        self.period_ns = 100.0
+        self._queue = []
+        self._seq = 0
+        self.tasks = []
+
+    def wake(self, task, cycles):
+        heapq.heappush(self._queue, (self.cycle + cycles, self._seq, task))
+        self._seq += 1
+
+    def start_soon(self, coro):
+        task = Task(self, coro)
+        self.tasks.append(task)
+        self.wake(task, 0)
+        return task
+
+    def run(self, coro):
+        """ Run coro to completion (the test), with every task it starts; returns its result """
+        main = self.start_soon(coro)
+        while not main.done:
+            if not self._queue:
+                raise RuntimeError("emulator deadlock: every task waits for another one")
+            cycle, _, task = heapq.heappop(self._queue)
+            self.cycle = max(self.cycle, cycle)
+            if not task.done:
+                task.step()
+        # a test ends when its coroutine does, like in cocotb; the rest is dropped
+        failed = [t for t in self.tasks if t is not main and t.done and t.exception is not None]
+        for task in self.tasks:
+            task.kill()
+        self.tasks, self._queue = [], []
+        if main.exception is not None:
+            raise main.exception
+        if failed:
+            raise failed[0].exception
+        return main.result
+
+    def sim_time(self, units="step"):
+        """ cocotb.utils.get_sim_time on the emulated clock, one step = 1 ps """
+        ps = self.cycle * self.period_ns * 1000
+        return {"fs": ps * 1000, "ps": ps, "ns": ps / 1e3, "us": ps / 1e6, "ms": ps / 1e9,
+                "sec": ps / 1e12, "step": ps}[units]
+
+
+class ClockCycles:
+    """ cocotb.triggers.ClockCycles on the emulated clock """
+
+    def __init__(self, signal, num_cycles, rising=True):
+        self.num_cycles = num_cycles
+
+    def __await__(self):
+        yield _Wait(self.num_cycles)
+        return self
+
+
+class Clock:
+    """ cocotb.clock.Clock: only sets the period, the scheduler is the clock """
+
+    def __init__(self, signal, period, units="step"):
+        scale = {"fs": 1e-6, "ps": 1e-3, "ns": 1.0, "us": 1e3, "ms": 1e6, "sec": 1e9, "step": 1e-3}[units]
+        signal.scheduler.period_ns = period * scale
+
+    async def start(self, start_high=True):
+        pass
+
+
+class EmulatedCordic(TqvpCordicModel):
+    """ TqvpCordicModel with the status register and the done pulse in emulated clock cycles """
+
+    def __init__(self, scheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def _reset(self):
+        super()._reset()
+        self.done_cycle = None
+
+    def write(self, reg, value, nbytes):
+        super().write(reg, value, nbytes)
+        if reg == REG_CONFIG and value & 1:
+            # on the operands the operation ran on, forwarded ones included
+            mode, is_rotating, binary_angle, early_exit = decode_config(value)
+            cycles = self.core.cycles(mode, is_rotating, self.A, self.B, self.shift, binary_angle, early_exit)
+            # start pulse on this cycle, done one cycle after the last iteration
+            self.done_cycle = self.scheduler.cycle + cycles + 1
+
+    def read(self, reg, nbytes):
+        if reg == REG_STATUS and self.done_cycle is not None and self.scheduler.cycle <= self.done_cycle:
+            return STATUS_BUSY
+        return super().read(reg, nbytes)
+
+    @property
+    def interrupt(self):
+        # a test reads the signals after the clock edge, but before the registers update on it
+        return self.done_cycle is not None and self.scheduler.cycle == self.done_cycle + 1
+
+
+class _Signal:
+    def __init__(self, scheduler, value=0):
+        self.scheduler = scheduler
+        self.value = value
+
+
+class _TimeFilter(logging.Filter):
+    """ Prefixes the records of dut._log with the emulated time, like cocotb's log """
+
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+
+    def filter(self, record):
+        record.sim_time = f"{self.scheduler.sim_time('ns'):.2f}ns"
+        return True
+
+
+class EmulatedDut:
+    """ The dut of a test: the clock, the log, n_duts and one EmulatedCordic per harness instance """
+
+    def __init__(self, scheduler, instances=1, width=None, circ_lut_bits=None):
+        self.scheduler = scheduler
+        self.clk = _Signal(scheduler)
+        self.n_duts = types.SimpleNamespace(value=instances)
+        self.dump_enable = _Signal(scheduler)
+        self.peripherals = [EmulatedCordic(scheduler, width=width, circ_lut_bits=circ_lut_bits)
+                            for _ in range(instances)]
+        self._log = logging.getLogger("emulator.tb")
+        if not self._log.handlers:
+            handler = logging.StreamHandler()
+            handler.addFilter(_TimeFilter(scheduler))
+            handler.setFormatter(logging.Formatter("%(sim_time)16s %(levelname)-8s %(message)s"))
+            self._log.addHandler(handler)
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+
+
+class EmulatedTinyQV:
+    """ tqv.TinyQV on an EmulatedDut, with the same register log (CORDIC_REGLOG) """
+
+    def __init__(self, dut, peripheral_num, instance=0, log=None):
+        self.dut = dut
+        self.instance = instance
+        self.regs = dut.peripherals[instance]
+        self.log = RegisterLog.open() if log is None else log
+
+    def _record(self, kind, reg, size, value, t_ns):
+        if self.log is not None:
+            self.log.record(kind, self.instance, reg, size, value, t_ns)
+
+    async def reset(self):
+        self.dut._log.info("Reset")
+        self._record(RESET, 0, 0, 0, self.dut.scheduler.sim_time("ns"))
+        await ClockCycles(self.dut.clk, RESET_CYCLES)
+        self.regs._reset()
+
+    async def _write(self, reg, value, size):
+        t_ns = self.dut.scheduler.sim_time("ns")
+        await ClockCycles(self.dut.clk, WRITE_CYCLES - 1)
+        self.regs.write(reg, value, size)
+        await ClockCycles(self.dut.clk, 1)
+        self._record(WRITE, reg, size, value, t_ns)
+
+    async def _read(self, reg, size):
+        t_ns = self.dut.scheduler.sim_time("ns")
+        await ClockCycles(self.dut.clk, READ_SAMPLE)
+        value = self.regs.read(reg, size)
+        await ClockCycles(self.dut.clk, READ_CYCLES - READ_SAMPLE)
+        self._record(READ, reg, size, value, t_ns)
+        return value
+
+    async def write_byte_reg(self, reg, value):
+        await self._write(reg, value, 1)
+
+    async def read_byte_reg(self, reg):
+        return await self._read(reg, 1)
+
+    async def write_hword_reg(self, reg, value):
+        await self._write(reg, value, 2)
+
+    async def read_hword_reg(self, reg):
+        return await self._read(reg, 2)
+
+    async def write_word_reg(self, reg, value):
+        await self._write(reg, value, 4)
+
+    async def read_word_reg(self, reg):
+        return await self._read(reg, 4)
+
+    async def is_interrupt_asserted(self):
+        return self.regs.interrupt
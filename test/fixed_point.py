@@ -1,5 +1,7 @@
 
 
+import math
+
 def format_bin(n, bits=8):
     return format(n & (2**bits - 1), f'0{bits}b')
 
@@ -31,6 +33,14 @@ def float_to_fixed(a, width, integer_part):
     v = int(round(a * (2**frac)))
     return simulate_overflow(v, width)
 
+def float_to_turns(angle_rad, width):
+    # binary angle: unsigned, 2^width = one full turn (2*pi), wraps around like a phase accumulator
+    return int(round(angle_rad / (2 * math.pi) * (1 << width))) & ((1 << width) - 1)
+
+def turns_to_float(a, width):
+    # binary angle back to radians in [0, 2*pi)
+    return (a & ((1 << width) - 1)) * 2 * math.pi / (1 << width)
+
 def fixed_mul(a, b, width, integer_part):
     # integer_part = number of integer bits including sign for both operands
     frac = width - integer_part
@@ -0,0 +1,148 @@
+# Writes the ROMs of the CORDIC core from cordic_model.py, so the RTL and the model
+# always hold the same numbers:
+#
+#   src/CORDIC_angles_ROM_comb.v    atan(2^-i)   (cordic_model.atan_rom)
+#   src/CORDIC_atanh_ROM_comb.v     atanh(2^-i)  (cordic_model.atanh_rom)
+#   src/CORDIC_sincos_ROM_comb.v    (cos, sin) seed table of the circular rotation
+#                                   (CORDIC.v, CIRC_LUT_BITS > 0, cordic_model.sincos_rom)
+#
+# All entries are Q2.30 and the modules round them to Q2.(FIXED_WIDTH-2), so one set of
+# tables serves every FIXED_WIDTH up to 32.
+#
+# Usage (from the test directory):
+#   python gen_roms.py
+
+from pathlib import Path
+
+from cordic_model import atan_rom, atanh_rom, sincos_rom, ROM_FRAC
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# CIRC_LUT_BITS the (cos, sin) table is generated for
+LUT_BITS = (1, 2, 3, 4)
+
+ROUND_OUT = """        if (DROP > 0) begin : round_out
+            wire signed [31:0] {a}_r = {a}_q + (32'sd1 <<< (DROP-1));{b_round}
+            assign {a}_out = {a}_r[31:DROP];{b_assign}
+            wire _unused = &{{{a}_r[DROP-1:0], {b_unused}1'b0}};
+        end else begin : full_out
+            assign {a}_out = {a}_q;{b_full}
+        end"""
+
+
+def q(v):
+    return f"32'sh{v & 0xFFFFFFFF:08X}"
+
+
+def round_out(a, b=None):
+    """ generate block rounding the Q2.30 {a}_q (and {b}_q) to the FIXED_WIDTH output """
+    return ROUND_OUT.format(
+        a=a,
+        b_round=f"\n            wire signed [31:0] {b}_r = {b}_q + (32'sd1 <<< (DROP-1));" if b else "",
+        b_assign=f"\n            assign {b}_out = {b}_r[31:DROP];" if b else "",
+        b_unused=f"{b}_r[DROP-1:0], " if b else "",
+        b_full=f"\n            assign {b}_out = {b}_q;" if b else "").split("\n")
+
+
+def angle_rom(module, function, values, first, comment):
+    """ The atan / atanh ROM: index clamped to ITERATIONS-1, the entries from `first` on """
+    lines = [f"// Generated by test/gen_roms.py from cordic_model.{function}_rom, do not edit.",
+             "//",
+             f"// {comment} in Q2.{ROM_FRAC}, rounded to Q2.(FIXED_WIDTH-2) on the way out.",
+             f"module {module} #(",
+             "    parameter FIXED_WIDTH = 16,",
+             "    parameter ITERATIONS  = 9",
+             ")(",
+             "    input  wire [$clog2(ITERATIONS):0]  which_angle,",
+             "    output wire signed [FIXED_WIDTH-1:0] angle_out",
+             ");",
+             f"    localparam integer DROP = {ROM_FRAC + 2} - FIXED_WIDTH;",
+             "",
+             "    localparam integer                LAST_I = ITERATIONS - 1;",
+             "    localparam [$clog2(ITERATIONS):0] LAST   = LAST_I[$clog2(ITERATIONS):0];",
+             "    wire [$clog2(ITERATIONS):0] idx = (which_angle > LAST) ? LAST : which_angle;",
+             "",
+             f"    function [31:0] {function}_lut;",
+             "        input [$clog2(ITERATIONS):0] i;",
+             "        begin",
+             "            case (i)"]
+    for i in range(first, len(values)):
+        label = f"'d{i}:"
+        lines.append(f"                {label:<8} {function}_lut = {q(values[i])}; // {function}(2^-{i})")
+    lines += [f"                default: {function}_lut = 32'sd0;",
+              "            endcase",
+              "        end",
+              "    endfunction",
+              "",
+              f"    wire signed [31:0] angle_q = {function}_lut(idx);",
+              "",
+              "    generate"]
+    lines += round_out("angle")
+    lines += ["    endgenerate",
+              "endmodule",
+              ""]
+    return lines
+
+
+SINCOS_HEADER = f"""// Generated by test/gen_roms.py from cordic_model.sincos_rom, do not edit.
+//
+// (cos, sin) of the angle segment * 2^-LUT_BITS rad, divided by the gain of the CORDIC
+// iterations LUT_BITS+1 onwards, in Q2.{ROM_FRAC}. The outputs are rounded to Q2.(FIXED_WIDTH-2).
+module CORDIC_sincos_ROM_comb #(
+    parameter FIXED_WIDTH = 16,
+    parameter LUT_BITS    = 3
+)(
+    input  wire signed [LUT_BITS+2:0]       segment,
+    output wire signed [FIXED_WIDTH-1:0]    cos_out,
+    output wire signed [FIXED_WIDTH-1:0]    sin_out
+);
+    localparam integer DROP = {ROM_FRAC + 2} - FIXED_WIDTH;
+
+    reg signed [31:0] cos_q, sin_q;
+"""
+
+
+def lut_block(lut_bits):
+    keyword = "if" if lut_bits == LUT_BITS[0] else "end else if"
+    lines = [f"        {keyword} (LUT_BITS == {lut_bits}) begin : lut{lut_bits}",
+             "            always @* begin",
+             "                case (segment)"]
+    for k, (c, s) in sincos_rom(lut_bits).items():
+        angle = k / (1 << lut_bits)
+        label = f"{'-' if k < 0 else ''}'sd{abs(k)}"
+        lines.append(f"                    {label + ':':<10} begin cos_q = {q(c)}; sin_q = {q(s)}; end // {angle:+.4f} rad")
+    lines += ["                    default:  begin cos_q = 32'sd0; sin_q = 32'sd0; end",
+              "                endcase",
+              "            end"]
+    return lines
+
+
+def sincos_module():
+    lines = [SINCOS_HEADER.rstrip("\n"), "    generate"]
+    for lut_bits in LUT_BITS:
+        lines += lut_block(lut_bits)
+    lines += ["        end else begin : unsupported",
+              "            always @* begin cos_q = 32'sd0; sin_q = 32'sd0; end",
+              "        end",
+              ""]
+    lines += round_out("cos", "sin")
+    lines += ["    endgenerate",
+              "endmodule",
+              ""]
+    return lines
+
+
+def main():
+    files = {
+        "CORDIC_angles_ROM_comb.v": angle_rom("CORDIC_angles_ROM_comb", "atan", atan_rom(), 0, "atan(2^-i)"),
+        "CORDIC_atanh_ROM_comb.v": angle_rom("CORDIC_atanh_ROM_comb", "atanh", atanh_rom(), 1,
+                                             "atanh(2^-i), i >= 1 (the hyperbolic iterations start at 1)"),
+        "CORDIC_sincos_ROM_comb.v": sincos_module(),
+    }
+    for name, lines in files.items():
+        (SRC_DIR / name).write_text("\n".join(lines))
+        print(f"wrote {SRC_DIR / name}")
+
+
+if __name__ == "__main__":
+    main()
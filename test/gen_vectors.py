@@ -0,0 +1,100 @@
+# Writes the stimulus and expected results of a bulk regression as a $readmemh file for
+# tb_vectors.v, the self-checking testbench that runs it at simulator speed without cocotb.
+#
+# The operations are the fuzz corpus followed by constrained-random cases drawn like
+# test_fuzz_differential.py does (all modes, LINEAR prescale edges, convergence range
+# edges, binary angle and early exit), a share of them chained onto the one before
+# (FORWARD_A / FORWARD_B). The expected values come from running the register sequence
+# tb_vectors.v writes on cordic_model.TqvpCordicModel, so forwarding and the 8-bit shift
+# write behave like on the RTL. One line per operation, RECORD_BITS wide:
+#
+#   [159:152] config   [151:144] shift   [143:112] A   [111:80] B
+#   [79:48]   out1     [47:16]   out2    [15:0]    core cycles (CordicModel.cycles)
+#
+# A, B and the outputs are zero-extended to 32 bits, like on the data bus. An all-zero
+# record (start clear) ends the list.
+#
+# Usage (from the test directory):
+#   python gen_vectors.py --count 100000 --out sim_build/vectors/vectors_w16.hex
+#   make vectors VECTOR_COUNT=100000 [WIDTH=32] [CIRC_LUT=3]
+
+import argparse
+import os
+import random
+import sys
+from pathlib import Path
+
+TEST_DIR = Path(__file__).resolve().parent
+
+RECORD_BITS = 160
+# tb_vectors.v holds this many records (TB_MAX_VECTORS), the terminating one included
+MAX_VECTORS = 1 << 20
+
+
+def pack_record(config, shift, A, B, out1, out2, cycles):
+    value = config
+    for field, bits in ((shift, 8), (A, 32), (B, 32), (out1, 32), (out2, 32), (cycles, 16)):
+        value = (value << bits) | (field & ((1 << bits) - 1))
+    return f"{value:0{RECORD_BITS // 4}x}"
+
+
+def generate(count, seed, width, circ_lut_bits, chain_fraction):
+    """ Yields (config, shift, A, B, out1, out2, cycles) for the corpus and count random operations """
+    # the fuzz test draws its cases at the width it was imported for
+    os.environ["CORDIC_FIXED_WIDTH"] = str(width)
+    sys.path.insert(0, str(TEST_DIR))
+    from cordic_model import TqvpCordicModel, decode_config, FORWARD_A, FORWARD_B, REG_CONFIG, REG_A, REG_B, REG_SHIFT
+    from test_fuzz_differential import draw_case, load_corpus, corpus_case
+    from test_utils import pack_config
+
+    model = TqvpCordicModel(width=width, circ_lut_bits=circ_lut_bits)
+    rng = random.Random(seed)
+    cases = [corpus_case(c) for c in load_corpus()] + [draw_case(rng) for _ in range(count)]
+    for index, case in enumerate(cases):
+        flags = case["flags"]
+        if index and rng.random() < chain_fraction:
+            flags |= rng.choice((FORWARD_A, FORWARD_B, FORWARD_A | FORWARD_B))
+        config = pack_config(case["mode"], case["is_rotating"], 1, flags)
+        A, B = case["A"] & model.core.mask, case["B"] & model.core.mask
+        shift = case["shift"] & 0xFF
+
+        # the accesses tb_vectors.v makes, in its order
+        model.write(REG_SHIFT, shift, 1)
+        model.write(REG_A, A, 4)
+        model.write(REG_B, B, 4)
+        model.write(REG_CONFIG, config, 1)
+        mode, is_rotating, binary_angle, early_exit = decode_config(config)
+        cycles = model.core.cycles(mode, is_rotating, model.A, model.B, model.shift, binary_angle, early_exit)
+        yield config, shift, A, B, model.out1, model.out2, cycles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write $readmemh stimulus and expected results for tb_vectors.v.")
+    parser.add_argument("--count", type=int, default=10000, help="random operations after the fuzz corpus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--width", type=int, default=int(os.getenv("CORDIC_FIXED_WIDTH", 16)),
+                        help="FIXED_WIDTH of the build, like make WIDTH=<n>")
+    parser.add_argument("--circ-lut", type=int, default=int(os.getenv("CORDIC_CIRC_LUT", 0)),
+                        help="CIRC_LUT_BITS of the build, like make CIRC_LUT=<n>")
+    parser.add_argument("--chain-fraction", type=float, default=0.1,
+                        help="share of operations that forward out1/out2 of the one before")
+    parser.add_argument("--out", type=Path, default=TEST_DIR / "sim_build" / "vectors" / "vectors.hex")
+    args = parser.parse_args()
+
+    records = list(generate(args.count, args.seed, args.width, args.circ_lut, args.chain_fraction))
+    if len(records) + 1 > MAX_VECTORS:
+        raise SystemExit(f"{len(records)} operations do not fit the {MAX_VECTORS - 1} of tb_vectors.v")
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w") as f:
+        for record in records:
+            f.write(pack_record(*record) + "\n")
+        f.write("0" * (RECORD_BITS // 4) + "\n")
+
+    modes = [(config >> 1) & 3 for config, *_ in records]
+    print(f"{len(records)} operations (CIRCULAR {modes.count(0)}, LINEAR {modes.count(1)}, HYPERBOLIC {modes.count(2)}, "
+          f"{sum(1 for config, *_ in records if config & 0xC0)} chained), {sum(r[-1] for r in records)} core cycles "
+          f"-> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# Picks alpha_one_left_shift (register 3) for batches of LINEAR mode multiplies and divides.
+#
+# In LINEAR mode A, B and the result share one Q format, Q(W-s).s with s the shift
+# register (test_utils.use_multiplication_mode_input_float and friends). A larger s
+# keeps more fraction bits, but the operands and the result then overflow sooner;
+# plan_linear finds, per operation, the largest s that is safe under the rules of
+# CORDIC.v:
+#
+#   multiply (rotating)  x = A, z = B. |B| >= 2.0 is prescaled by k = msb(|B|) - s and the
+#                        result shifted back (y <<< k), so y <<< k, including the
+#                        truncation of N iterations and the z residual, has to fit.
+#                        The operand with the smaller magnitude goes to A: the error of
+#                        the product is |A| times the residual of z.
+#   divide (vectoring)   x = A (divisor), y = B (dividend). y is prescaled by
+#                        k = msb(|B|) - msb(|A|) and the quotient z <<< k has to fit.
+#                        The core only converges for A > 0, so a negative divisor is
+#                        negated together with the dividend. A must not round to 0.
+#
+# max_shifts=1 (default) runs the whole batch in one format: the minimum of the
+# per-operation shifts, and a single register-3 write. max_shifts=None gives every
+# operation its own best shift, and a number in between picks the levels that lose the
+# fewest fraction bits in total. run_plan then runs one group per shift through a
+# CordicDevice (cordic_device.py), which skips the shift write when it already holds it.
+#
+#   plan = plan_linear(MULTIPLY, a, b)
+#   products = await run_plan(CordicDevice(tqv), plan)
+
+import numpy as np
+
+from cordic_model import default_fixed_width, default_iterations, REG_SHIFT
+from cordic_device import OUT1
+from test_utils import Mode, pack_config
+
+MULTIPLY, DIVIDE = "mul", "div"
+
+
+def _msb(v):
+    """ Highest set bit of |v| per element, -1 for 0 """
+    v = np.abs(v)
+    return np.where(v > 0, np.floor(np.log2(np.where(v > 0, v, 1))).astype(np.int64), -1)
+
+
+class LinearPlan:
+    """ Raw operands and shift of every operation of a batch; decode() turns out1 back into floats """
+
+    def __init__(self, op, A, B, shifts, prescale, width, iterations):
+        self.op = op
+        self.A = A
+        self.B = B
+        self.shifts = shifts            # alpha_one_left_shift per operation
+        self.prescale = prescale        # k of k_comb per operation
+        self.width = width
+        self.iterations = iterations
+
+    @property
+    def groups(self):
+        """ {shift: indices of the operations run with it} """
+        return {int(s): np.flatnonzero(self.shifts == s) for s in np.unique(self.shifts)}
+
+    def error_bound(self):
+        """ Bound of |result - exact| per operation, as a float: rounding the operands to Q(W-s).s,
+        the z residual after N iterations (1 LSB of z once s < N - 1) and the truncation of the
+        N shifted adds, all scaled up by the prescale """
+        s, k, n = self.shifts, self.prescale, self.iterations
+        x, z = np.ldexp(np.abs(self.A), -s), np.ldexp(np.abs(self.B), -s)
+        half_lsb = np.ldexp(1.0, -s - 1)
+        residual = np.ldexp(1.0, k - np.minimum(s, n - 1))
+        if self.op == MULTIPLY:
+            return (x + z) * half_lsb + half_lsb ** 2 + x * residual + n * np.ldexp(1.0, k - s)
+        quotient = z / np.where(x > 0, x, 1)
+        return (1 + quotient) * half_lsb / np.where(x > 0, x, 1) + residual + n * np.ldexp(1.0, k) / np.maximum(np.abs(self.A), 1)
+
+    def decode(self, out1):
+        return np.ldexp(np.asarray(out1, dtype=np.float64), -self.shifts)
+
+
+def _best_shifts(op, a, b, width, iterations):
+    """ (largest safe shift, smallest usable shift) per operation, -1 / width when there is none """
+    limit = (1 << (width - 1)) - 1
+    best = np.full(a.shape, -1, dtype=np.int64)
+    lowest = np.full(a.shape, width, dtype=np.int64)
+    # s = width - 1 would make alpha at iteration 0 (1 <<< s) negative
+    for s in range(width - 2, -1, -1):
+        A = np.rint(np.ldexp(a, s))
+        B = np.rint(np.ldexp(b, s))
+        fits = (np.abs(A) <= limit) & (np.abs(B) <= limit)
+        residual = np.ldexp(1.0, np.maximum(0, s - (iterations - 1)))
+        if op == MULTIPLY:
+            k = np.maximum(0, _msb(B) - s)
+            result = np.abs(A * B) / np.ldexp(1.0, s) + (np.abs(A) * residual / np.ldexp(1.0, s) + iterations) * np.ldexp(1.0, k)
+            usable = np.ones(a.shape, dtype=bool)
+        else:
+            k = np.maximum(0, _msb(B) - _msb(A))
+            result = np.abs(B) / np.where(A != 0, np.abs(A), 1) * np.ldexp(1.0, s) + residual * np.ldexp(1.0, k)
+            usable = A != 0
+        ok = fits & usable & (result <= limit)
+        best = np.where((best < 0) & ok, s, best)
+        lowest = np.where(ok, s, lowest)
+    return best, lowest
+
+
+def _levels(best, lowest, max_shifts):
+    """ The shift of every operation with at most max_shifts distinct values, losing the fewest bits
+    against best in total: each operation takes the highest chosen level that is not above its best """
+    values = np.unique(best)
+    if max_shifts is None or max_shifts >= len(values):
+        return best
+
+    # cost[p][q]: the operations whose best lies in [values[p], values[q]) all run at values[p]
+    def cost(p, q):
+        upper = values[q] if q < len(values) else np.inf
+        sel = (best >= values[p]) & (best < upper)
+        if np.any(lowest[sel] > values[p]):
+            return np.inf
+        return float(np.sum(best[sel] - values[p]))
+
+    d = len(values)
+    # dp[g][q]: g levels chosen among values[:q], the last one covering everything below values[q]
+    dp = np.full((max_shifts + 1, d + 1), np.inf)
+    choice = np.zeros((max_shifts + 1, d + 1), dtype=np.int64)
+    for q in range(1, d + 1):
+        dp[1][q] = cost(0, q)
+    for g in range(2, max_shifts + 1):
+        for q in range(g, d + 1):
+            for p in range(g - 1, q):
+                c = dp[g - 1][p] + cost(p, q)
+                if c < dp[g][q]:
+                    dp[g][q], choice[g][q] = c, p
+    g = int(np.argmin(dp[1:, d])) + 1
+    if not np.isfinite(dp[g][d]):
+        raise ValueError(f"no {max_shifts} shift(s) serve every operation, allow more shifts")
+
+    chosen, q = [], d
+    while g > 1:
+        p = choice[g][q]
+        chosen.append(values[p])
+        q, g = p, g - 1
+    chosen.append(values[0])
+    chosen = np.sort(chosen)
+    return chosen[np.searchsorted(chosen, best, side="right") - 1]
+
+
+def plan_linear(op, a, b, width=None, iterations=None, max_shifts=1):
+    """ Plan the LINEAR operations a[i] * b[i] (op=MULTIPLY) or a[i] / b[i] (op=DIVIDE).
+    Raises ValueError when an operation fits no format at all. """
+    if op not in (MULTIPLY, DIVIDE):
+        raise ValueError(f"unknown LINEAR operation {op!r}, expected {MULTIPLY!r} or {DIVIDE!r}")
+    width = default_fixed_width() if width is None else width
+    iterations = default_iterations(width) if iterations is None else iterations
+    a, b = (np.ravel(v).astype(np.float64) for v in np.broadcast_arrays(a, b))
+
+    if op == MULTIPLY:
+        # the smaller magnitude multiplies the residual of z
+        swap = np.abs(a) > np.abs(b)
+        x, z = np.where(swap, b, a), np.where(swap, a, b)
+    else:
+        # x is the divisor and has to be positive
+        x, z = np.abs(b), np.where(b < 0, -a, a)
+
+    best, lowest = _best_shifts(op, x, z, width, iterations)
+    if np.any(best < 0):
+        bad = np.flatnonzero(best < 0)
+        raise ValueError(f"{len(bad)} operation(s) fit no Q format of {width} bits, "
+                         f"first: {a[bad[0]]:.6g} {'*' if op == MULTIPLY else '/'} {b[bad[0]]:.6g}")
+    shifts = _levels(best, lowest, max_shifts)
+
+    A = np.rint(np.ldexp(x, shifts)).astype(np.int64)
+    B = np.rint(np.ldexp(z, shifts)).astype(np.int64)
+    if op == MULTIPLY:
+        prescale = np.maximum(0, _msb(B) - shifts)
+    else:
+        prescale = np.maximum(0, _msb(B) - _msb(A))
+    return LinearPlan(op, A, B, shifts, prescale, width, iterations)
+
+
+async def run_plan(device, plan):
+    """ Run a LinearPlan on a CordicDevice, one group per shift, and return the results as floats
+    in the order of the planned operations """
+    config = pack_config(Mode.LINEAR, plan.op == MULTIPLY, 1)
+    out1 = np.zeros(plan.A.shape, dtype=np.int64)
+    groups = plan.groups
+    # the group whose shift the device holds already goes first, it needs no register-3 write
+    held = device.held(REG_SHIFT)
+    for shift in sorted(groups, key=lambda s: s not in held):
+        index = groups[shift]
+        out1[index], _ = await device.run(config, plan.A[index], plan.B[index], shift=shift, outputs=OUT1)
+    return plan.decode(out1)
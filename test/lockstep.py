@@ -0,0 +1,146 @@
+# Per-iteration lockstep checker of the CORDIC core against cordic_model.py.
+#
+# A background coroutine samples cordic_module.{x, y, z, iteration, delta_z} after
+# every clock edge while the core is running and steps the model alongside it. The
+# first mismatch of an operation is kept as a diagnosis: which iteration, which
+# register, expected vs. got, and the delta_z ROM entry the iteration used. run_cordic
+# (test_utils.py) raises it as an AssertionError once the operation is done, so a
+# wrong output points straight at the iteration that went wrong instead of at tb.vcd.
+#
+# Enabled with CORDIC_LOCKSTEP=1. It needs the RTL hierarchy, so it is a no-op for
+# gate level simulation (GATES=yes).
+
+import os
+
+import cocotb
+from cocotb.triggers import RisingEdge, ReadOnly
+
+from cordic_model import CordicModel, default_iterations
+
+MODE_NAMES = {0: "circular", 1: "linear", 2: "hyperbolic"}
+
+# (dut, harness instance) -> (monitor, task); cocotb kills the task at the end of every test, attach() restarts it
+_monitors = {}
+
+
+def lockstep_enabled():
+    return os.getenv("CORDIC_LOCKSTEP", "0").lower() not in ("0", "off", "no", "") and os.getenv("GATES") != "yes"
+
+
+class LockstepMonitor:
+    """ Steps CordicModel in lockstep with <instance>.test_harness.user_peripheral.cordic_module """
+
+    def __init__(self, dut, io=None, model=None):
+        self.dut = dut
+        # tb itself for instance 0, tb.extra[i] for the further instances (tqv.TinyQV.io)
+        self.core = (dut if io is None else io).test_harness.user_peripheral.cordic_module
+        if model is None:
+            width = len(self.core.x)
+            try:
+                iterations = int(self.core.ITERATIONS.value)
+            except AttributeError:
+                # not every simulator exposes parameters
+                iterations = default_iterations(width)
+            model = CordicModel(width=width, iterations=iterations)
+        self.model = model
+        self.ops_checked = 0
+        self.divergence = None
+        self._steps = None
+        self._op = None
+        self._prev_dz = None
+        self._was_running = False
+
+    @classmethod
+    def attach(cls, dut, tqv=None):
+        """ The monitor of the harness instance tqv talks to, started on first use;
+        None when CORDIC_LOCKSTEP is not set """
+        if not lockstep_enabled():
+            return None
+        io = getattr(tqv, "io", None)
+        key = (id(dut), getattr(tqv, "instance", 0))
+        monitor, task = _monitors.get(key, (None, None))
+        if task is None or task.done():
+            monitor = cls(dut, io)
+            _monitors[key] = (monitor, cocotb.start_soon(monitor.run()))
+        return monitor
+
+    def _sample(self):
+        core = self.core
+        return {
+            "iteration": int(core.iteration.value),
+            "x": core.x.value.signed_integer,
+            "y": core.y.value.signed_integer,
+            "z": core.z.value.signed_integer,
+            "delta_z": core.delta_z.value.signed_integer,
+        }
+
+    def _diverged(self, message):
+        if self.divergence is None:
+            mode, is_rotating, A, B, shift, binary_angle, early_exit = self._op
+            self.divergence = (f"lockstep: {MODE_NAMES.get(mode, mode)} {'rotating' if is_rotating else 'vectoring'} "
+                               f"A={A} B={B} shift={shift}{' (binary angle)' if binary_angle else ''}"
+                               f"{' (early exit)' if early_exit else ''}: {message}")
+            self.dut._log.error(self.divergence)
+        self._steps = None
+
+    def _begin(self):
+        core = self.core
+        mode = int(core.mode_latched.value)
+        is_rotating = int(core.rot_latched.value)
+        A = core.A.value.signed_integer
+        B = core.B.value.signed_integer
+        shift = int(core.alpha_one_left_shift.value)
+        binary_angle = bool(core.binary_angle.value)
+        early_exit = bool(core.early_latched.value)
+        self._op = (mode, is_rotating, A, B, shift, binary_angle, early_exit)
+        self._steps = self.model.steps(mode, is_rotating, A, B, shift, binary_angle, early_exit)
+        self._prev_dz = None
+
+    def _compare(self, running, got):
+        iteration, sh, dz, x, y, z = next(self._steps)
+        if iteration is None:
+            if running:
+                self._diverged(f"core still running at iteration {got['iteration']}, the model finished")
+                return
+            previous = f" (last delta_z {self._prev_dz})" if self._prev_dz is not None else ""
+            for reg, expected in (("x", x), ("y", y), ("z", z)):
+                if got[reg] != expected:
+                    self._diverged(f"final {reg}: expected {expected}, got {got[reg]}{previous}")
+                    return
+            self.ops_checked += 1
+            self._steps = None
+            return
+
+        if not running:
+            self._diverged(f"core finished before iteration {iteration}")
+            return
+        if got["iteration"] != iteration:
+            self._diverged(f"iteration counter: expected {iteration}, got {got['iteration']}")
+            return
+        for reg, expected in (("x", x), ("y", y), ("z", z)):
+            if got[reg] != expected:
+                where = "after the start/prescale" if self._prev_dz is None else \
+                        f"entering iteration {iteration}, previous step used delta_z {self._prev_dz}"
+                self._diverged(f"{reg} {where}: expected {expected}, got {got[reg]}")
+                return
+        if got["delta_z"] != dz:
+            self._diverged(f"delta_z ROM entry for iteration {iteration} (shift {sh}): expected {dz}, got {got['delta_z']}")
+            return
+        self._prev_dz = dz
+
+    async def run(self):
+        while True:
+            await RisingEdge(self.core.clk)
+            await ReadOnly()
+            running = bool(self.core.running.value)
+            if running and not self._was_running:
+                self._begin()
+            if self._steps is not None and (running or self._was_running):
+                self._compare(running, self._sample())
+            self._was_running = running
+
+    def check(self):
+        """ Raise the divergence of the operations since the last check, if any """
+        divergence, self.divergence = self.divergence, None
+        if divergence is not None:
+            raise AssertionError(divergence)
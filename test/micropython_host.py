@@ -0,0 +1,292 @@
+# Runs the MicroPython driver (firmware/cordic.py) on the host, against a stand-in of the
+# peripheral's memory-mapped registers, and benchmarks it:
+#
+#   python micropython_host.py                 # 16 and 32 bits, check and benchmark
+#   python micropython_host.py --width 32 --ops 4096 --no-bench
+#
+# The stand-in provides what the driver imports from MicroPython: machine.mem8/16/32 on a
+# bus that decodes the peripheral's 64 bytes to cordic_model.TqvpCordicModel (or to a
+# register file that completes every operation with zeros, to time the driver alone),
+# the micropython module (const and native as no-ops, viper converting the pointer
+# arguments) and the viper pointer types ptr8/16/32, which load unsigned and truncate on
+# store like the native emitter. Like on the board, mem16/mem32 and the pointers to the bus
+# reject addresses that are not aligned to the access.
+#
+# The driver needs A, B, out1 and out2 at aligned addresses (see firmware/cordic.py), which
+# the register map of src/tqvp_CORDIC.v does not have: the check makes sure Cordic() refuses
+# that map, and runs the driver on ALIGNED_REGS, one register every 4 bytes, decoded by the
+# stand-in bus to the registers of the model.
+#
+# Every driver call is compared bit for bit against CordicModel.run, through both batch
+# loops. Host timings only rank run() against the plain loop (the viper row runs on the
+# pointer emulation here); the numbers that matter come from firmware/cordic_bench.py on
+# the board.
+
+import argparse
+import builtins
+import os
+import random
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware"))
+
+from cordic_model import (CordicModel, TqvpCordicModel, default_iterations, CIRCULAR, LINEAR, HYPERBOLIC,
+                          REG_STATUS, STATUS_DONE)
+from fixed_point import sign_extend
+
+BASE = 0x8000000
+PERIPHERAL_SIZE = 0x40
+
+# byte offsets of (config, A, B, shift, out1, out2, status), like cordic.REGS but aligned
+ALIGNED_REGS = (0, 4, 8, 12, 16, 20, 24)
+
+
+class NullRegisters:
+    """ Register file whose operations finish at once with zero outputs """
+
+    def write(self, reg, value, nbytes):
+        pass
+
+    def read(self, reg, nbytes):
+        return STATUS_DONE if reg == REG_STATUS else 0
+
+
+class StandInBus:
+    """ Byte-addressed bus with one peripheral at base, counting the accesses; regs are the
+    offsets of the peripheral's registers 0 to 6, other offsets read 0 and ignore writes """
+
+    def __init__(self, regs=ALIGNED_REGS):
+        self.peripheral = None
+        self.base = BASE
+        self.accesses = 0
+        self.decode = {offset: reg for reg, offset in enumerate(regs)}
+
+    def _reg(self, addr):
+        offset = addr - self.base
+        if self.peripheral is None or not 0 <= offset < PERIPHERAL_SIZE:
+            raise OSError(f"bus error at {addr:#x}")
+        self.accesses += 1
+        return self.decode.get(offset, PERIPHERAL_SIZE - 1)
+
+    def read(self, addr, nbytes):
+        return self.peripheral.read(self._reg(addr), nbytes)
+
+    def write(self, addr, value, nbytes):
+        self.peripheral.write(self._reg(addr), value & ((1 << (8 * nbytes)) - 1), nbytes)
+
+
+def check_aligned(addr, nbytes):
+    """ The ValueError of machine.mem16/mem32 (the viper pointers trap on the board) """
+    if addr % nbytes:
+        raise ValueError(f"address {addr:08x} is not aligned")
+
+
+class Mem:
+    """ machine.mem8 / mem16 / mem32 """
+
+    def __init__(self, bus, nbytes):
+        self.bus = bus
+        self.nbytes = nbytes
+
+    def __getitem__(self, addr):
+        check_aligned(addr, self.nbytes)
+        return self.bus.read(addr, self.nbytes)
+
+    def __setitem__(self, addr, value):
+        check_aligned(addr, self.nbytes)
+        self.bus.write(addr, value, self.nbytes)
+
+
+class Ptr:
+    """ A viper pointer: to a buffer, or to an address on the bus """
+
+    def __init__(self, target, nbytes):
+        self.nbytes = nbytes
+        self.mask = (1 << (8 * nbytes)) - 1
+        if isinstance(target, int):
+            self.addr, self.view = target, None
+        else:
+            self.addr, self.view = None, memoryview(target).cast("B").cast({1: "B", 2: "H", 4: "I"}[nbytes])
+
+    def __getitem__(self, i):
+        if self.view is not None:
+            return self.view[i]
+        check_aligned(self.addr + i * self.nbytes, self.nbytes)
+        return BUS.read(self.addr + i * self.nbytes, self.nbytes)
+
+    def __setitem__(self, i, value):
+        if self.view is not None:
+            self.view[i] = value & self.mask
+        else:
+            check_aligned(self.addr + i * self.nbytes, self.nbytes)
+            BUS.write(self.addr + i * self.nbytes, value, self.nbytes)
+
+
+BUS = StandInBus()
+
+
+def viper(f):
+    """ micropython.viper: arguments annotated with a pointer type are converted to it """
+    code = f.__code__
+    casts = [f.__annotations__.get(name) for name in code.co_varnames[:code.co_argcount]]
+
+    def call(*args):
+        return f(*(cast(arg) if cast is not None else arg for cast, arg in zip(casts, args)))
+    return call
+
+
+def install():
+    """ Make the driver importable: the modules and builtins it expects from MicroPython """
+    machine = types.ModuleType("machine")
+    machine.mem8, machine.mem16, machine.mem32 = Mem(BUS, 1), Mem(BUS, 2), Mem(BUS, 4)
+    micropython = types.ModuleType("micropython")
+    micropython.const = lambda x: x
+    micropython.native = lambda f: f
+    micropython.viper = viper
+    sys.modules["machine"] = machine
+    sys.modules["micropython"] = micropython
+    builtins.ptr8 = lambda target: Ptr(target, 1)
+    builtins.ptr16 = lambda target: Ptr(target, 2)
+    builtins.ptr32 = lambda target: Ptr(target, 4)
+
+
+def random_operands(rng, mode, is_rotating, width, n):
+    """ n raw (A, B, shift, flags) inside the convergence range of the mode """
+    frac = width - 2
+    ops = []
+    for _ in range(n):
+        shift, flags = None, 0
+        if mode == CIRCULAR and is_rotating:
+            if rng.random() < 0.25:
+                A, B, flags = rng.getrandbits(width), 0, 16
+            else:
+                A, B = round(rng.uniform(-1.7, 1.7) * (1 << frac)), 0
+        elif mode == HYPERBOLIC and is_rotating:
+            A, B = round(rng.uniform(-1.1, 1.1) * (1 << frac)), 0
+        elif mode == HYPERBOLIC:
+            A = round(rng.uniform(0.5, 1.0) * (1 << frac))
+            B = round(rng.uniform(-0.75, 0.75) * A)
+        elif mode == LINEAR:
+            shift = width - 5
+            A = round(rng.uniform(0.25 if not is_rotating else -3.0, 3.0) * (1 << shift))
+            B = round(rng.uniform(-3.0, 3.0) * (1 << shift))
+            if not is_rotating:
+                B = max(-A, min(A, B))
+        else:
+            A = round(rng.uniform(0.0, 1.0) * (1 << (frac - 2)))
+            B = round(rng.uniform(-1.0, 1.0) * (1 << (frac - 2)))
+        ops.append((A, B, shift, flags))
+    return ops
+
+
+def check(cordic, width, n, rng):
+    """ Driver results against CordicModel.run, one call at a time and in batches. Returns the
+    bus accesses per operation of run() and of run_into() """
+    model = CordicModel(width=width, iterations=default_iterations(width))
+    mask = (1 << width) - 1
+    BUS.peripheral = TqvpCordicModel(width=width)
+    single_accesses = batch_accesses = single_ops = batch_ops = 0
+
+    # the register map of the RTL has unaligned wide registers, which mem16/mem32 reject
+    try:
+        cordic.Cordic(width=width)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Cordic() accepted the unaligned register map of src/tqvp_CORDIC.v")
+    for reg in (cordic.REG_A, cordic.REG_OUT2):
+        try:
+            Mem(BUS, width // 8)[BASE + reg]
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"the stand-in mem{width} read the unaligned offset {reg}")
+
+    for c in (cordic.Cordic(width=width, viper=False, regs=ALIGNED_REGS), cordic.Cordic(width=width, regs=ALIGNED_REGS)):
+        loop = "viper" if c._batch is not cordic._run_batch else "plain"
+        for mode in (CIRCULAR, LINEAR, HYPERBOLIC):
+            for is_rotating in (1, 0):
+                operands = random_operands(rng, mode, is_rotating, width, n)
+                expected = []
+                for A, B, shift, flags in operands:
+                    expected.append(model.run(mode, is_rotating, A & mask, B & mask,
+                                              11 if shift is None else shift, bool(flags & 16)))
+
+                start = BUS.accesses
+                for (A, B, shift, flags), want in zip(operands, expected):
+                    got = c.run(mode, is_rotating, A, B, shift=shift, flags=flags)
+                    assert got == want, f"run({mode}, {is_rotating}, A={A}, B={B}, shift={shift}): {got} != {want}"
+                single_accesses += BUS.accesses - start
+                single_ops += len(operands)
+
+                # batches share one config, so binary angles run as a batch of their own
+                for flags in sorted({op[3] for op in operands}):
+                    index = [i for i, op in enumerate(operands) if op[3] == flags]
+                    # every operation twice in a row: the second skips the A and B writes
+                    index = [i for i in index for _ in (0, 1)]
+                    a, b, out = c.buffer(len(index)), c.buffer(len(index)), c.buffer(2 * len(index))
+                    for j, i in enumerate(index):
+                        a[j], b[j] = sign_extend(operands[i][0] & mask, width), sign_extend(operands[i][1] & mask, width)
+                    if mode == LINEAR:
+                        c.set_shift(operands[0][2])
+                    start = BUS.accesses
+                    c.run_into(cordic.pack_config(mode, is_rotating, flags), a, b, out)
+                    batch_accesses += BUS.accesses - start
+                    batch_ops += len(index)
+                    for j, i in enumerate(index):
+                        got = (out[j], out[len(index) + j])
+                        assert got == expected[i], \
+                            f"run_into ({loop}) {mode}, {is_rotating}, A={operands[i][0]}, B={operands[i][1]}: {got} != {expected[i]}"
+
+        # the named batches
+        angles, out = c.buffer(n), c.buffer(2 * n)
+        for i in range(n):
+            angles[i] = round(rng.uniform(-1.7, 1.7) * (1 << (width - 2)))
+        c.sin_cos_into(angles, out)
+        for i in range(n):
+            assert (out[i], out[n + i]) == model.run(CIRCULAR, 1, angles[i] & mask, 0, 11), \
+                f"sin_cos_into ({loop}) at {angles[i]}"
+        a, b = c.buffer(n), c.buffer(n)
+        for i in range(n):
+            a[i], b[i] = 3 << (width - 6), round(rng.uniform(-2.0, 2.0) * (1 << (width - 4)))
+        for name, call, is_rotating in (("mul_into", c.mul_into, 1), ("div_into", c.div_into, 0)):
+            for early_exit in (False, True):
+                call(a, b, out, width - 4, early_exit=early_exit)
+                for i in range(n):
+                    want = model.run(LINEAR, is_rotating, a[i] & mask, b[i] & mask, width - 4, early_exit=early_exit)[0]
+                    assert out[i] == want, f"{name} ({loop}, early_exit={early_exit}) {a[i]}, {b[i]}: {out[i]} != {want}"
+        print(f"  {width}-bit {loop:<5} loop: ok")
+
+    return single_accesses / single_ops, batch_accesses / batch_ops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="host check and benchmark of firmware/cordic.py")
+    parser.add_argument("--width", type=int, choices=(16, 32), action="append",
+                        help="datapath width, may repeat (default: 16 and 32)")
+    parser.add_argument("--ops", type=int, default=256, help="operations per mode (and per benchmark round)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-bench", action="store_true")
+    args = parser.parse_args()
+
+    install()
+    import cordic
+    import cordic_bench
+
+    seed = random.randrange(1 << 32) if args.seed is None else args.seed
+    print(f"seed {seed}")
+    rng = random.Random(seed)
+    for width in args.width or (16, 32):
+        single, batch = check(cordic, width, args.ops, rng)
+        print(f"  {width}-bit bus accesses per operation: run() {single:.2f}, run_into() {batch:.2f}")
+        if args.no_bench:
+            continue
+        for name, peripheral in (("model", TqvpCordicModel(width=width)), ("null registers", NullRegisters())):
+            BUS.peripheral = peripheral
+            print(f"  {width}-bit benchmark, {name}:")
+            cordic_bench.bench(cordic.Cordic(width=width, regs=ALIGNED_REGS), n=args.ops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# Profiling hooks for the test harness coroutines.
+#
+# The register access path (spi_write_cpha0 / spi_read_cpha0 in tqv_reg.py) and the
+# helpers in test_utils.py are decorated with @profiled. With CORDIC_PROFILE=1 every
+# step of such a coroutine, i.e. the Python code between two awaits that hand control
+# back to the cocotb scheduler, is timed with perf_counter, and per function the tool
+# counts:
+#
+#   calls       how often the coroutine was started
+#   self_s      wall-clock seconds spent in its own Python code
+#   incl_s      the same, including the profiled coroutines it awaited
+#   awaits      suspensions on a trigger (ClockCycles, Timer, ...) from its own body
+#   get / set   .value reads and writes of simulator handles (each one is a GPI call)
+#   sim_ns      simulated time from start to return
+#
+# The wall-clock time of the run that is not spent in profiled Python code is reported
+# as "[outside]": the simulator itself, the cocotb scheduler and unprofiled coroutines
+# such as the clock. When the simulator exits the table goes to <dir>/profile.txt and
+# the self times, as integer microseconds per stack, to <dir>/profile.folded, which
+# flamegraph.pl, speedscope or inferno read directly.
+#
+# Without CORDIC_PROFILE the decorator returns the function unchanged and no handle
+# is patched, so it costs nothing.
+#
+# Environment variables:
+#   CORDIC_PROFILE=1      enable profiling
+#   CORDIC_PROFILE_DIR    where the output goes (default: <CORDIC_PLOTS_DIR>/artifacts/profile)
+
+import atexit
+import functools
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from cocotb.utils import get_sim_time
+
+
+def profile_enabled():
+    return os.getenv("CORDIC_PROFILE", "0").lower() not in ("0", "off", "no", "")
+
+
+def default_profile_dir():
+    base = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", ".")))
+    return Path(os.getenv("CORDIC_PROFILE_DIR", base / "artifacts/profile"))
+
+
+class FunctionStats:
+    __slots__ = ("calls", "self_s", "incl_s", "awaits", "get", "set", "sim_ns")
+
+    def __init__(self):
+        self.calls = self.awaits = self.get = self.set = 0
+        self.self_s = self.incl_s = self.sim_ns = 0.0
+
+
+class Profile:
+    """ Per-function statistics and per-stack self time of the profiled coroutines """
+
+    def __init__(self):
+        self.stats = defaultdict(FunctionStats)
+        self.folded = defaultdict(float)
+        # frames of the coroutines running in the current scheduler step: [name, start, child time]
+        self.stack = []
+        self.started = time.perf_counter()
+        self._await_counted = False
+
+    def current(self):
+        return self.stack[-1][0] if self.stack else "<unprofiled>"
+
+    def step(self, name, send, value):
+        """ Run one step of a coroutine (its send or throw with value), timing it under name """
+        frame = [name, time.perf_counter(), 0.0]
+        self.stack.append(frame)
+        path = ";".join(f[0] for f in self.stack)
+        self._await_counted = False
+        try:
+            return send(value)
+        finally:
+            elapsed = time.perf_counter() - frame[1]
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1][2] += elapsed
+            stats = self.stats[name]
+            stats.self_s += elapsed - frame[2]
+            stats.incl_s += elapsed
+            self.folded[path] += elapsed - frame[2]
+
+    def suspended(self, name):
+        """ coro yielded a trigger; only the innermost profiled coroutine counts the await """
+        if not self._await_counted:
+            self.stats[name].awaits += 1
+            self._await_counted = True
+
+    def table(self):
+        wall = time.perf_counter() - self.started
+        inside = sum(s.self_s for s in self.stats.values())
+        lines = [f"wall {wall:.3f} s, profiled Python {inside:.3f} s ({100 * inside / wall if wall else 0:.1f}%), "
+                 f"outside (simulator, scheduler, unprofiled coroutines) {wall - inside:.3f} s",
+                 "",
+                 f"{'function':<40} {'calls':>8} {'self_s':>9} {'incl_s':>9} {'awaits':>9} "
+                 f"{'get':>9} {'set':>9} {'sim_ns':>12} {'us/call':>9}"]
+        for name, s in sorted(self.stats.items(), key=lambda kv: -kv[1].self_s):
+            per_call = 1e6 * s.incl_s / s.calls if s.calls else 0.0
+            lines.append(f"{name:<40} {s.calls:>8} {s.self_s:>9.3f} {s.incl_s:>9.3f} {s.awaits:>9} "
+                         f"{s.get:>9} {s.set:>9} {s.sim_ns:>12.0f} {per_call:>9.1f}")
+        return "\n".join(lines) + "\n", wall - inside
+
+    def write(self, directory=None):
+        directory = Path(directory or default_profile_dir())
+        directory.mkdir(parents=True, exist_ok=True)
+        table, outside = self.table()
+        (directory / "profile.txt").write_text(table)
+        with open(directory / "profile.folded", "w") as f:
+            for path, seconds in sorted(self.folded.items()):
+                if seconds * 1e6 >= 1:
+                    f.write(f"{path} {int(seconds * 1e6)}\n")
+            f.write(f"[outside] {int(outside * 1e6)}\n")
+        return directory
+
+
+class _ProfiledCoroutine:
+    """ Awaitable that drives the wrapped coroutine step by step under the profile """
+
+    def __init__(self, profile, name, coro):
+        self.profile = profile
+        self.name = name
+        self.coro = coro
+
+    def __await__(self):
+        profile, name, coro = self.profile, self.name, self.coro
+        stats = profile.stats[name]
+        stats.calls += 1
+        sim_start = get_sim_time(units="ns")
+        send, value = coro.send, None
+        while True:
+            try:
+                trigger = profile.step(name, send, value)
+            except StopIteration as stop:
+                stats.sim_ns += get_sim_time(units="ns") - sim_start
+                return stop.value
+            profile.suspended(name)
+            try:
+                send, value = coro.send, (yield trigger)
+            except BaseException as e:
+                send, value = coro.throw, e
+
+
+_profile = None
+
+
+def _count_value_accesses(profile):
+    """ Count .value reads and writes of the logic handles, per profiled function """
+    from cocotb.handle import ModifiableObject
+
+    prop = ModifiableObject.value
+
+    def fget(handle):
+        profile.stats[profile.current()].get += 1
+        return prop.fget(handle)
+
+    def fset(handle, value):
+        profile.stats[profile.current()].set += 1
+        prop.fset(handle, value)
+
+    ModifiableObject.value = property(fget, fset, doc=prop.__doc__)
+
+
+def get_profile():
+    """ The profile of this process, created on first use; None when CORDIC_PROFILE is not set """
+    global _profile
+    if _profile is None and profile_enabled():
+        _profile = Profile()
+        _count_value_accesses(_profile)
+        atexit.register(_profile.write)
+    return _profile
+
+
+def profiled(fn):
+    """ Profile an async function when CORDIC_PROFILE is set, else return it unchanged """
+    profile = get_profile()
+    if profile is None:
+        return fn
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await _ProfiledCoroutine(profile, fn.__name__, fn(*args, **kwargs))
+
+    return wrapper
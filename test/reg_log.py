@@ -0,0 +1,223 @@
+# Binary log of the register accesses made through TinyQV (tqv.py), and its replay.
+#
+# With CORDIC_REGLOG set, every TinyQV of the test process appends each register access
+# to one log: the simulation time it started at, the harness instance, write / read /
+# reset, the register, the access size and the value written or read. A record is 16
+# bytes (REGLOG_DTYPE); they are written in blocks behind a 16-byte header that holds the
+# FIXED_WIDTH of the build:
+#
+#   CORDIC_REGLOG=on make -B MODULE=test_linear_simple    # artifacts/reglog/test_linear_simple.reglog
+#   CORDIC_REGLOG=/tmp/run.reglog make -B                 # the whole regression in one file
+#
+# replay() issues a log again, as fast as the backend takes it, on anything with the
+# register methods of TinyQV (the SPI harness, cordic_model.TqvpCordicModel,
+# cordic_device.TinyQVBus on a memory-mapped path) and reports every read that returns
+# something else than the log. That checks a changed RTL or driver bit for bit without
+# the test code that made the accesses, and gives fixed access patterns to benchmark:
+#
+#   python reg_log.py artifacts/reglog/test_linear_simple.reglog      # on the model
+#   CORDIC_REGLOG_REPLAY=<log> make -B MODULE=test_reg_log             # on the harness
+#
+# How many times the status register reads BUSY depends on timing, not on the design:
+# a replay skips the BUSY polls of the log and polls until the status reads the value
+# the log ends the wait with.
+#
+# Environment variables:
+#   CORDIC_REGLOG        off (default), on (artifacts/reglog/<module>.reglog) or a file name
+#   CORDIC_REGLOG_DIR    where "on" writes (default: <CORDIC_PLOTS_DIR>/artifacts/reglog)
+
+import argparse
+import asyncio
+import atexit
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from cordic_model import TqvpCordicModel, REG_STATUS, STATUS_BUSY
+
+REGLOG_DTYPE = np.dtype([
+    ("t_ns",     np.uint64),      # simulation time the access started at
+    ("value",    np.uint32),      # written, or read back
+    ("reg",      np.uint8),
+    ("size",     np.uint8),       # bytes: 1, 2 or 4
+    ("kind",     np.uint8),       # WRITE, READ or RESET
+    ("instance", np.uint8),       # harness instance of tb.v (make INSTANCES=<n>)
+])
+
+WRITE, READ, RESET = 0, 1, 2
+KIND_NAMES = {WRITE: "write", READ: "read", RESET: "reset"}
+SIZE_NAMES = {1: "byte", 2: "hword", 4: "word"}
+
+MAGIC = b"TQVRLOG1"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("width", np.uint32), ("reserved", np.uint32)])
+
+
+def default_reglog_dir():
+    base = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", ".")))
+    return Path(os.getenv("CORDIC_REGLOG_DIR", base / "artifacts/reglog"))
+
+
+class RegisterLog:
+    """ Appends REGLOG_DTYPE records to a preallocated buffer, written to path whenever it fills
+    up, on reset records and at exit. """
+
+    _shared = None
+
+    def __init__(self, path, width, chunk_size=65536):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "wb")
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"], header["width"] = MAGIC, width
+        header.tofile(self.file)
+        self.buffer = np.zeros(chunk_size, dtype=REGLOG_DTYPE)
+        self.count = 0
+        self.total = 0
+
+    @classmethod
+    def open(cls):
+        """ The log every TinyQV of this process shares, or None when CORDIC_REGLOG is off.
+
+        "on" names the file after the test module (MODULE) and the shard (CORDIC_SHARD), so the
+        jobs of run_parallel.py never share one. """
+        setting = os.getenv("CORDIC_REGLOG", "off")
+        if setting.lower() in ("off", "0", "no", ""):
+            return None
+        if cls._shared is None:
+            from cordic_model import default_fixed_width
+            if setting.lower() in ("on", "1", "yes"):
+                modules = os.getenv("MODULE", "")
+                name = modules if modules and "," not in modules else "regression"
+                shard = os.getenv("CORDIC_SHARD")
+                if shard:
+                    index, count = shard.split("/")
+                    name = f"{name}.shard{index}of{count}"
+                path = default_reglog_dir() / f"{name}.reglog"
+            else:
+                path = Path(setting)
+            cls._shared = cls(path, default_fixed_width())
+            atexit.register(cls._shared.close)
+        return cls._shared
+
+    def record(self, kind, instance, reg, size, value, t_ns):
+        if self.count == len(self.buffer):
+            self.flush()
+        row = self.buffer[self.count]
+        row["t_ns"] = int(t_ns)
+        row["value"] = int(value) & 0xffffffff
+        row["reg"] = reg
+        row["size"] = size
+        row["kind"] = kind
+        row["instance"] = instance
+        self.count += 1
+        self.total += 1
+        # a reset starts a test, whatever ran before it is complete
+        if kind == RESET:
+            self.flush()
+
+    def flush(self):
+        if self.count == 0 or self.file.closed:
+            return
+        self.buffer[:self.count].tofile(self.file)
+        self.file.flush()
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        return self.total
+
+
+def load_log(path):
+    """ (FIXED_WIDTH of the recorded build, records) """
+    with open(path, "rb") as f:
+        header = np.fromfile(f, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a register log")
+        records = np.fromfile(f, dtype=REGLOG_DTYPE)
+    return int(header["width"][0]), records
+
+
+def describe(record, index=None):
+    """ One-line human-readable form of a record """
+    where = f"#{index} " if index is not None else ""
+    kind = int(record["kind"])
+    if kind == RESET:
+        return f"{where}t={int(record['t_ns'])} ns instance {int(record['instance'])}: reset"
+    return (f"{where}t={int(record['t_ns'])} ns instance {int(record['instance'])}: "
+            f"{KIND_NAMES[kind]} {SIZE_NAMES[int(record['size'])]} reg {int(record['reg'])} = {int(record['value']):#x}")
+
+
+async def replay(records, backends, max_polls=100, max_mismatches=None):
+    """ Issue the records on backends (one per recorded instance, or a single backend for a
+    single-instance log) and compare every read. Returns a dict with the counts and the list
+    of mismatches as (record index, value read). """
+    backends = list(backends) if isinstance(backends, (list, tuple)) else [backends]
+    used = int(records["instance"].max()) + 1 if len(records) else 0
+    if used > len(backends):
+        raise ValueError(f"the log uses {used} harness instances, got {len(backends)} backend(s)")
+
+    stats = {"records": len(records), "writes": 0, "reads": 0, "resets": 0, "skipped_polls": 0,
+             "extra_polls": 0, "mismatches": []}
+    start = time.perf_counter()
+    for index, record in enumerate(records):
+        backend = backends[int(record["instance"])]
+        kind, reg, value = int(record["kind"]), int(record["reg"]), int(record["value"])
+        size = SIZE_NAMES.get(int(record["size"]))
+        if kind == RESET:
+            await backend.reset()
+            stats["resets"] += 1
+        elif kind == WRITE:
+            await getattr(backend, f"write_{size}_reg")(reg, value)
+            stats["writes"] += 1
+        else:
+            if reg == REG_STATUS and value == STATUS_BUSY:
+                stats["skipped_polls"] += 1
+                continue
+            read = getattr(backend, f"read_{size}_reg")
+            got = await read(reg)
+            stats["reads"] += 1
+            if reg == REG_STATUS:
+                polls = 1
+                while got == STATUS_BUSY and got != value and polls < max_polls:
+                    got = await read(reg)
+                    polls += 1
+                stats["extra_polls"] += polls - 1
+            if got != value:
+                stats["mismatches"].append((index, got))
+                if max_mismatches is not None and len(stats["mismatches"]) >= max_mismatches:
+                    break
+    stats["wall_s"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay a register log on the register-level model")
+    parser.add_argument("log")
+    parser.add_argument("--circ-lut", type=int, default=int(os.getenv("CORDIC_CIRC_LUT", 0)),
+                        help="CIRC_LUT of the recorded build (default: CORDIC_CIRC_LUT or 0)")
+    parser.add_argument("--max-mismatches", type=int, default=20, help="stop after this many")
+    args = parser.parse_args()
+
+    width, records = load_log(args.log)
+    instances = int(records["instance"].max()) + 1 if len(records) else 1
+    backends = [TqvpCordicModel(width=width, circ_lut_bits=args.circ_lut) for _ in range(instances)]
+    stats = asyncio.run(replay(records, backends, max_mismatches=args.max_mismatches))
+
+    span_us = (int(records["t_ns"][-1]) - int(records["t_ns"][0])) / 1000 if len(records) else 0.0
+    accesses = stats["writes"] + stats["reads"]
+    print(f"{args.log}: {len(records)} records, {width}-bit, {instances} instance(s), {span_us:.1f} us simulated")
+    print(f"replayed {stats['writes']} writes, {stats['reads']} reads, {stats['resets']} resets "
+          f"({stats['skipped_polls']} BUSY polls skipped) in {stats['wall_s']:.3f} s, "
+          f"{accesses / max(stats['wall_s'], 1e-9):.0f} accesses/s")
+    for index, got in stats["mismatches"]:
+        print(f"MISMATCH {describe(records[index], index)}, replay read {got:#x}")
+    if stats["mismatches"]:
+        raise SystemExit(1)
+    print("no mismatches")
+
+
+if __name__ == "__main__":
+    main()
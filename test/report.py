@@ -0,0 +1,434 @@
+# Plots, CSVs and a summary of the sweeps, generated offline from their raw results.
+#
+# The sweep tests only write the raw result arrays to artifacts/cordic/<sweep>.npz, so
+# the simulator is not held up by matplotlib. This script turns every .npz into the
+# plots and CSVs, one process per sweep, and writes summary.md with the metrics of all
+# sweeps. A sweep is only re-rendered when its .npz (or this script) changed since the
+# last report; --force renders everything again.
+#
+# Usage (from the test directory, after the tests ran):
+#   python report.py
+#   python report.py --force
+#   make report
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+TEST_DIR = Path(__file__).resolve().parent
+
+# remembers the data hash and the metrics of every rendered sweep
+STAMP_FILE = ".report_stamps.json"
+
+
+def artifacts_dir():
+    # same rule the sweep tests use to decide where to write their artifacts
+    base = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", TEST_DIR)))
+    return base / "artifacts/cordic"
+
+
+def _plt():
+    import matplotlib
+    matplotlib.use("Agg")  # headless backend
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _saved_metrics(data):
+    """ {channel: {"MAE", "RMSE", "MAXERR"}} of the StreamingMetrics a sweep saved with its results
+    (weighted like the test's for an adaptive sweep, merged over the shards by run_parallel.py) """
+    from test_utils import StreamingMetrics
+    metrics = StreamingMetrics.from_state(data)
+    return {name: {"MAE": metrics.mae(name), "RMSE": metrics.rmse(name), "MAXERR": metrics.max(name)}
+            for k, name in enumerate(metrics.channels) if metrics.count[k]}
+
+
+def _sweep_and_residual(plt, x, true, pred, err, name, label, xlabel, metrics, outfile, xticks=None):
+    """ The two panel figure every sweep uses: value vs. reference on the left, residual on the right """
+    plt.figure(figsize=(14, 4))
+    plt.subplot(1, 2, 1)
+    plt.title(f"{name} Sweep: MAE={metrics['MAE']:.5f}, RMSE={metrics['RMSE']:.5f}")
+    plt.plot(x, true, label=f"True {label}")
+    plt.plot(x, pred, "--", label=f"CORDIC {label}")
+    plt.xlabel(xlabel)
+    plt.ylabel(f"{label}(x)")
+    if xticks is not None:
+        plt.xticks(xticks)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+
+    plt.subplot(1, 2, 2)
+    plt.title(f"Residual: {label}_pred - {label}_true")
+    plt.plot(x, err, label="Residual")
+    plt.xlabel(xlabel)
+    plt.ylabel("Error")
+    if xticks is not None:
+        plt.xticks(xticks)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(outfile, dpi=180, bbox_inches="tight")
+    plt.close()
+
+
+def report_circular_rotating(data, outdir, suffix=""):
+    plt = _plt()
+    degs, sins, coss = data["deg"], data["sin"], data["cos"]
+    sin_true = np.sin(np.deg2rad(degs))
+    cos_true = np.cos(np.deg2rad(degs))
+    sin_err = sins - sin_true
+    cos_err = coss - cos_true
+    unit_resid = coss**2 + sins**2 - 1.0
+
+    saved = _saved_metrics(data)
+    sin_metrics, cos_metrics = saved["sin"], saved["cos"]
+    xticks = range(-90, 91, 15)
+    _sweep_and_residual(plt, degs, sin_true, sins, sin_err, "Sine", "sin", "Angle (deg)", sin_metrics, outdir / f"sine{suffix}.png", xticks)
+    _sweep_and_residual(plt, degs, cos_true, coss, cos_err, "Cosine", "cos", "Angle (deg)", cos_metrics, outdir / f"cosine{suffix}.png", xticks)
+
+    rms_unit, max_unit = saved["cos²+sin²-1"]["RMSE"], saved["cos²+sin²-1"]["MAXERR"]
+    plt.figure(figsize=(7, 4))
+    plt.title(f"Unit-circle residual (cos²+sin²-1): RMS={rms_unit:.5e}, MAX={max_unit:.5e}")
+    plt.plot(degs, unit_resid, label="cos²+sin²-1")
+    plt.xlabel("Angle (deg)")
+    plt.ylabel("Residual")
+    plt.xticks(xticks)
+    plt.grid(True, alpha=0.3)
+    plt.legend()
+    plt.savefig(outdir / f"unit_circle_residual{suffix}.png", dpi=180, bbox_inches="tight")
+    plt.close()
+
+    np.savetxt(outdir / f"sine_vs_true{suffix}.csv", np.c_[degs, sin_true, sins, sin_err],
+               delimiter=",", header="deg,true_sin,cordic_sin,residual", comments="")
+    np.savetxt(outdir / f"cosine_vs_true{suffix}.csv", np.c_[degs, cos_true, coss, cos_err],
+               delimiter=",", header="deg,true_cos,cordic_cos,residual", comments="")
+    np.savetxt(outdir / f"unit_circle_residual{suffix}.csv", np.c_[degs, unit_resid],
+               delimiter=",", header="deg,cos2_plus_sin2_minus_1", comments="")
+
+    metrics = {
+        **{f"{k}(sin)": v for k, v in sin_metrics.items()},
+        **{f"{k}(cos)": v for k, v in cos_metrics.items()},
+        "RMS(cos²+sin²-1)": rms_unit,
+        "MAX(cos²+sin²-1)": max_unit,
+    }
+    if "cycles" in data.files:
+        metrics["core latency (cycles, measured)"] = float(data["cycles"])
+    if "expected_cycles" in data.files:
+        metrics["core latency (cycles, cordic_model.py)"] = float(data["expected_cycles"])
+    return metrics
+
+
+def report_hyperbolic_rotating(data, outdir):
+    plt = _plt()
+    xs, sinh_vals, cosh_vals = data["x"], data["sinh"], data["cosh"]
+    sinh_true = np.sinh(xs)
+    cosh_true = np.cosh(xs)
+    err_sinh = sinh_vals - sinh_true
+    err_cosh = cosh_vals - cosh_true
+    invariant_resid = cosh_vals**2 - sinh_vals**2 - 1.0
+
+    saved = _saved_metrics(data)
+    sinh_metrics, cosh_metrics = saved["sinh"], saved["cosh"]
+    _sweep_and_residual(plt, xs, sinh_true, sinh_vals, err_sinh, "Sinh", "sinh", "x", sinh_metrics, outdir / "sinh.png")
+    _sweep_and_residual(plt, xs, cosh_true, cosh_vals, err_cosh, "Cosh", "cosh", "x", cosh_metrics, outdir / "cosh.png")
+
+    rms_invariant, max_invariant = saved["cosh²-sinh²-1"]["RMSE"], saved["cosh²-sinh²-1"]["MAXERR"]
+    plt.figure(figsize=(7, 4))
+    plt.title(f"Hyperbolic invariant: cosh²-sinh²-1  (RMS={rms_invariant:.5e}, MAX={max_invariant:.5e})")
+    plt.plot(xs, invariant_resid, label="Residual")
+    plt.xlabel("x")
+    plt.ylabel("Residual")
+    plt.grid(True, alpha=0.3)
+    plt.legend()
+    plt.savefig(outdir / "hyperbolic_invariant.png", dpi=180, bbox_inches="tight")
+    plt.close()
+
+    np.savetxt(outdir / "sinh_vs_true.csv", np.c_[xs, sinh_true, sinh_vals, err_sinh],
+               delimiter=",", header="x,true_sinh,cordic_sinh,residual", comments="")
+    np.savetxt(outdir / "cosh_vs_true.csv", np.c_[xs, cosh_true, cosh_vals, err_cosh],
+               delimiter=",", header="x,true_cosh,cordic_cosh,residual", comments="")
+    np.savetxt(outdir / "hyperbolic_invariant.csv", np.c_[xs, invariant_resid],
+               delimiter=",", header="x,cosh2_minus_sinh2_minus_1", comments="")
+
+    return {
+        **{f"{k}(sinh)": v for k, v in sinh_metrics.items()},
+        **{f"{k}(cosh)": v for k, v in cosh_metrics.items()},
+        "RMS(cosh²-sinh²-1)": rms_invariant,
+        "MAX(cosh²-sinh²-1)": max_invariant,
+    }
+
+
+def report_hyperbolic_vectoring(data, outdir):
+    plt = _plt()
+    s, r_meas, z_meas = data["s"], data["r"], data["z"]
+    r_true = 2.0 * np.sqrt(s)           # sqrt(x^2 - y^2) = 2*sqrt(s)
+    z_true = 0.5 * np.log(s)            # atanh((s-1)/(s+1)) = 0.5*ln(s)
+    err_r = r_meas - r_true
+    err_z = z_meas - z_true
+    saved = _saved_metrics(data)
+    r_metrics, z_metrics = saved["2*sqrt(s)"], saved["z=0.5ln(s)"]
+
+    plt.figure(figsize=(14, 4))
+    plt.subplot(1, 2, 1)
+    plt.title(f"2*sqrt(s) from vectoring  (MAE={r_metrics['MAE']:.5f})")
+    plt.plot(s, r_true, label="True 2*sqrt(s)")
+    plt.plot(s, r_meas, "--", label="CORDIC (normalized)")
+    plt.xlabel("s"); plt.ylabel("2*sqrt(s)"); plt.legend(); plt.grid(True, alpha=0.3)
+
+    plt.subplot(1, 2, 2)
+    plt.title("Residual: (2*sqrt(s))_pred - (2*sqrt(s))_true")
+    plt.plot(s, err_r, label="Residual")
+    plt.xlabel("s")
+    plt.ylabel("Error")
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(outdir / "sqrt.png", dpi=180, bbox_inches="tight")
+    plt.close()
+
+    plt.figure(figsize=(14, 4))
+    plt.subplot(1, 2, 1)
+    plt.title("z output vs 0.5*ln(s)")
+    plt.plot(s, z_true, label="0.5*ln(s)")
+    plt.plot(s, z_meas, "--", label="CORDIC z")
+    plt.xlabel("s")
+    plt.ylabel("z")
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+
+    plt.subplot(1, 2, 2)
+    plt.title("Residual: z_pred - 0.5*ln(s)")
+    plt.plot(s, err_z, label="Residual")
+    plt.xlabel("s")
+    plt.ylabel("Error")
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(outdir / "ln.png", dpi=180, bbox_inches="tight")
+    plt.close()
+
+    np.savetxt(outdir / "sqrt_vs_true.csv", np.c_[s, r_true, r_meas, err_r],
+               delimiter=",", header="s,2sqrt_s,true_norm,err", comments="")
+    np.savetxt(outdir / "z_vs_half_ln_s.csv", np.c_[s, z_true, z_meas, err_z],
+               delimiter=",", header="s,0.5lns,cordic_z,err", comments="")
+
+    return {
+        **{f"{k}(2*sqrt(s))": v for k, v in r_metrics.items()},
+        **{f"{k}(0.5*ln(s))": v for k, v in z_metrics.items()},
+    }
+
+
+def report_circular_vectoring(data, outdir):
+    plt = _plt()
+    degs, radius, fixed, r_meas, theta_meas = data["deg"], data["radius"], data["fixed"], data["r"], data["theta"]
+    theta_true = np.deg2rad(degs)
+    err_theta = (theta_meas - theta_true + np.pi) % (2 * np.pi) - np.pi
+    err_r = r_meas / radius - 1.0
+
+    plt.figure(figsize=(14, 4))
+    for k, (err, label) in enumerate(((err_theta, "theta error (rad)"), (err_r, "relative r error"))):
+        plt.subplot(1, 2, k + 1)
+        plt.title(f"cartesian to polar: {label}")
+        for rad in np.unique(radius):
+            for is_fixed, style in ((0, "-"), (1, "o")):
+                sel = (radius == rad) & (fixed == is_fixed)
+                if np.any(sel):
+                    order = np.argsort(degs[sel])
+                    plt.plot(degs[sel][order], err[sel][order], style,
+                             label=f"r={rad:g}{' (fixed format)' if is_fixed else ''}")
+        plt.xlabel("Angle (deg)")
+        plt.ylabel(label)
+        plt.xticks(range(-180, 181, 45))
+        plt.legend(fontsize="small")
+        plt.grid(True, alpha=0.3)
+    plt.savefig(outdir / "polar.png", dpi=180, bbox_inches="tight")
+    plt.close()
+
+    np.savetxt(outdir / "polar_vs_true.csv", np.c_[degs, radius, fixed, r_meas, err_r, theta_meas, err_theta],
+               delimiter=",", header="deg,radius,fixed_format,cordic_r,r_rel_err,cordic_theta,theta_err", comments="")
+
+    metrics = {f"{k}({name})": v for name, channel in _saved_metrics(data).items() for k, v in channel.items()}
+    for key, label in (("cycles", "core latency (cycles)"), ("sim_us_per_op", "simulated us per point"),
+                       ("wall_ops_per_s", "points/s wall clock")):
+        if key in data.files:
+            metrics[label] = float(data[key])
+    return metrics
+
+
+def report_exhaustive(name, labels):
+    """ Renderer for the exhaustive ULP characterization written by test_exhaustive_ulp.py """
+    def render(data, outdir):
+        plt = _plt()
+        domain = float(data["domain"])
+
+        plt.figure(figsize=(14, 4))
+        for k, (out, label) in enumerate(zip(("out1", "out2"), labels)):
+            hist = data[f"hist_{out}"]
+            plt.subplot(1, 2, k + 1)
+            plt.title(f"{label}: error histogram, |z| <= {domain:.4f}")
+            plt.bar(np.arange(len(hist)), hist)
+            plt.yscale("log")
+            plt.xlabel(f"|error| (LSB, last bin: >= {len(hist) - 1})")
+            plt.ylabel("codes")
+            plt.grid(True, alpha=0.3)
+        plt.savefig(outdir / f"exhaustive_{name}_hist.png", dpi=180, bbox_inches="tight")
+        plt.close()
+
+        plt.figure(figsize=(14, 4))
+        for k, (out, label) in enumerate(zip(("out1", "out2"), labels)):
+            plt.subplot(1, 2, k + 1)
+            plt.title(f"{label}: error against input")
+            plt.plot(data["map_z"], data[f"map_max_{out}"], label="max")
+            plt.plot(data["map_z"], data[f"map_mean_{out}"], label="mean")
+            for edge in (-domain, domain):
+                plt.axvline(edge, color="gray", linestyle=":")
+            plt.yscale("symlog")
+            plt.xlabel("z")
+            plt.ylabel("|error| (LSB)")
+            plt.legend()
+            plt.grid(True, alpha=0.3)
+        plt.savefig(outdir / f"exhaustive_{name}_map.png", dpi=180, bbox_inches="tight")
+        plt.close()
+
+        np.savetxt(outdir / f"exhaustive_{name}_worst.csv",
+                   np.c_[data["worst_z"], data["worst_code"], data["worst_err_out1"], data["worst_err_out2"]],
+                   delimiter=",", header=f"z,code,{labels[0]}_err_lsb,{labels[1]}_err_lsb", comments="")
+
+        metrics = {"codes": float(data["count"]), "codes outside domain": float(data["out_of_domain"])}
+        for out, label in zip(("out1", "out2"), labels):
+            hist = data[f"hist_{out}"]
+            bins = np.arange(len(hist))
+            metrics[f"max LSB({label})"] = float(data[f"worst_err_{out}"].max()) if len(data["worst_code"]) else 0.0
+            metrics[f"mean LSB({label}, rounded)"] = float((hist * bins).sum() / max(hist.sum(), 1))
+        return metrics
+    return render
+
+
+def report_early_exit(data, outdir):
+    """ Latency histograms of the LINEAR workloads of test_early_exit.py, with and without early exit """
+    plt = _plt()
+    names = str(data["names"]).split(",")
+    iterations = int(data["iterations"])
+    bins = np.arange(iterations + 1)
+
+    plt.figure(figsize=(4 * len(names), 4))
+    metrics = {}
+    for w, name in enumerate(names):
+        sel = data["workload"] == w
+        hist = np.bincount(data["cycles"][sel], minlength=iterations + 1)
+        mean = float(np.mean(data["cycles"][sel])) if np.any(sel) else float("nan")
+        plt.subplot(1, len(names), w + 1)
+        plt.title(f"{name}: mean {mean:.2f} of {iterations} cycles")
+        plt.bar(bins, hist)
+        plt.xlabel("core latency (cycles)")
+        plt.ylabel("operations")
+        plt.xticks(bins[::max(1, iterations // 12)])
+        plt.grid(True, alpha=0.3)
+        metrics[f"mean latency({name})"] = mean
+        metrics[f"MAXERR({name})"] = float(np.max(np.abs(data["err"][sel]))) if np.any(sel) else float("nan")
+        metrics[f"MAXERR({name}, no early exit)"] = float(np.max(np.abs(data["err_full"][sel]))) if np.any(sel) else float("nan")
+    plt.tight_layout()
+    plt.savefig(outdir / "early_exit_latency.png", dpi=180, bbox_inches="tight")
+    plt.close()
+
+    np.savetxt(outdir / "early_exit_latency.csv",
+               np.c_[data["workload"], data["cycles"], data["cycles_full"], data["err"], data["err_full"]],
+               delimiter=",", header="workload,cycles,cycles_no_early_exit,error,error_no_early_exit", comments="")
+    metrics["core latency (cycles, no early exit)"] = float(iterations)
+    return metrics
+
+
+# <sweep>.npz written by the sweep tests -> function rendering it, returning its metrics
+REPORTS = {
+    "circular_rotating": report_circular_rotating,
+    "circular_rotating_lut": functools.partial(report_circular_rotating, suffix="_lut"),
+    "hyperbolic_rotating": report_hyperbolic_rotating,
+    "hyperbolic_vectoring": report_hyperbolic_vectoring,
+    "circular_vectoring": report_circular_vectoring,
+    "exhaustive_circular": report_exhaustive("circular", ("cos", "sin")),
+    "exhaustive_hyperbolic": report_exhaustive("hyperbolic", ("cosh", "sinh")),
+    "early_exit": report_early_exit,
+}
+
+
+def data_hash(path):
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def render(name, outdir):
+    start = time.monotonic()
+    with np.load(outdir / f"{name}.npz") as data:
+        metrics = REPORTS[name](data, outdir)
+    return name, metrics, time.monotonic() - start
+
+
+def write_summary(outdir, stamps):
+    lines = ["# CORDIC sweep report", ""]
+    for name in REPORTS:
+        if name not in stamps:
+            continue
+        stamp = stamps[name]
+        lines += [f"## {name}", "", f"{stamp['points']} points, data {stamp['hash']}", "",
+                  "| metric | value |", "|---|---|"]
+        lines += [f"| {metric} | {value:.6g} |" for metric, value in stamp["metrics"].items()]
+        lines.append("")
+
+    # the circular sweep with the (cos, sin) table (make CIRC_LUT=<n>) against the plain one
+    if "circular_rotating" in stamps and "circular_rotating_lut" in stamps:
+        base, lut = stamps["circular_rotating"]["metrics"], stamps["circular_rotating_lut"]["metrics"]
+        lines += ["## circular_rotating: (cos, sin) table vs. baseline", "",
+                  "| metric | baseline | table |", "|---|---|---|"]
+        lines += [f"| {metric} | {base[metric]:.6g} | {lut[metric]:.6g} |" for metric in lut if metric in base]
+        lines.append("")
+    (outdir / "summary.md").write_text("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render plots, CSVs and summary.md from the raw sweep results.")
+    parser.add_argument("--dir", type=Path, default=None,
+                        help="artifacts directory holding the .npz files (default: artifacts/cordic)")
+    parser.add_argument("--force", action="store_true", help="render every sweep, even when its data did not change")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of processes rendering at once (default: all cores)")
+    args = parser.parse_args()
+
+    outdir = args.dir or artifacts_dir()
+    stamp_file = outdir / STAMP_FILE
+    stamps = json.loads(stamp_file.read_text()) if stamp_file.exists() else {}
+
+    todo = []
+    for name in REPORTS:
+        path = outdir / f"{name}.npz"
+        if not path.exists():
+            continue
+        digest = data_hash(path)
+        if args.force or stamps.get(name, {}).get("hash") != digest:
+            todo.append((name, digest))
+        else:
+            print(f"{name:<24} unchanged, skipped")
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(todo)))) as pool:
+            futures = [pool.submit(render, name, outdir) for name, _ in todo]
+            for (name, digest), future in zip(todo, futures):
+                _, metrics, wall_time = future.result()
+                with np.load(outdir / f"{name}.npz") as data:
+                    points = int(data["count"]) if "count" in data.files else len(data[data.files[0]])
+                stamps[name] = {"hash": digest, "points": points, "metrics": metrics}
+                print(f"{name:<24} rendered in {wall_time:.1f} s")
+
+    stamp_file.write_text(json.dumps(stamps, indent=2) + "\n")
+    write_summary(outdir, stamps)
+    print(f"summary -> {outdir / 'summary.md'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# On-disk cache of raw CORDIC results for the sweeps.
+#
+# An entry maps the register-level input of one operation, (mode, is_rotating, A, B, shift),
+# to what the design returned, (out1, out2, cycles). The cache is keyed by a hash of
+# everything that can change those numbers: the RTL, the testbench, the register access
+# code (tqv*.py, and test_utils.py, whose run_cordic / wait_done count the cycles) and the
+# build options. Any change there starts a fresh cache, while changes to
+# the tests, plots or docs keep hitting the old one.
+#
+# Environment variables:
+#   CORDIC_CACHE=off         disable the cache (always simulate)
+#   CORDIC_CACHE_DIR         where to keep it (default: test/.cordic_cache)
+#   CORDIC_CACHE_VERIFY      fraction (0..1) of cache hits that are simulated anyway and
+#                            compared against the cached result, to catch a stale cache
+#   CORDIC_CACHE_SEED        seed for picking the verified points (default: 0)
+
+import hashlib
+import json
+import os
+import random
+import uuid
+from pathlib import Path
+
+TEST_DIR = Path(__file__).resolve().parent
+SRC_DIR = TEST_DIR.parent / "src"
+
+# files whose content determines the raw results
+HASHED_SOURCES = [
+    *sorted(SRC_DIR.glob("*.v")),
+    *sorted((SRC_DIR / "test_harness").glob("*.sv")),
+    TEST_DIR / "tb.v",
+    TEST_DIR / "tqv.py",
+    TEST_DIR / "tqv_reg.py",
+    # run_cordic / wait_done: the write order and the polling make the cached cycles (done_after)
+    TEST_DIR / "test_utils.py",
+]
+
+# build options (set by the Makefile / environment) that change the simulated design
+HASHED_ENV_VARS = ["GATES", "CORDIC_CIRC_LUT", "CORDIC_FIXED_WIDTH"]
+
+# merge the per-process part files once there are this many of them
+COMPACT_AFTER_PARTS = 16
+
+
+def design_hash():
+    """ Hash of the RTL, harness sources and build options """
+    h = hashlib.sha256()
+    for path in HASHED_SOURCES:
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    for name in HASHED_ENV_VARS:
+        h.update(f"{name}={os.getenv(name, '')}".encode())
+    return h.hexdigest()[:16]
+
+
+class StaleCacheError(AssertionError):
+    pass
+
+
+class ResultCache:
+    """ Cache of (mode, is_rotating, A, B, shift) -> (out1, out2, cycles) for one design hash.
+
+    Each process appends its new entries to its own part file, so sharded runs can share
+    one cache directory without locking. """
+
+    def __init__(self, directory, verify_fraction=0.0, seed=0):
+        self.directory = Path(directory)
+        self.verify_fraction = verify_fraction
+        self.rng = random.Random(seed)
+        self.entries = {}
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.verified = 0
+        self._load()
+
+    @classmethod
+    def open(cls):
+        """ Cache for the current design, or None when disabled with CORDIC_CACHE=off """
+        if os.getenv("CORDIC_CACHE", "on").lower() in ("off", "0", "no"):
+            return None
+        base = Path(os.getenv("CORDIC_CACHE_DIR", TEST_DIR / ".cordic_cache"))
+        return cls(base / design_hash(),
+                   verify_fraction=float(os.getenv("CORDIC_CACHE_VERIFY", 0)),
+                   seed=int(os.getenv("CORDIC_CACHE_SEED", 0)))
+
+    @staticmethod
+    def key(mode, is_rotating, A, B, shift, width=16, flags=0):
+        mask = (1 << width) - 1
+        A = None if A is None else A & mask
+        B = None if B is None else B & mask
+        key = f"{int(mode)},{int(is_rotating)},{A},{B},{shift}"
+        # config option bits (binary angle, ...) only when set, so the plain keys stay valid
+        return f"{key},{int(flags)}" if flags else key
+
+    def _load(self):
+        if not self.directory.exists():
+            return
+        parts = sorted(self.directory.glob("part-*.json"))
+        for part in parts:
+            try:
+                self.entries.update(json.loads(part.read_text()))
+            except (OSError, ValueError):
+                # a part that is being written by another process, or a broken one
+                continue
+        if len(parts) > COMPACT_AFTER_PARTS:
+            self._write_part(self.entries)
+            for part in parts:
+                part.unlink(missing_ok=True)
+
+    def _write_part(self, entries):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"part-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        tmp = self.directory / f".{name}.tmp"
+        tmp.write_text(json.dumps(entries))
+        os.replace(tmp, self.directory / name)
+
+    def get(self, key):
+        """ Cached (out1, out2, cycles) or None. Counts hits and misses. """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tuple(value)
+
+    def should_verify(self):
+        """ Decide whether this cache hit gets simulated anyway (CORDIC_CACHE_VERIFY) """
+        return self.verify_fraction > 0 and self.rng.random() < self.verify_fraction
+
+    def check(self, key, cached, simulated):
+        """ Compare a re-simulated point against its cached result """
+        self.verified += 1
+        if tuple(cached) != tuple(simulated):
+            raise StaleCacheError(f"stale result cache in {self.directory}: {key} cached as {tuple(cached)}, "
+                                  f"simulated {tuple(simulated)}; delete the directory or run with CORDIC_CACHE=off")
+
+    def put(self, key, value):
+        value = list(value)
+        if self.entries.get(key) != value:
+            self.entries[key] = value
+            self.new_entries[key] = value
+
+    def save(self):
+        if self.new_entries:
+            self._write_part(self.new_entries)
+            self.new_entries = {}
+
+    def summary(self):
+        return (f"result cache {self.directory.name}: {self.hits} hits, {self.misses} misses, "
+                f"{self.verified} re-simulated to verify")
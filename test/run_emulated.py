@@ -0,0 +1,114 @@
+# Runs the cocotb test modules on the in-process emulator (emulator.py), without a simulator.
+#
+# The modules are imported unchanged: before that, TinyQV, ClockCycles, Clock, start_soon
+# and get_sim_time are swapped for the emulator's, so every test runs on EmulatedTinyQV
+# in emulated clock cycles. Results, plots and traces go to sim_build/emulated unless
+# CORDIC_PLOTS_DIR is set, so they never mix with the ones of the simulator; the result
+# cache is off and lockstep is not available (there are no internal signals).
+#
+# Usage (from the test directory):
+#   python run_emulated.py                                   # the MODULE list of the Makefile
+#   python run_emulated.py --modules test_linear_simple --width 32
+#   python run_emulated.py --instances 4 --testcase test_cordic_device
+#   make emulate
+
+import argparse
+import importlib
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+
+TEST_DIR = Path(__file__).resolve().parent
+
+
+def install(scheduler):
+    """ Point the cocotb API the tests use, and tqv.TinyQV, at the emulator """
+    import cocotb
+    import cocotb.clock
+    import cocotb.triggers
+    import cocotb.utils
+    import emulator
+    import tqv
+
+    cocotb.start_soon = scheduler.start_soon
+    cocotb.plusargs = {}
+    cocotb.triggers.ClockCycles = emulator.ClockCycles
+    cocotb.clock.Clock = emulator.Clock
+    cocotb.utils.get_sim_time = scheduler.sim_time
+    tqv.TinyQV = emulator.EmulatedTinyQV
+
+
+def collect(module):
+    """ The cocotb tests of a module, in the order cocotb runs them """
+    import cocotb.decorators
+    tests = [obj for obj in vars(module).values() if isinstance(obj, cocotb.decorators.test)]
+    return sorted(tests, key=lambda t: (t.stage, t._id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cocotb test modules on the emulator.")
+    parser.add_argument("--modules", default=None,
+                        help="comma separated list of test modules (default: MODULE from the Makefile)")
+    parser.add_argument("--testcase", default=None, help="comma separated test names to run (default: all)")
+    parser.add_argument("--width", type=int, default=int(os.getenv("CORDIC_FIXED_WIDTH", 16)),
+                        help="FIXED_WIDTH to emulate, like make WIDTH=<n>")
+    parser.add_argument("--circ-lut", type=int, default=int(os.getenv("CORDIC_CIRC_LUT", 0)),
+                        help="CIRC_LUT_BITS to emulate, like make CIRC_LUT=<n>")
+    parser.add_argument("--instances", type=int, default=1, help="harness instances, like make INSTANCES=<n>")
+    args = parser.parse_args()
+
+    # the helpers read these at import
+    os.environ["CORDIC_FIXED_WIDTH"] = str(args.width)
+    os.environ["CORDIC_CIRC_LUT"] = str(args.circ_lut)
+    os.environ["CORDIC_CACHE"] = "off"
+    os.environ["CORDIC_LOCKSTEP"] = "0"
+    os.environ.setdefault("CORDIC_PLOTS_DIR", str(TEST_DIR / "sim_build" / "emulated"))
+    sys.path.insert(0, str(TEST_DIR))
+
+    from emulator import Scheduler, EmulatedDut
+    from run_parallel import default_modules
+
+    scheduler = Scheduler()
+    install(scheduler)
+
+    modules = args.modules.split(",") if args.modules else default_modules()
+    selected = set(args.testcase.split(",")) if args.testcase else None
+    results = []
+    start = time.monotonic()
+    for name in modules:
+        module = importlib.import_module(name)
+        scheduler.cycle = 0
+        dut = EmulatedDut(scheduler, instances=args.instances, width=args.width, circ_lut_bits=args.circ_lut)
+        for test in collect(module):
+            if selected is not None and test.name not in selected:
+                continue
+            if test.skip:
+                results.append((f"{name}.{test.name}", "SKIP", 0.0, 0.0))
+                continue
+            dut._log.info(f"running {name}.{test.name}")
+            t_sim, t_wall = scheduler.sim_time("ns"), time.monotonic()
+            try:
+                scheduler.run(test._func(dut))
+                status = "PASS"
+            except Exception:
+                dut._log.error(traceback.format_exc())
+                status = "FAIL"
+            results.append((f"{name}.{test.name}", status, scheduler.sim_time("ns") - t_sim, time.monotonic() - t_wall))
+    wall_time = time.monotonic() - start
+
+    print("\n---- Emulated run ----")
+    for test, status, sim_ns, wall in results:
+        print(f"{test:<70} {status:<5} {sim_ns / 1e6:10.2f} ms simulated {wall:8.2f} s")
+    failed = [test for test, status, _, _ in results if status == "FAIL"]
+    print(f"TESTS={len(results)} PASS={sum(s == 'PASS' for _, s, _, _ in results)} FAIL={len(failed)} "
+          f"SKIP={sum(s == 'SKIP' for _, s, _, _ in results)}, {wall_time:.1f} s")
+    for test in failed:
+        print(f"FAILED: {test}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
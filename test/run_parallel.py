@@ -0,0 +1,273 @@
+# Runs the cocotb test modules in parallel, one simulator process per job.
+#
+# Every module listed in MODULE (Makefile) becomes at least one job. The sweep
+# modules can additionally be split into N shards: each shard only simulates
+# its own contiguous slice of the sweep (see shard_points in test_utils.py).
+# Every job gets its own SIM_BUILD, results file and artifacts directory, so
+# the jobs don't step on each other. When all jobs finished, the results.xml
+# files are merged into a single test/results.xml, the raw sweep results
+# written to artifacts/cordic are concatenated back into one .npz per sweep (their
+# streamed error metrics merged)
+# and the binary traces (and register logs) are collected in artifacts/traces
+# (artifacts/reglog). The fuzz reproducers of the shards are merged into
+# artifacts/fuzz/reproducers.json. Plots and CSVs
+# are rendered from the merged results by report.py.
+#
+# Usage (from the test directory):
+#   python run_parallel.py                      # one job per module
+#   python run_parallel.py --shards 4 --jobs 8  # split sweeps 4 ways, 8 processes
+#   make parallel SHARDS=4
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+TEST_DIR = Path(__file__).resolve().parent
+
+# modules whose sweep can be split with CORDIC_SHARD (they call shard_points)
+SWEEP_MODULES = [
+    "test_circular_rotating_sweep_and_vis",
+    "test_hyperbolic_rotating_sweep_and_vis",
+    "test_hyperbolic_vectoring_square_vis",
+    "test_circular_vectoring_sweep_and_vis",
+    "test_fuzz_differential",
+]
+
+PARALLEL_BUILD_DIR = TEST_DIR / "sim_build" / "parallel"
+
+# keys of test_utils.StreamingMetrics.state() in a sweep .npz, merged instead of concatenated
+METRICS_PREFIX = "metrics_"
+
+# the sweep input of every sharded .npz: the arrays of its length are concatenated and sorted by it
+SORT_KEYS = {
+    "circular_rotating.npz": "deg",
+    "circular_rotating_lut.npz": "deg",
+    "circular_vectoring.npz": "deg",
+    "hyperbolic_rotating.npz": "x",
+    "hyperbolic_vectoring.npz": "s",
+}
+
+
+def default_modules():
+    """Read the MODULE list from the Makefile, so there is one place to edit it."""
+    makefile = (TEST_DIR / "Makefile").read_text()
+    match = re.search(r"^MODULE\s*\??=\s*(.+)$", makefile, flags=re.MULTILINE)
+    if match is None:
+        raise RuntimeError("could not find MODULE in test/Makefile")
+    return [m.strip() for m in match.group(1).split(",") if m.strip()]
+
+
+def artifacts_dir(base):
+    # same rule the sweep tests use to decide where to write their artifacts
+    return Path(base) / "artifacts/cordic"
+
+
+def make_jobs(modules, shards):
+    jobs = []
+    for module in modules:
+        count = shards if module in SWEEP_MODULES else 1
+        for index in range(count):
+            name = module if count == 1 else f"{module}.shard{index}of{count}"
+            jobs.append({"name": name, "module": module, "shard": (index, count)})
+    return jobs
+
+
+def run_job(job, make_args):
+    workdir = PARALLEL_BUILD_DIR / job["name"]
+    shutil.rmtree(workdir, ignore_errors=True)
+    workdir.mkdir(parents=True)
+
+    env = os.environ.copy()
+    env["CORDIC_PLOTS_DIR"] = str(workdir)
+    index, count = job["shard"]
+    if count > 1:
+        env["CORDIC_SHARD"] = f"{index}/{count}"
+
+    cmd = ["make", "--no-print-directory",
+           f"MODULE={job['module']}",
+           f"SIM_BUILD={workdir / 'sim_build'}",
+           f"COCOTB_RESULTS_FILE={workdir / 'results.xml'}",
+           *make_args]
+
+    start = time.monotonic()
+    with open(workdir / "sim.log", "w") as log:
+        proc = subprocess.run(cmd, cwd=TEST_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    job["returncode"] = proc.returncode
+    job["wall_time"] = time.monotonic() - start
+    job["workdir"] = workdir
+    return job
+
+
+def merge_results(jobs, out_file):
+    """Merge the per-job results.xml into one testsuite, in job order."""
+    root = ET.Element("testsuites", name="results")
+    suite = ET.SubElement(root, "testsuite", name="all", package="all")
+
+    for job in jobs:
+        results = job["workdir"] / "results.xml"
+        if not results.exists():
+            # the simulator died before cocotb could write its results
+            case = ET.SubElement(suite, "testcase", name=job["name"], classname=job["module"])
+            ET.SubElement(case, "failure", message=f"no results.xml written, see {job['workdir'] / 'sim.log'}")
+            continue
+
+        for case in ET.parse(results).getroot().iter("testcase"):
+            if job["shard"][1] > 1:
+                case.set("name", f"{case.get('name')}[shard {job['shard'][0]}/{job['shard'][1]}]")
+            suite.append(case)
+
+    ET.indent(root)
+    ET.ElementTree(root).write(out_file, encoding="UTF-8")
+    return suite
+
+
+def merge_artifacts(jobs, outdir):
+    """Concatenate the raw sweep results (.npz) of the shards along their SORT_KEYS input, sorted by it,
+    merge their StreamingMetrics (test_utils.py) and copy the rest; a .npz of one job is copied as is."""
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    npz_parts = {}
+    for job in jobs:
+        job_artifacts = artifacts_dir(job["workdir"])
+        if not job_artifacts.exists():
+            continue
+        for path in sorted(job_artifacts.iterdir()):
+            if path.suffix == ".npz":
+                npz_parts.setdefault(path.name, []).append(path)
+            else:
+                shutil.copy(path, outdir / path.name)
+
+    for name, parts in npz_parts.items():
+        if len(parts) == 1:
+            shutil.copy(parts[0], outdir / name)
+            continue
+        sort_key = SORT_KEYS.get(name)
+        if sort_key is None:
+            # no known sweep input to line the shards up along: keep them side by side
+            print(f"warning: {name} comes from {len(parts)} jobs and has no sort key in SORT_KEYS, kept per part")
+            for index, part in enumerate(parts):
+                shutil.copy(part, outdir / f"{Path(name).stem}.part{index}.npz")
+            continue
+
+        arrays = {}
+        lengths = []
+        metrics = None
+        for part in parts:
+            with np.load(part) as data:
+                lengths.append(len(data[sort_key]))
+                for key in data.files:
+                    if not key.startswith(METRICS_PREFIX):
+                        arrays.setdefault(key, []).append(data[key])
+                if METRICS_PREFIX + "channels" in data.files:
+                    # the streamed metrics of the shards add up to the ones of the whole sweep
+                    from test_utils import StreamingMetrics
+                    part_metrics = StreamingMetrics.from_state(data)
+                    metrics = part_metrics if metrics is None else metrics.merge(part_metrics)
+        # per-point arrays have the length of the sweep input in every shard; the rest (scalars such as
+        # the core latency, or arrays of another length) are the same in every shard, the first one is kept
+        per_point = [key for key, values in arrays.items()
+                     if all(v.ndim >= 1 and len(v) == n for v, n in zip(values, lengths))]
+        merged = {key: np.concatenate(arrays[key]) for key in per_point}
+        order = np.argsort(merged[sort_key], kind="stable")
+        np.savez(outdir / name, **{key: values[order] for key, values in merged.items()},
+                 **{key: values[0] for key, values in arrays.items() if key not in merged},
+                 **(metrics.state() if metrics is not None else {}))
+
+    return sorted(npz_parts)
+
+
+def merge_traces(jobs, outdir, subdir="traces", pattern="*.npy"):
+    """Collect the binary traces (or register logs) of all jobs; sharded ones already carry the shard in their name."""
+    copied = 0
+    for job in jobs:
+        job_traces = Path(job["workdir"]) / "artifacts" / subdir
+        if not job_traces.exists():
+            continue
+        outdir.mkdir(parents=True, exist_ok=True)
+        for path in sorted(job_traces.glob(pattern)):
+            shutil.copy(path, outdir / path.name)
+            copied += 1
+    return copied
+
+
+def merge_reproducers(jobs, out_file):
+    """Merge the minimal reproducers of the fuzz jobs into one file, without duplicates."""
+    from test_fuzz_differential import corpus_case
+    entries = []
+    for job in jobs:
+        for path in sorted((Path(job["workdir"]) / "artifacts" / "fuzz").glob("*.json")):
+            for entry in json.loads(path.read_text()):
+                if not any(corpus_case(e) == corpus_case(entry) for e in entries):
+                    entries.append(entry)
+    if entries:
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        out_file.write_text(json.dumps(entries, indent=2) + "\n")
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cocotb test modules in parallel simulator processes.")
+    parser.add_argument("--modules", default=None,
+                        help="comma separated list of test modules (default: MODULE from the Makefile)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="split each sweep module into this many shards")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of simulator processes to run at once (default: all cores)")
+    parser.add_argument("make_args", nargs="*",
+                        help="extra arguments passed to make, e.g. GATES=yes")
+    args = parser.parse_args()
+
+    modules = args.modules.split(",") if args.modules else default_modules()
+    # the fuzz shards have to draw the same random cases to split them: a random seed is picked here, once
+    if os.getenv("CORDIC_FUZZ_SEED") == "random":
+        from test_fuzz_differential import resolve_seed
+        os.environ["CORDIC_FUZZ_SEED"] = str(resolve_seed("random"))
+        print(f"CORDIC_FUZZ_SEED={os.environ['CORDIC_FUZZ_SEED']}")
+    jobs = make_jobs(modules, max(1, args.shards))
+
+    print(f"Running {len(jobs)} jobs on {args.jobs} processes")
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        done = list(pool.map(lambda job: run_job(job, args.make_args), jobs))
+    wall_time = time.monotonic() - start
+
+    suite = merge_results(done, TEST_DIR / "results.xml")
+    outdir = artifacts_dir(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", TEST_DIR)))
+    merged = merge_artifacts(done, outdir)
+    merge_traces(done, outdir.parent / "traces")
+    merge_traces(done, outdir.parent / "reglog", subdir="reglog", pattern="*.reglog")
+    reproducers = merge_reproducers(done, outdir.parent / "fuzz" / "reproducers.json")
+
+    failed_cases = [case.get("name") for case in suite.iter("testcase") if case.find("failure") is not None]
+    serial_time = sum(job["wall_time"] for job in done)
+
+    print("\n---- Summary of the parallel run ----")
+    for job in done:
+        status = "ok" if job["returncode"] == 0 else f"make exited with {job['returncode']}"
+        print(f"{job['name']:<60} {job['wall_time']:8.1f} s  {status}")
+    print(f"testcases: {len(suite.findall('testcase'))}, failures: {len(failed_cases)}")
+    print(f"merged sweep results: {', '.join(merged) if merged else '-'} -> {outdir}")
+    if reproducers:
+        print(f"{reproducers} fuzz reproducers -> {outdir.parent / 'fuzz' / 'reproducers.json'} "
+              f"(python test_fuzz_differential.py <file> adds them to fuzz_corpus.json)")
+    print(f"wall time {wall_time:.1f} s (sum of jobs {serial_time:.1f} s, speed-up {serial_time / max(wall_time, 1e-9):.2f}x)")
+
+    for name in failed_cases:
+        print(f"FAILED: {name}")
+
+    if failed_cases or any(job["returncode"] != 0 for job in done):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
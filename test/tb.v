@@ -6,13 +6,43 @@
 */
 module tb ();
 
-  // Dump the signals to a VCD file. You can view it with gtkwave or surfer.
+  // Waveform dumping is off by default: a full dump of a sweep is tens of
+  // thousands of SPI bit toggles. It is selected per run with plusargs (the
+  // Makefile sets them from DUMP=full / DUMP=window, see README.md):
+  //   +dump_full         dump from the start of the simulation
+  //   +dump_window       only dump while dump_enable is high, which is driven
+  //                      from Python (see capture_waves in test_utils.py)
+  //   +dump_file=<name>  file name, tb.fst or tb.vcd
+  //   +dump_depth=<n>    $dumpvars depth below the scope, 0 = everything
+  // The scope is fixed at compile time with -DDUMP_SCOPE=<hierarchical name>.
+`ifndef DUMP_SCOPE
+`define DUMP_SCOPE tb
+`endif
+
+  reg [8*64-1:0] dump_file;
+  integer dump_depth;
+  reg dump_armed;
+  reg dump_enable;
+
   initial begin
-    $dumpfile("tb.vcd");
-    $dumpvars(0, tb);
+    dump_armed = 1'b0;
+    dump_enable = 1'b0;
+    if ($test$plusargs("dump_full") || $test$plusargs("dump_window")) begin
+      if (!$value$plusargs("dump_file=%s", dump_file)) dump_file = "tb.vcd";
+      if (!$value$plusargs("dump_depth=%d", dump_depth)) dump_depth = 0;
+      $dumpfile(dump_file);
+      $dumpvars(dump_depth, `DUMP_SCOPE);
+      if ($test$plusargs("dump_window")) $dumpoff;
+      dump_armed = 1'b1;
+    end
     #1;
   end
 
+  always @(dump_enable) begin
+    if (dump_armed && dump_enable) $dumpon;
+    else if (dump_armed) $dumpoff;
+  end
+
   // Wire up the inputs and outputs:
   reg clk;
   reg rst_n;
@@ -45,4 +75,42 @@ module tb ();
       .rst_n  (rst_n)     // not reset
   );
 
+  // Further independent harness + CORDIC instances (N_DUTS > 1, set by the Makefile
+  // from INSTANCES=<n>). They share the clock; every one has its own reset, SPI link
+  // and outputs, so several cocotb tasks can drive them concurrently. Python reaches
+  // instance i as dut.extra[i] (TinyQV(dut, ..., instance=i)), instance 0 is the one above.
+`ifndef N_DUTS
+`define N_DUTS 1
+`endif
+
+  wire [7:0] n_duts = `N_DUTS;
+
+  genvar gi;
+  generate
+    for (gi = 1; gi < `N_DUTS; gi = gi + 1) begin : extra
+      reg rst_n;
+      reg ena;
+      reg [7:0] ui_in;
+      reg [7:0] uio_in;
+      wire [7:0] uo_out;
+      wire [7:0] uio_out;
+      wire [7:0] uio_oe;
+
+      tt_um_tqv_peripheral_harness test_harness (
+`ifdef GL_TEST
+          .VPWR(VPWR),
+          .VGND(VGND),
+`endif
+          .ui_in  (ui_in),
+          .uo_out (uo_out),
+          .uio_in (uio_in),
+          .uio_out(uio_out),
+          .uio_oe (uio_oe),
+          .ena    (ena),
+          .clk    (clk),
+          .rst_n  (rst_n)
+      );
+    end
+  endgenerate
+
 endmodule
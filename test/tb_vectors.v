@@ -0,0 +1,179 @@
+`default_nettype none
+`timescale 1ns / 1ps
+
+/* Self-checking testbench for bulk regressions, without cocotb or the SPI harness.
+
+   It drives the TinyQV bus interface of tqvp_CORDIC directly from a vector file written
+   by gen_vectors.py ($readmemh, one record per operation, see there for the layout):
+   for every record it writes shift, A and B (32-bit writes), the config with start,
+   waits for the done pulse, then reads out1, out2 and the status and checks them
+   against the record, together with the latency. A record with the start bit clear
+   ends the run. `make vectors` generates the file, builds this testbench and runs it.
+
+   Plusargs:
+     +vectors=<file>     vector file (default: vectors.hex)
+     +max_errors=<n>     mismatches listed in detail (default: 10), all are counted
+     +verbose            list every operation
+   The run ends with $fatal when anything mismatched, so the exit code tells.
+*/
+
+`ifndef CORDIC_FIXED_WIDTH
+`define CORDIC_FIXED_WIDTH 16
+`endif
+
+`ifndef TB_MAX_VECTORS
+`define TB_MAX_VECTORS (1 << 20)
+`endif
+
+module tb_vectors ();
+
+  localparam FIXED_WIDTH = `CORDIC_FIXED_WIDTH;
+  localparam MAX_VECTORS = `TB_MAX_VECTORS;
+  localparam RECORD_BITS = 160;
+  // rising edges after the config write until the done pulse, on top of CordicModel.cycles:
+  // the one the core latches the operation on
+  localparam LATENCY_OFFSET = 1;
+  // no operation takes longer, a stuck core is reported instead of hanging
+  localparam TIMEOUT = 256;
+
+  reg clk;
+  reg rst_n;
+  reg [5:0] address;
+  reg [31:0] data_in;
+  reg [1:0] data_write_n;
+  reg [1:0] data_read_n;
+  wire [7:0] uo_out;
+  wire [31:0] data_out;
+  wire data_ready;
+  wire user_interrupt;
+
+  tqvp_CORDIC #(.FIXED_WIDTH(FIXED_WIDTH)) dut (
+      .clk           (clk),
+      .rst_n         (rst_n),
+      .ui_in         (8'h00),
+      .uo_out        (uo_out),
+      .address       (address),
+      .data_in       (data_in),
+      .data_write_n  (data_write_n),
+      .data_read_n   (data_read_n),
+      .data_out      (data_out),
+      .data_ready    (data_ready),
+      .user_interrupt(user_interrupt)
+  );
+
+  // 10 MHz, like the cocotb tests
+  initial clk = 1'b0;
+  always #50 clk = ~clk;
+
+  reg [RECORD_BITS-1:0] vectors [0:MAX_VECTORS-1];
+  reg [8*256-1:0] vector_file;
+  integer max_errors;
+  reg verbose;
+
+  // one bus access per clock: the inputs change on the falling edge, the peripheral
+  // samples them on the rising one
+  task bus_write(input [5:0] addr, input [31:0] value, input [1:0] size);
+    begin
+      @(negedge clk);
+      address = addr;
+      data_in = value;
+      data_write_n = size;
+      @(negedge clk);
+      data_write_n = 2'b11;
+    end
+  endtask
+
+  // data_ready is always high, the data is valid in the cycle of the request
+  task bus_read(input [5:0] addr, output [31:0] value);
+    begin
+      @(negedge clk);
+      address = addr;
+      data_read_n = 2'b10;
+      @(posedge clk);
+      value = data_out;
+      @(negedge clk);
+      data_read_n = 2'b11;
+    end
+  endtask
+
+  reg [RECORD_BITS-1:0] record;
+  reg [7:0] config_byte, shift;
+  reg [31:0] A, B, expected_out1, expected_out2, out1, out2, status;
+  reg [15:0] expected_cycles;
+  integer index, cycles, errors, latency_errors, timeouts, core_cycles;
+  time start_time;
+
+  initial begin
+    if (!$value$plusargs("vectors=%s", vector_file)) vector_file = "vectors.hex";
+    if (!$value$plusargs("max_errors=%d", max_errors)) max_errors = 10;
+    verbose = $test$plusargs("verbose");
+    for (index = 0; index < MAX_VECTORS; index = index + 1) vectors[index] = 0;
+    $readmemh(vector_file, vectors);
+
+    rst_n = 1'b0;
+    address = 6'h0;
+    data_in = 32'h0;
+    data_write_n = 2'b11;
+    data_read_n = 2'b11;
+    repeat (10) @(posedge clk);
+    rst_n = 1'b1;
+
+    errors = 0;
+    latency_errors = 0;
+    timeouts = 0;
+    core_cycles = 0;
+    start_time = $time;
+    for (index = 0; index < MAX_VECTORS && vectors[index][152] === 1'b1; index = index + 1) begin
+      record = vectors[index];
+      {config_byte, shift, A, B, expected_out1, expected_out2, expected_cycles} = record;
+
+      bus_write(6'h3, {24'h0, shift}, 2'b00);
+      bus_write(6'h1, A, 2'b10);
+      bus_write(6'h2, B, 2'b10);
+      // bus_write returns on the falling edge after the config write was sampled: count the
+      // rising edges until the done pulse
+      bus_write(6'h0, {24'h0, config_byte}, 2'b00);
+      cycles = 0;
+      while (!user_interrupt && cycles < TIMEOUT) begin
+        @(posedge clk);
+        #1 cycles = cycles + 1;
+      end
+
+      bus_read(6'h4, out1);
+      bus_read(6'h5, out2);
+      bus_read(6'h6, status);
+      core_cycles = core_cycles + cycles - LATENCY_OFFSET;
+
+      if (verbose)
+        $display("%0d: config=%02h shift=%0d A=%h B=%h -> out1=%h out2=%h in %0d cycles", index, config_byte, shift,
+                 A, B, out1, out2, cycles - LATENCY_OFFSET);
+      if (cycles >= TIMEOUT) begin
+        timeouts = timeouts + 1;
+        errors = errors + 1;
+        if (errors <= max_errors)
+          $display("MISMATCH %0d: config=%02h shift=%0d A=%h B=%h: no done within %0d cycles", index, config_byte,
+                   shift, A, B, TIMEOUT);
+      end else if (out1 !== expected_out1 || out2 !== expected_out2 || status !== 32'h2) begin
+        errors = errors + 1;
+        if (errors <= max_errors)
+          $display("MISMATCH %0d: config=%02h shift=%0d A=%h B=%h: out1=%h out2=%h status=%0d, expected %h %h status 2",
+                   index, config_byte, shift, A, B, out1, out2, status, expected_out1, expected_out2);
+      end else if (cycles - LATENCY_OFFSET != expected_cycles) begin
+        latency_errors = latency_errors + 1;
+        if (errors + latency_errors <= max_errors)
+          $display("LATENCY %0d: config=%02h shift=%0d A=%h B=%h: %0d cycles, expected %0d", index, config_byte,
+                   shift, A, B, cycles - LATENCY_OFFSET, expected_cycles);
+      end
+    end
+
+    $display("tb_vectors: %0d operations from %0s, FIXED_WIDTH=%0d: %0d mismatches (%0d timeouts), %0d latency mismatches",
+             index, vector_file, FIXED_WIDTH, errors, timeouts, latency_errors);
+    $display("tb_vectors: %0d core cycles, %0d clock cycles in total (%0d per operation)", core_cycles,
+             ($time - start_time) / 100, index != 0 ? ($time - start_time) / 100 / index : 0);
+    if (index == 0) $fatal(1, "tb_vectors: no operations in %0s", vector_file);
+    if (errors != 0 || latency_errors != 0) $fatal(1, "tb_vectors: FAILED");
+    $display("tb_vectors: PASSED");
+    $finish;
+  end
+
+endmodule
@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# Throughput benchmark of the verification stack (not part of the default MODULE list).
+#
+# For every register access path it measures the wall-clock time and the simulated
+# clock cycles per register access and per full CORDIC operation in each mode,
+# appends the numbers to a JSON history file and fails when the throughput regressed
+# by more than CORDIC_BENCH_MAX_REGRESSION percent against the previous runs on the
+# same host and simulator.
+#
+#   make bench                                  # or: make MODULE=test_benchmark
+#   CORDIC_BENCH_MAX_REGRESSION=10 make bench
+#
+# Environment variables:
+#   CORDIC_BENCH_HISTORY         history file (default: bench_history.json next to this file)
+#   CORDIC_BENCH_MAX_REGRESSION  allowed slowdown in percent (default: 20)
+#   CORDIC_BENCH_WINDOW          number of previous runs the baseline is the median of (default: 5)
+#   CORDIC_BENCH_ACCESSES        register accesses per measurement (default: 50)
+#   CORDIC_BENCH_OPS             CORDIC operations per measurement (default: 20)
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.utils import get_sim_time
+
+from tqv import TinyQV
+from fixed_point import *
+from test_utils import (test_sin_cos, test_sinh_cosh, _run_vectoring_once,
+                        use_multiplication_mode_input_float, use_division_mode_float_input)
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+CLOCK_PERIOD_NS = 100
+
+HISTORY_FILE = Path(os.getenv("CORDIC_BENCH_HISTORY", Path(__file__).resolve().parent / "bench_history.json"))
+MAX_REGRESSION_PCT = float(os.getenv("CORDIC_BENCH_MAX_REGRESSION", 20))
+BASELINE_WINDOW = int(os.getenv("CORDIC_BENCH_WINDOW", 5))
+N_ACCESSES = int(os.getenv("CORDIC_BENCH_ACCESSES", 50))
+N_OPS = int(os.getenv("CORDIC_BENCH_OPS", 20))
+
+# Register access paths to benchmark: name -> factory(dut) returning an object with
+# the TinyQV interface. Only the SPI test harness exists today; a backdoor or burst
+# implementation gets benchmarked by adding it here.
+ACCESS_PATHS = {
+    "spi": lambda dut: TinyQV(dut, PERIPHERAL_NUM),
+}
+
+# register accesses, each one is called with the loop index
+REGISTER_ACCESSES = {
+    "write_byte_reg": lambda tqv, i: tqv.write_byte_reg(3, 11),
+    "write_word_reg": lambda tqv, i: tqv.write_word_reg(1, i & 0xffff),
+    "read_byte_reg":  lambda tqv, i: tqv.read_byte_reg(6),
+    "read_hword_reg": lambda tqv, i: tqv.read_hword_reg(4),
+    "read_word_reg":  lambda tqv, i: tqv.read_word_reg(0),
+}
+
+# full operations (write inputs, start, poll until done, read both outputs), per mode.
+# Inputs step through the valid domain, t is in (0, 1) so the divide never sees 0.
+def _t(i):
+    return (i + 0.5) / N_OPS
+
+CORDIC_OPERATIONS = {
+    "circular_rotating":    lambda dut, tqv, i: test_sin_cos(dut, tqv, angle_deg=-80 + 160 * _t(i)),
+    "hyperbolic_rotating":  lambda dut, tqv, i: test_sinh_cosh(dut, tqv, -1.0 + 2.0 * _t(i)),
+    "hyperbolic_vectoring": lambda dut, tqv, i: _run_vectoring_once(dut, tqv, 3.0 + _t(i), 1.0),
+    "linear_multiply":      lambda dut, tqv, i: use_multiplication_mode_input_float(dut, tqv, 1.5, -2.0 + 4.0 * _t(i), 11),
+    "linear_divide":        lambda dut, tqv, i: use_division_mode_float_input(dut, tqv, 2.0, -1.5 + 3.0 * _t(i), 11),
+}
+
+
+async def measure(n, op):
+    """ Run op(i) n times, return wall-clock seconds and simulated clock cycles per call """
+    wall_start = time.perf_counter()
+    sim_start = get_sim_time(units="ns")
+    for i in range(n):
+        await op(i)
+    wall = time.perf_counter() - wall_start
+    sim = get_sim_time(units="ns") - sim_start
+    return {
+        "wall_s": wall / n,
+        "cycles": sim / CLOCK_PERIOD_NS / n,
+        "ops_per_s": n / wall if wall > 0 else float("inf"),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not path.exists():
+        return []
+    return json.loads(path.read_text())
+
+
+def find_regressions(history, entry, max_regression_pct, window):
+    """ Compare every metric's throughput against the median of the last `window` comparable runs.
+
+    Runs are only comparable when they come from the same host and simulator. Returns a list of
+    (metric, baseline ops/s, current ops/s, slowdown in %) for the metrics that got slower than allowed. """
+    previous = [h for h in history if h["host"] == entry["host"] and h["sim"] == entry["sim"]][-window:]
+    regressions = []
+    for name, result in entry["results"].items():
+        baseline_values = [h["results"][name]["ops_per_s"] for h in previous if name in h["results"]]
+        if not baseline_values:
+            continue
+        baseline = statistics.median(baseline_values)
+        slowdown = 100.0 * (1.0 - result["ops_per_s"] / baseline)
+        if slowdown > max_regression_pct:
+            regressions.append((name, baseline, result["ops_per_s"], slowdown))
+    return regressions
+
+
+@cocotb.test()
+async def test_benchmark_throughput(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units="ns")
+    cocotb.start_soon(clock.start())
+
+    results = {}
+    for path_name, make_tqv in ACCESS_PATHS.items():
+        tqv = make_tqv(dut)
+        await tqv.reset()
+        assert await tqv.read_word_reg(0) == 0xbadcaffe, "reg0 should return magic 0xbadcaffe"
+
+        for name, access in REGISTER_ACCESSES.items():
+            results[f"{path_name}/{name}"] = await measure(N_ACCESSES, lambda i: access(tqv, i))
+
+        for name, op in CORDIC_OPERATIONS.items():
+            results[f"{path_name}/{name}"] = await measure(N_OPS, lambda i: op(dut, tqv, i))
+
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "sim": f"{cocotb.SIM_NAME} {cocotb.SIM_VERSION}",
+        "results": results,
+    }
+
+    dut._log.info("\n\n---- Benchmark ----")
+    for name, result in results.items():
+        dut._log.info(f"{name:<36} {result['wall_s'] * 1e3:9.3f} ms/op  {result['ops_per_s']:9.1f} op/s  {result['cycles']:9.1f} cycles/op")
+
+    history = load_history(HISTORY_FILE)
+    regressions = find_regressions(history, entry, MAX_REGRESSION_PCT, BASELINE_WINDOW)
+
+    history.append(entry)
+    HISTORY_FILE.write_text(json.dumps(history, indent=2) + "\n")
+    dut._log.info(f"appended results to {HISTORY_FILE} ({len(history)} runs)")
+
+    for name, baseline, current, slowdown in regressions:
+        dut._log.error(f"{name}: {current:.1f} op/s vs baseline {baseline:.1f} op/s ({slowdown:.1f}% slower)")
+    assert not regressions, f"throughput regressed by more than {MAX_REGRESSION_PCT}% in: {', '.join(r[0] for r in regressions)}"
@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# Operation chaining (config bits 6 and 7, cordic_chain.py): compositions of two and three
+# operations run with the outputs forwarded inside the peripheral, and once more the way
+# the CPU has to without chaining (reading the outputs and writing them back). Both have to
+# give the same bits, the same as the register-level model, close to the float reference,
+# and the chained one with one read and one write less per forwarded operand.
+#
+#   tan(t)        CIRCULAR rotate t -> (cos, sin), divide sin / cos
+#   s * |(x, y)|  CIRCULAR vectoring -> K_C * r, multiply by s / K_C
+#   g * tanh(x)   HYPERBOLIC rotate x -> (cosh, sinh), divide sinh / cosh, multiply by g
+
+import math
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.utils import get_sim_time
+import numpy as np
+
+from tqv import TinyQV
+from test_utils import all_instances, map_concurrent, pack_config, Mode, FIXED_WIDTH
+from fixed_point import float_to_fixed, fixed_to_float
+from cordic_model import CordicModel, TqvpCordicModel, REG_CONFIG, REG_OUT1, REG_OUT2
+from cordic_chain import Step, run_chain, PREV_OUT1, PREV_OUT2
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+WIDTH = FIXED_WIDTH
+Q = WIDTH - 2          # Q2.(W-2): angles, cos / sin, cosh / sinh, tan, tanh
+XY_INT = 5             # vectoring inputs and the magnitude in Q5.(W-5)
+
+
+def tan_chain(t):
+    return [Step(Mode.CIRCULAR, 1, A=float_to_fixed(t, WIDTH, 2)),
+            Step(Mode.LINEAR, 0, A=PREV_OUT1, B=PREV_OUT2, shift=Q)]
+
+
+def scaled_magnitude_chain(x, y, s):
+    gain = CordicModel(width=WIDTH).circular_gain()
+    return [Step(Mode.CIRCULAR, 0, A=float_to_fixed(x, WIDTH, XY_INT), B=float_to_fixed(y, WIDTH, XY_INT)),
+            Step(Mode.LINEAR, 1, A=PREV_OUT1, B=float_to_fixed(s / gain, WIDTH, XY_INT), shift=WIDTH - XY_INT)]
+
+
+def scaled_tanh_chain(x, g):
+    return [Step(Mode.HYPERBOLIC, 1, A=float_to_fixed(x, WIDTH, 2)),
+            Step(Mode.LINEAR, 0, A=PREV_OUT1, B=PREV_OUT2, shift=Q),
+            Step(Mode.LINEAR, 1, A=PREV_OUT1, B=float_to_fixed(g, WIDTH, 2), shift=Q)]
+
+
+def chains():
+    """ (name, steps, exact result, integer bits of the result) """
+    cases = [(f"tan({t:+.3f})", tan_chain(t), math.tan(t), 2) for t in np.linspace(-1.04, 1.04, 9)]
+    for x, y, s in ((3.0, 4.0, 0.5), (2.5, 1.0, 1.25), (0.75, -6.0, 0.4), (5.0, -5.0, 0.2)):
+        cases.append((f"{s}*|({x}, {y})|", scaled_magnitude_chain(x, y, s), s * math.hypot(x, y), XY_INT))
+    for x, g in ((-1.0, 1.5), (-0.3, -0.75), (0.5, 1.0), (1.05, -1.25)):
+        cases.append((f"{g}*tanh({x})", scaled_tanh_chain(x, g), g * math.tanh(x), 2))
+    return cases
+
+
+@cocotb.test()
+async def test_chain(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : chained operations")
+
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+    assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
+
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
+    model = TqvpCordicModel(width=WIDTH)
+
+    async def run(tqv, case):
+        name, steps, exact, integer_bits = case
+        runs = {}
+        for forward in (True, False):
+            stats = {}
+            t_ns = get_sim_time("ns")
+            out = await run_chain(tqv, steps, WIDTH, forward=forward, stats=stats)
+            runs[forward] = (out, stats["writes"] + stats["reads"], get_sim_time("ns") - t_ns)
+        return runs
+
+    cases = chains()
+    results = await map_concurrent(run, cases, tqvs)
+
+    saved_accesses, saved_ns = [], []
+    for (name, steps, exact, integer_bits), runs in zip(cases, results):
+        (chained, accesses, t_ns), (unchained, accesses_cpu, t_cpu_ns) = runs[True], runs[False]
+        expected = await run_chain(model, steps, WIDTH)
+        assert chained == expected, f"{name}: chained {chained}, model {expected}"
+        assert chained == unchained, f"{name}: chained {chained}, over the CPU {unchained}"
+
+        got = fixed_to_float(chained[0], WIDTH, integer_bits)
+        dut._log.info(f"{name:<22} = {got:+.5f} (exact {exact:+.5f}), {accesses} bus accesses "
+                      f"instead of {accesses_cpu}, {t_ns / 1e3:.1f} us instead of {t_cpu_ns / 1e3:.1f} us")
+        assert abs(got - exact) <= 1e-2 * max(1.0, abs(exact)), f"{name}: got {got}, exact {exact}"
+
+        forwarded = sum(len(step.forwards) for step in steps)
+        assert accesses_cpu - accesses == 2 * forwarded, \
+            f"{name}: {accesses} accesses chained, {accesses_cpu} over the CPU, expected {2 * forwarded} less"
+        saved_accesses.append(accesses_cpu - accesses)
+        saved_ns.append(t_cpu_ns - t_ns)
+
+    dut._log.info(f"chaining saved {np.mean(saved_accesses):.1f} bus accesses, "
+                  f"{np.mean(saved_ns) / 1e3:.1f} us per chain on average")
+
+
+@cocotb.test()
+async def test_chain_outputs_hold(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : the outputs hold until the next start")
+
+    read = tqv.read_hword_reg if WIDTH <= 16 else tqv.read_word_reg
+    model = TqvpCordicModel(width=WIDTH)
+    first = Step(Mode.CIRCULAR, 0, A=float_to_fixed(1.5, WIDTH, XY_INT), B=float_to_fixed(-2.0, WIDTH, XY_INT))
+    for backend in (tqv, model):
+        await run_chain(backend, [first], WIDTH)
+    outputs = (await read(REG_OUT1), await read(REG_OUT2))
+
+    # config writes without start, in every other mode: the outputs of the vectoring stay
+    for mode, is_rotating in ((Mode.LINEAR, 1), (Mode.HYPERBOLIC, 0), (Mode.CIRCULAR, 1)):
+        await tqv.write_byte_reg(REG_CONFIG, pack_config(mode, is_rotating, 0))
+        got = (await read(REG_OUT1), await read(REG_OUT2))
+        assert got == outputs, f"{mode.name} is_rotating={is_rotating} written without start: outputs {got}, were {outputs}"
+
+    # and a chained start afterwards still takes them: K_C * r times 1.0
+    second = Step(Mode.LINEAR, 1, A=PREV_OUT1, B=float_to_fixed(1.0, WIDTH, XY_INT), shift=WIDTH - XY_INT)
+    got = await run_chain(tqv, [second], WIDTH)
+    expected = await run_chain(model, [second], WIDTH)
+    assert got == expected, f"chained start after config writes: got {got}, model {expected}"
+
+    for A, B in ((PREV_OUT2, None), (None, PREV_OUT1)):
+        try:
+            Step(Mode.LINEAR, 1, A=A, B=B)
+        except ValueError:
+            continue
+        raise AssertionError(f"Step(A={A}, B={B}) has to be refused, forwarding only goes out1 -> A and out2 -> B")
@@ -12,12 +12,12 @@ import numpy as np
 from pathlib import Path
 
 import os
-import matplotlib
-import matplotlib.pyplot as plt
 
-from test_utils import test_sin_cos
-
-matplotlib.use("Agg")  # headless backend
+from test_utils import test_sin_cos, run_cordic_timed, shard_points, all_instances, StreamingMetrics, FIXED_WIDTH
+from result_cache import ResultCache
+from trace_recorder import TraceRecorder
+from adaptive_sweep import run_sweep, sweep_weights
+from cordic_model import CordicModel
 
 
 # BITS for mode
@@ -65,7 +65,7 @@ async def test_trigonometric_sweep_and_vis(dut):
     assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
  
     # Fixed-point format for circular mode (Q2.14)
-    WIDTH = 16
+    WIDTH = FIXED_WIDTH
     INT_BITS = 2 
     FRAC_BITS = WIDTH - INT_BITS
     LSB = 2.0 ** (-FRAC_BITS)
@@ -75,141 +75,84 @@ async def test_trigonometric_sweep_and_vis(dut):
     atol = 1e-4
     
     # sweep angles in 1 degrees steps, inclusive
-    degs = np.arange(-90., 91.0, 1.0)
+    # (run_parallel.py may split it into shards, each one running a slice)
+    degs = shard_points(np.arange(-90., 91.0, 1.0))
+
+    # raw results of earlier runs against the same RTL are replayed from the cache
+    cache = ResultCache.open()
+    # every operation goes to a binary trace (artifacts/traces) instead of the log
+    trace = TraceRecorder.open("circular_rotating")
+
+    # one TinyQV per harness instance in tb.v (make INSTANCES=<n>), the sweep is spread over all of them
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
+
+    results = {}
+
+    async def measure(tqv, ang):
+        # Runs the op + per-angle checks (incl. invariant)
+        cos_raw, sin_raw = await test_sin_cos(dut, tqv, angle_deg=ang, cache=cache, trace=trace)
+
+        # Read back produced values as float, to store for plots/metrics
+        cos_pred = fixed_to_float(cos_raw, WIDTH, INT_BITS)
+        sin_pred = fixed_to_float(sin_raw, WIDTH, INT_BITS)
+        results[ang] = (cos_pred, sin_pred)
+
+        # residual in LSBs, steers the refinement of an adaptive sweep
+        rad = math.radians(ang)
+        return max(abs(cos_pred - math.cos(rad)), abs(sin_pred - math.sin(rad))) / LSB
+
+    # the uniform grid, or with CORDIC_ADAPTIVE=1 a coarse grid refined where the error is high
+    degs = await run_sweep(measure, tqvs, degs, residual_threshold=4, slope_threshold=2, log=dut._log.info)
 
     sin_true = np.sin(np.deg2rad(degs))
     cos_true = np.cos(np.deg2rad(degs))
-    
-    sins = []
-    coss = []
-
-    for ang in degs:
-            # Runs the op + per-angle checks (incl. invariant)
-            cos_raw, sin_raw = await test_sin_cos(dut, tqv, angle_deg=ang)
-        
-            
-            # Read back produced values as float, to store for plots/metrics
-            cos_pred = fixed_to_float(cos_raw, WIDTH, INT_BITS)
-            sin_pred = fixed_to_float(sin_raw, WIDTH, INT_BITS)
-            
-            coss.append(cos_pred)
-            sins.append(sin_pred)
-             
+    coss = [results[ang][0] for ang in degs]
+    sins = [results[ang][1] for ang in degs]
+
+    if cache is not None:
+        cache.save()
+        dut._log.info(cache.summary())
+    if trace is not None:
+        dut._log.info(f"traced {trace.close()} operations to {trace.directory}")
+
     sins = np.array(sins)
     coss = np.array(coss)
 
-    # Metrics
-    sin_err = sins - sin_true
-    cos_err = coss - cos_true
-    mae_sin = float(np.mean(np.abs(sin_err)))
-    mae_cos = float(np.mean(np.abs(cos_err)))
-    rmse_sin = float(np.sqrt(np.mean(sin_err**2)))
-    rmse_cos = float(np.sqrt(np.mean(cos_err**2)))
-    maxerr_sin = float(np.max(np.abs(sin_err)))
-    maxerr_cos = float(np.max(np.abs(cos_err)))
-
+    # Metrics, weighted like sweep_mean for an adaptive sweep
+    metrics = StreamingMetrics(LSB, ["sin", "cos"], invariants=["cos²+sin²-1"])
+    metrics.update({"sin": sins - sin_true, "cos": coss - cos_true}, outputs=(coss, sins), points=degs,
+                   weights=sweep_weights(degs))
+    mae_sin, mae_cos = metrics.mae("sin"), metrics.mae("cos")
     # Unit-circle residual (should be ~0)
-    unit_resid = coss**2 + sins**2 - 1.0
-    rms_unit = float(np.sqrt(np.mean(unit_resid**2)))
-    max_unit = float(np.max(np.abs(unit_resid)))
+    max_unit = metrics.max("cos²+sin²-1")
 
     dut._log.info("\n\n---- Summary of the sweep ----")
     dut._log.info(f"LSB = {LSB:.6g}")
-    dut._log.info(f"MAE(sin)={mae_sin:.6g} : in LSBs {mae_sin/LSB:.3f}")
-    dut._log.info(f"MAE(cos)={mae_cos:.6g} : in LSBs {mae_cos/LSB:.3f}")
-    dut._log.info(f"RMSE(sin)={rmse_sin:.6g}) : in LSBs {rmse_sin/LSB:.3f}")
-    dut._log.info(f"RMSE(cos)={rmse_cos:.6g} : in LSBs {rmse_cos/LSB:.3f}")
-    dut._log.info(f"MAXERR(sin)={maxerr_sin:.6g} : in LSBs {maxerr_sin/LSB:.3f}")
-    dut._log.info(f"MAXERR(cos)={maxerr_cos:.6g} : in LSBs {maxerr_cos/LSB:.3f}")
-    dut._log.info(f"RMS(unit_resid)={rms_unit:.6g} : in LSBs {rms_unit/LSB:.3f}")
-    dut._log.info(f"MAX(unit_resid)={max_unit:.6g} : in LSBs {max_unit/LSB:.3f}")
-
-    # output directory for saving the artificats 
+    metrics.log(dut._log.info)
+
+    # core latency of a rotation, measured on the DUT from the done pulse on a few angles;
+    # with CIRC_LUT=<n> the (cos, sin) table skips the first iterations
+    latencies = []
+    for ang in (-90.0, -30.0, 0.0, 45.0, 90.0):
+        z = float_to_fixed(math.radians(ang), WIDTH, INT_BITS)
+        _, _, measured = await run_cordic_timed(dut, tqv, CIRCULAR_MODE, 1, z, width=WIDTH)
+        latencies.append(measured)
+    cycles = max(latencies)
+    # what cordic_model.py expects, logged next to it
+    model = CordicModel(width=WIDTH)
+    expected_cycles = model.cycles(CIRCULAR_MODE, 1)
+    baseline_cycles = CordicModel(width=WIDTH, circ_lut_bits=0).cycles(CIRCULAR_MODE, 1)
+    dut._log.info(f"core latency {cycles} cycles measured ({latencies}, CIRC_LUT={model.circ_lut_bits})")
+    dut._log.info(f"expected from cordic_model.py: {expected_cycles} cycles, {baseline_cycles} without the table")
+
+    # raw results only, plots and CSVs are rendered offline by report.py
     OUTDIR = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", "."))) / "artifacts/cordic"
     OUTDIR.mkdir(parents=True, exist_ok=True)
-
-    # plot sine
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 2, 1)
-    plt.title(f"Sine Sweep: MAE={mae_sin:.5f}, RMSE={rmse_sin:.5f}")
-    plt.plot(degs, sin_true, label="True sin")
-    plt.plot(degs, sins, "--", label="CORDIC sin")
-    plt.xlabel("Angle (deg)")
-    plt.ylabel("sin(x)")
-    plt.xticks(range(-90, 91, 15))
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-
-    # plot residual
-    plt.subplot(1, 2, 2)
-    plt.title("Residual: sin_pred - sin_true")
-    plt.plot(degs, sin_err, label="Residual")
-    plt.xlabel("Angle (deg)")
-    plt.ylabel("Error")
-    plt.xticks(range(-90, 91, 15))
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.savefig(OUTDIR / "sine.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    # plot cosine
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 2, 1)
-    plt.title(f"Cosine Sweep: MAE={mae_cos:.5f}, RMSE={rmse_cos:.5f}")
-    plt.plot(degs, cos_true, label="True cos")
-    plt.plot(degs, coss, "--", label="CORDIC cos")
-    plt.xlabel("Angle (deg)")
-    plt.ylabel("cos(x)")
-    plt.xticks(range(-90, 91, 15))
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # plot residual
-    plt.subplot(1, 2, 2)
-    plt.title("Residual: cos_pred - cos_true")
-    plt.plot(degs, cos_err, label="Residual")
-    plt.xlabel("Angle (deg)")
-    plt.ylabel("Error")
-    plt.xticks(range(-90, 91, 15))
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.savefig(OUTDIR / "cosine.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    # Plot unit-circle residual
-    plt.figure(figsize=(7, 4))
-    plt.title(f"Unit-circle residual (cos²+sin²-1): RMS={rms_unit:.5e}, MAX={max_unit:.5e}")
-    plt.plot(degs, unit_resid, label="cos²+sin²-1")
-    plt.xlabel("Angle (deg)")
-    plt.ylabel("Residual")
-    plt.xticks(range(-90, 91, 15))
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.savefig(OUTDIR / "unit_circle_residual.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    # CSVs
-    np.savetxt(
-        OUTDIR / "sine_vs_true.csv",
-        np.c_[degs, sin_true, sins, sin_err],
-        delimiter=",",
-        header="deg,true_sin,cordic_sin,residual",
-        comments=""
-    )
-    np.savetxt(
-        OUTDIR / "cosine_vs_true.csv",
-        np.c_[degs, cos_true, coss, cos_err],
-        delimiter=",",
-        header="deg,true_cos,cordic_cos,residual",
-        comments=""
-    )
-    np.savetxt(
-        OUTDIR / "unit_circle_residual.csv",
-        np.c_[degs, unit_resid],
-        delimiter=",",
-        header="deg,cos2_plus_sin2_minus_1",
-        comments=""
-    )
+    # a run with the (cos, sin) table is kept next to the baseline, report.py compares the two
+    name = "circular_rotating_lut" if model.circ_lut_bits else "circular_rotating"
+    np.savez(OUTDIR / f"{name}.npz", deg=degs, sin=sins, cos=coss, cycles=cycles,
+             expected_cycles=expected_cycles, lut_bits=model.circ_lut_bits,
+             **metrics.state())
     
     # fairly big mae tolerances
     assert mae_sin < 0.01, f"Mean absolute error (sin) should be < 0.01, is {mae_sin:.6g}"
@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# Sweep of cartesian_to_polar (circular vectoring, test_utils.py) over the full plane:
+# every 5 degrees, at radii from 1e-3 to 1e3, with the per-point scaling, and a coarser
+# pass with one fixed Q5.(WIDTH-5) format for the radii that fit it. Logs the throughput
+# of the batch and the error of r and theta, report.py renders the raw results.
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.utils import get_sim_time
+
+from tqv import TinyQV
+from fixed_point import *
+import math
+import time
+import numpy as np
+from pathlib import Path
+
+import os
+
+from test_utils import cartesian_to_polar, shard_points, all_instances, StreamingMetrics, FIXED_WIDTH
+from result_cache import ResultCache
+from trace_recorder import TraceRecorder
+from cordic_model import CordicModel, CIRCULAR
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+RADII = (1e-3, 0.5, 7.0, 1e3)
+# the fixed-format pass: every 3rd angle, the radii that fit Q5.(WIDTH-5)
+FIXED_RADII = (0.5, 7.0)
+FIXED_STEP = 3
+
+
+def wrap_angle(a):
+    """ Angle difference folded to [-pi, pi) """
+    return (a + math.pi) % (2 * math.pi) - math.pi
+
+
+@cocotb.test()
+async def test_polar_sweep_and_vis(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Test project behavior: cartesian to polar over the full plane (circular vectoring)")
+
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+    assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
+
+    WIDTH = FIXED_WIDTH
+    ANGLE_LSB = 2.0 ** -(WIDTH - 2)
+    FIXED_SCALE = 2.0 ** (WIDTH - 5)
+
+    # (run_parallel.py may split it into shards, each one running a slice of the angles)
+    degs = shard_points(np.arange(-180., 180., 5.0))
+
+    cache = ResultCache.open()
+    trace = TraceRecorder.open("circular_vectoring")
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
+
+    deg_grid, radius_grid = (g.ravel() for g in np.meshgrid(degs, RADII, indexing="ij"))
+    fixed_deg, fixed_radius = (g.ravel() for g in np.meshgrid(degs[::FIXED_STEP], FIXED_RADII, indexing="ij"))
+    deg_all = np.concatenate([deg_grid, fixed_deg])
+    radius_all = np.concatenate([radius_grid, fixed_radius])
+    fixed = np.r_[np.zeros(len(deg_grid), dtype=np.int8), np.ones(len(fixed_deg), dtype=np.int8)]
+    xs = radius_all * np.cos(np.deg2rad(deg_all))
+    ys = radius_all * np.sin(np.deg2rad(deg_all))
+
+    # the batch with the per-point scaling, timed for the throughput
+    n = len(deg_grid)
+    sim_start, wall_start = get_sim_time(units="ns"), time.perf_counter()
+    r_auto, theta_auto = await cartesian_to_polar(dut, tqvs, xs[:n], ys[:n], width=WIDTH, cache=cache, trace=trace)
+    sim_ns, wall_s = get_sim_time(units="ns") - sim_start, time.perf_counter() - wall_start
+
+    r_fixed, theta_fixed = await cartesian_to_polar(dut, tqvs, xs[n:], ys[n:], width=WIDTH, scale=FIXED_SCALE,
+                                                    cache=cache, trace=trace)
+    r = np.concatenate([r_auto, r_fixed])
+    theta = np.concatenate([theta_auto, theta_fixed])
+
+    if cache is not None:
+        cache.save()
+        dut._log.info(cache.summary())
+    if trace is not None:
+        dut._log.info(f"traced {trace.close()} operations to {trace.directory}")
+
+    theta_true = np.arctan2(ys, xs)
+    theta_err = np.array([wrap_angle(a) for a in theta - theta_true])
+    r_rel_err = r / radius_all - 1.0
+
+    cycles = CordicModel(width=WIDTH).cycles(CIRCULAR, 0)
+    sim_us_per_op = sim_ns / 1e3 / max(n, 1)
+    wall_ops_per_s = n / wall_s if wall_s > 0 else float("inf")
+
+    dut._log.info("\n\n---- Summary of the sweep ----")
+    dut._log.info(f"{n} points, {len(tqvs)} instance(s): {sim_us_per_op:.2f} us simulated per point "
+                  f"(core latency {cycles} cycles), {wall_ops_per_s:.1f} points/s wall clock")
+    # per-point scale and fixed Q5.(WIDTH-5) format as separate channels; r relative, in LSBs of WIDTH - 5 bits
+    lsb = {"theta": ANGLE_LSB, "r rel": 2.0 ** -(WIDTH - 5)}
+    metrics = StreamingMetrics({**lsb, **{f"{name} (fixed)": v for name, v in lsb.items()}},
+                               ["theta", "r rel", "theta (fixed)", "r rel (fixed)"])
+    for tag, sel in (("", fixed == 0), (" (fixed)", fixed == 1)):
+        metrics.update({f"theta{tag}": theta_err[sel], f"r rel{tag}": r_rel_err[sel]}, points=deg_all[sel])
+    metrics.log(dut._log.info)
+
+    # raw results only, plots and CSVs are rendered offline by report.py
+    OUTDIR = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", "."))) / "artifacts/cordic"
+    OUTDIR.mkdir(parents=True, exist_ok=True)
+    np.savez(OUTDIR / "circular_vectoring.npz", deg=deg_all, radius=radius_all, fixed=fixed, r=r, theta=theta,
+             cycles=cycles, sim_us_per_op=sim_us_per_op, wall_ops_per_s=wall_ops_per_s, **metrics.state())
+
+    # the per-point scaling keeps WIDTH - 6 bits of the angle and WIDTH - 5 bits of r everywhere in the plane
+    auto = fixed == 0
+    assert np.max(np.abs(theta_err[auto])) < 2.0 ** -(WIDTH - 6), \
+        f"theta error {np.max(np.abs(theta_err[auto])):.6g} rad above 2^-{WIDTH - 6}"
+    assert np.max(np.abs(r_rel_err[auto])) < 2.0 ** -(WIDTH - 5), \
+        f"relative r error {np.max(np.abs(r_rel_err[auto])):.6g} above 2^-{WIDTH - 5}"
+    # the fixed format loses the low bits of small points, but stays usable
+    assert np.max(np.abs(theta_err[~auto])) < 0.01, f"theta error (fixed format) {np.max(np.abs(theta_err[~auto])):.6g} rad"
+    assert np.max(np.abs(r_rel_err[~auto])) < 0.01, f"relative r error (fixed format) {np.max(np.abs(r_rel_err[~auto])):.6g}"
@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# CordicDevice (cordic_device.py) on the SPI harness against the same calls on the
+# register-level model and on TinyQVBus (memory-mapped accesses, here served by a second
+# model): every method has to give bit-identical results on all three backends, match
+# NumPy over inputs far outside the range of the core, and spend fewer register accesses
+# than the write-everything sequence of run_cordic. The bus accesses have to hit
+# base + register with the sizes CordicDevice documents.
+
+import cocotb
+from cocotb.clock import Clock
+
+from tqv import TinyQV
+import math
+import numpy as np
+
+from test_utils import all_instances, FIXED_WIDTH
+from cordic_device import CordicDevice, TinyQVBus
+from cordic_model import TqvpCordicModel, REG_CONFIG, REG_A, REG_B, REG_SHIFT, REG_OUT1, REG_OUT2, REG_STATUS
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+# register accesses of one run_cordic operation: A, B, shift, config, one status poll, out1, out2
+NAIVE_ACCESSES = 7
+
+# byte address of the peripheral's registers on the bus backend
+BUS_BASE = 0x8000300
+
+
+@cocotb.test()
+async def test_cordic_device(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : CordicDevice on the harness and on the model")
+
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+    assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
+
+    WIDTH = FIXED_WIDTH
+    # at least WIDTH - 8 correct bits, like test_trigonometric_precision
+    tol = 2.0 ** -(WIDTH - 8)
+
+    hw = CordicDevice(await all_instances(dut, tqv, PERIPHERAL_NUM), width=WIDTH)
+    sw = CordicDevice(TqvpCordicModel(width=WIDTH), width=WIDTH)
+
+    # the bus backend, its read / write callables log every access and forward it to a model
+    bus_model = TqvpCordicModel(width=WIDTH)
+    bus_accesses = []
+
+    def bus_read(addr, nbytes):
+        bus_accesses.append(("r", addr - BUS_BASE, nbytes))
+        return bus_model.read(addr - BUS_BASE, nbytes)
+
+    def bus_write(addr, value, nbytes):
+        bus_accesses.append(("w", addr - BUS_BASE, nbytes))
+        bus_model.write(addr - BUS_BASE, value, nbytes)
+
+    bus = CordicDevice(TinyQVBus(bus_read, bus_write, BUS_BASE), width=WIDTH)
+
+    rng = np.random.default_rng(2025)
+    angles = np.r_[rng.uniform(-40, 40, 24), 0.0, math.pi / 2, -math.pi, 3 * math.pi / 2, 0.0, np.nan]
+    hyp = np.r_[rng.uniform(-6, 6, 16), 0.0, 0.3466, -0.3466, np.inf]
+    a = np.r_[rng.uniform(-1, 1, 16) * 10.0 ** rng.integers(-4, 5, 16), 0.0, 3.0, 3.0, 1e300]
+    b = np.r_[rng.uniform(-1, 1, 16) * 10.0 ** rng.integers(-4, 5, 16), 5.0, 0.0, 0.0, -2.0]
+    positive = np.r_[np.abs(a[:16]), 1.0, 0.25, 1e-12, 0.0, -1.0]
+    ys = np.r_[rng.normal(size=16) * 100, 0.0, 1.0, -1.0, 0.0]
+    xs = np.r_[rng.normal(size=16), 1.0, -1.0, -1.0, 0.0]
+
+    # name, call, NumPy reference, error scale (1: absolute, |reference|: relative)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        cases = [
+            ("sin_cos", lambda dev: dev.sin_cos(angles), (np.cos(angles), np.sin(angles)), 1.0),
+            ("sinh_cosh", lambda dev: dev.sinh_cosh(hyp), (np.cosh(hyp), np.sinh(hyp)), np.maximum(1.0, np.cosh(hyp))),
+            ("mul", lambda dev: dev.mul(a, b), a * b, np.abs(a * b)),
+            ("div", lambda dev: dev.div(a, b), np.divide(a, b, where=b != 0, out=np.full_like(a, np.inf)), np.abs(a / np.where(b != 0, b, 1))),
+            ("sqrt", lambda dev: dev.sqrt(positive), np.sqrt(positive), np.sqrt(np.abs(positive))),
+            ("ln", lambda dev: dev.ln(positive), np.log(positive), 1.0),
+            ("atan2", lambda dev: dev.atan2(ys, xs), np.arctan2(ys, xs), 1.0),
+        ]
+
+        for name, call, reference, scale in cases:
+            got = await call(hw)
+            model = await call(sw)
+            on_bus = await call(bus)
+            for backend, other in (("model", model), ("bus", on_bus)):
+                for out, out_other in zip(np.atleast_2d(got), np.atleast_2d(other)):
+                    assert np.array_equal(out, out_other, equal_nan=True), \
+                        f"{name}: harness and {backend} differ at {np.flatnonzero(~np.isclose(out, out_other, rtol=0, atol=0, equal_nan=True))}"
+
+            for out, ref in zip(np.atleast_2d(got), np.atleast_2d(reference)):
+                finite = np.isfinite(ref) & np.isfinite(scale)
+                err = np.abs(out[finite] - ref[finite]) / np.broadcast_to(scale, ref.shape)[finite].clip(min=1e-300)
+                assert np.max(err) <= tol, f"{name}: error {np.max(err):.6g} above 2^-{WIDTH - 8} at {np.argmax(err)}"
+                assert np.array_equal(out[~finite], ref[~finite], equal_nan=True), f"{name}: special values differ"
+            dut._log.info(f"{name:<10} ok")
+
+    ops, accesses = hw.stats["operations"], hw.stats["writes"] + hw.stats["reads"]
+    dut._log.info(f"[summary] {ops} operations, {accesses} register accesses "
+                  f"({accesses / ops:.2f} per operation, run_cordic needs {NAIVE_ACCESSES})")
+    assert hw.stats["operations"] == sw.stats["operations"], "harness and model ran different operations"
+
+    # register writes are 32 bits wide, status reads one byte, output reads 16 bits up to WIDTH 16 and 32 above
+    out_size = 2 if WIDTH <= 16 else 4
+    sizes = {(kind, reg, nbytes) for kind, reg, nbytes in bus_accesses}
+    expected = {("w", reg, 4) for reg in (REG_CONFIG, REG_A, REG_B, REG_SHIFT)} | \
+               {("r", REG_STATUS, 1), ("r", REG_OUT1, out_size), ("r", REG_OUT2, out_size)}
+    assert sizes <= expected, f"unexpected bus accesses (kind, register, bytes): {sorted(sizes - expected)}"
+    assert len(bus_accesses) == bus.stats["writes"] + bus.stats["reads"], "bus accesses and stats differ"
+    assert bus.stats == sw.stats, f"bus backend ran other accesses than the model: {bus.stats} vs {sw.stats}"
+    assert accesses < NAIVE_ACCESSES * ops, "batching saved no register accesses"
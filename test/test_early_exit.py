@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# LINEAR early exit (config bit 5, CORDIC.v early_exit): the multiplies and divides of the
+# workloads below run with and without it, timed on the done pulse. Every result and every
+# latency has to match cordic_model.py, and the early results have to stay as accurate as the
+# linear tests require. The latencies go to artifacts/cordic/early_exit.npz, report.py renders
+# their histogram per workload. Circular and hyperbolic operations have to ignore the bit.
+
+import os
+from pathlib import Path
+
+import cocotb
+from cocotb.clock import Clock
+import numpy as np
+
+from tqv import TinyQV
+from test_utils import run_cordic_timed, map_concurrent, all_instances, shard_points, Mode, EARLY_EXIT_BIT, FIXED_WIDTH
+from cordic_model import CordicModel
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+EARLY_EXIT = 1 << EARLY_EXIT_BIT
+OPS_PER_WORKLOAD = 48
+# the workloads with short operands have to save at least a quarter of the iterations
+FAST_WORKLOADS = ("fir_taps", "gains", "exact_div")
+
+
+def quantize(v, bits):
+    return np.round(v * 2.0 ** bits) / 2.0 ** bits
+
+
+def workloads(rng, n):
+    """ name -> (is_rotating, a, b) in floats: b * a for a multiply (B drives the residual z),
+    b / a for a divide """
+    divisors = quantize(rng.uniform(0.5, 4.0, n), 4)
+    return {
+        # samples times 8-bit filter coefficients
+        "fir_taps":   (1, rng.uniform(-4.0, 4.0, n), quantize(rng.uniform(-1.0, 1.0, n), 7)),
+        # gains of one or two bits, up to 12.0 so that the prescale k_lat is used
+        "gains":      (1, rng.uniform(-1.25, 1.25, n),
+                       rng.choice([0.125, 0.5, 0.75, 1.0, -1.0, 1.5, 2.0, -3.0, 6.0, -12.0], n)),
+        "random_mul": (1, rng.uniform(-3.9, 3.9, n), rng.uniform(-3.9, 3.9, n)),
+        # quotients with four fraction bits
+        "exact_div":  (0, divisors, divisors * quantize(rng.uniform(-3.5, 3.5, n), 4)),
+        "random_div": (0, rng.uniform(0.5, 4.0, n), rng.uniform(-4.0, 4.0, n)),
+    }
+
+
+@cocotb.test()
+async def test_early_exit(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : LINEAR early exit")
+
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+    assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
+
+    WIDTH = FIXED_WIDTH
+    SHIFT = WIDTH - 5          # Q5.11 for 16 bits
+    ONE = 1 << SHIFT
+    model = CordicModel(width=WIDTH)
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
+
+    # one row per operation: (workload, is_rotating, A, B)
+    loads = workloads(np.random.default_rng(11), OPS_PER_WORKLOAD)
+    names = list(loads)
+    ops = [(w, rot, int(A), int(B)) for w, (rot, a, b) in enumerate(loads.values())
+           for A, B in zip(np.rint(a * ONE), np.rint(b * ONE))]
+    index = shard_points(np.arange(len(ops)))
+    ops = [ops[i] for i in index]
+
+    async def run(tqv, op):
+        w, rot, A, B = op
+        results = []
+        for flags in (EARLY_EXIT, 0):
+            out1, out2, cycles = await run_cordic_timed(dut, tqv, Mode.LINEAR, rot, A, B, shift=SHIFT,
+                                                        width=WIDTH, flags=flags)
+            early_exit = bool(flags)
+            expected = model.run(Mode.LINEAR, rot, A, B, SHIFT, early_exit=early_exit)
+            expected_cycles = model.cycles(Mode.LINEAR, rot, A, B, SHIFT, early_exit=early_exit)
+            assert (out1, out2) == expected, \
+                f"{names[w]} A={A} B={B} early_exit={early_exit}: got {(out1, out2)}, model {expected}"
+            assert cycles == expected_cycles, \
+                f"{names[w]} A={A} B={B} early_exit={early_exit}: done after {cycles} cycles, model {expected_cycles}"
+            results += [out1, cycles]
+        return results
+
+    results = np.array(await map_concurrent(run, ops, tqvs), dtype=np.int64).reshape(-1, 4)
+    out_early, cycles, out_full, cycles_full = results.T
+    workload = np.array([op[0] for op in ops])
+    A = np.array([op[2] for op in ops], dtype=np.float64)
+    B = np.array([op[3] for op in ops], dtype=np.float64)
+    rotating = np.array([op[1] for op in ops]) == 1
+    exact = np.where(rotating, A * B / ONE, B * ONE / np.where(rotating, 1.0, A))
+    err_early = (out_early - exact) / ONE
+    err_full = (out_full - exact) / ONE
+
+    assert np.all(cycles_full == model.iterations), f"without early exit every operation takes {model.iterations} cycles"
+    dut._log.info("\n\n---- Latency with early exit ----")
+    for w, name in enumerate(names):
+        sel = workload == w
+        if not np.any(sel):
+            continue
+        hist = np.bincount(cycles[sel], minlength=model.iterations + 1)
+        dut._log.info(f"{name:<11} mean {np.mean(cycles[sel]):5.2f} of {model.iterations} cycles, "
+                      f"MAX|err| {np.max(np.abs(err_early[sel])):.3g} (full run {np.max(np.abs(err_full[sel])):.3g}), "
+                      f"histogram {hist.tolist()}")
+        assert np.max(np.abs(err_early[sel])) < 1e-2, f"{name}: early exit error {np.max(np.abs(err_early[sel])):.3g}"
+        if name in FAST_WORKLOADS:
+            assert np.mean(cycles[sel]) <= 0.75 * model.iterations, \
+                f"{name}: {np.mean(cycles[sel]):.2f} cycles on average, expected at most {0.75 * model.iterations:.1f}"
+
+    # raw results only, the histograms are rendered offline by report.py
+    OUTDIR = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", "."))) / "artifacts/cordic"
+    OUTDIR.mkdir(parents=True, exist_ok=True)
+    np.savez(OUTDIR / "early_exit.npz", index=index, workload=workload, cycles=cycles, cycles_full=cycles_full,
+             err=err_early, err_full=err_full, names=",".join(names), iterations=model.iterations)
+
+
+@cocotb.test()
+async def test_early_exit_ignored(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : early exit only changes the LINEAR modes")
+
+    WIDTH = FIXED_WIDTH
+    model = CordicModel(width=WIDTH)
+    ONE = 1 << (WIDTH - 2)
+    cases = [
+        (Mode.CIRCULAR, 1, 0, 0),                                  # z is zero from the start
+        (Mode.CIRCULAR, 1, ONE // 2, 0),
+        (Mode.CIRCULAR, 0, ONE // 2, 0),                           # y is zero from the start
+        (Mode.CIRCULAR, 0, ONE // 2, -ONE // 3),
+        (Mode.HYPERBOLIC, 1, 0, 0),
+        (Mode.HYPERBOLIC, 1, -ONE // 4, 0),
+        (Mode.HYPERBOLIC, 0, ONE, 0),
+        (Mode.HYPERBOLIC, 0, ONE, ONE // 2),
+    ]
+    for mode, rot, A, B in cases:
+        got = await run_cordic_timed(dut, tqv, mode, rot, A, B, width=WIDTH, flags=EARLY_EXIT)
+        expected = (*model.run(mode, rot, A, B), model.cycles(mode, rot, A, B))
+        assert got == expected, f"{mode.name} is_rotating={rot} A={A} B={B}: got {got}, expected {expected} without early exit"
@@ -0,0 +1,211 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# Exhaustive ULP-error characterization (not part of the default MODULE list).
+#
+# Every Q2.(WIDTH-2) angle code goes through circular rotating mode and every code inside the
+# hyperbolic convergence range through hyperbolic rotating mode. The raw outputs are
+# compared against a float64 reference in chunks, so memory stays flat however many
+# codes are run: each chunk only updates
+#   - a histogram of the error in LSBs, MAE and RMSE per output and of the invariant
+#     (cos²+sin²-1, cosh²-sinh²-1), in a test_utils.StreamingMetrics,
+#   - the worst-case inputs,
+#   - a map of the max / mean error against the input, in MAP_BINS bins.
+# The results go to artifacts/cordic/exhaustive_<mode>.npz, report.py renders them.
+#
+#   make exhaustive                                   # or: make MODULE=test_exhaustive_ulp
+#   CORDIC_EXHAUSTIVE_STRIDE=16 make exhaustive       # every 16th code, for a quick look
+#
+# Environment variables:
+#   CORDIC_EXHAUSTIVE_STRIDE   run every n-th code (default: 1, all of them; 2^(WIDTH-16) above 16 bits)
+#   CORDIC_EXHAUSTIVE_CHUNK    codes per processed chunk (default: 1024)
+#   CORDIC_ULP_MAX             when set, fail if an in-domain error exceeds this many LSBs
+
+import cocotb
+from cocotb.clock import Clock
+
+from tqv import TinyQV
+from fixed_point import *
+from test_utils import run_cordic, Mode, all_instances, map_concurrent, StreamingMetrics, FIXED_WIDTH
+from result_cache import ResultCache
+from trace_recorder import TraceRecorder
+
+import math
+import os
+from pathlib import Path
+import numpy as np
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+WIDTH = FIXED_WIDTH
+INT_BITS = 2
+FRAC_BITS = WIDTH - INT_BITS
+ONE = 1 << FRAC_BITS
+
+# a wider build keeps the 2^16 codes of the 16-bit run unless a stride is given
+STRIDE = int(os.getenv("CORDIC_EXHAUSTIVE_STRIDE", 1 << max(0, WIDTH - 16)))
+CHUNK = int(os.getenv("CORDIC_EXHAUSTIVE_CHUNK", 1024))
+ULP_MAX = os.getenv("CORDIC_ULP_MAX")
+
+HIST_BINS = 64        # errors of HIST_BINS-1 LSBs and more end up in the last bin
+MAP_BINS = 512
+WORST_K = 16
+
+# |z| up to which the core converges: pi/2 for circular, the sweep domain for hyperbolic
+CIRCULAR_DOMAIN = math.pi / 2
+HYPERBOLIC_DOMAIN = 1.1161
+
+
+class UlpAccumulator:
+    """ Streaming error statistics of one (out1, out2) operation over a range of input codes """
+
+    def __init__(self, reference, code_lo, code_hi, domain, invariant):
+        self.reference = reference
+        self.code_lo = code_lo
+        self.code_hi = code_hi
+        self.domain = domain
+
+        # in-domain errors and invariant residuals, the histogram in LSBs
+        self.metrics = StreamingMetrics(1.0 / ONE, ["out1", "out2"], invariants=[invariant], hist_bins=HIST_BINS)
+        self.map_max = np.zeros((2, MAP_BINS))
+        self.map_sum = np.zeros((2, MAP_BINS))
+        self.map_count = np.zeros(MAP_BINS, dtype=np.int64)
+        self.worst_code = np.zeros(0, dtype=np.int64)
+        self.worst_err = np.zeros((2, 0))
+        self.count = 0
+        self.out_of_domain = 0
+
+        # current chunk, preallocated
+        self.codes = np.zeros(CHUNK, dtype=np.int64)
+        self.outs = np.zeros((2, CHUNK), dtype=np.int64)
+        self.pending = 0
+
+    def add(self, code, out1, out2):
+        self.codes[self.pending] = code
+        self.outs[0, self.pending] = out1
+        self.outs[1, self.pending] = out2
+        self.pending += 1
+        if self.pending == CHUNK:
+            self.flush()
+
+    def flush(self):
+        n = self.pending
+        if n == 0:
+            return
+        codes = self.codes[:n]
+        z = codes / ONE
+        err = np.abs(self.outs[:, :n] - np.stack(self.reference(z)) * ONE)     # in LSBs
+
+        bins = ((codes - self.code_lo) * MAP_BINS // (self.code_hi - self.code_lo + 1)).astype(np.int64)
+        for k in range(2):
+            np.maximum.at(self.map_max[k], bins, err[k])
+            np.add.at(self.map_sum[k], bins, err[k])
+        np.add.at(self.map_count, bins, 1)
+
+        inside = np.abs(z) <= self.domain
+        self.out_of_domain += int(n - inside.sum())
+        self.metrics.update({"out1": err[0][inside] / ONE, "out2": err[1][inside] / ONE},
+                            outputs=self.outs[:, :n][:, inside] / ONE, points=z[inside])
+
+        # keep the WORST_K in-domain codes by the larger error of both outputs
+        codes_in = np.concatenate([self.worst_code, codes[inside]])
+        err_in = np.concatenate([self.worst_err, err[:, inside]], axis=1)
+        order = np.argsort(-err_in.max(axis=0), kind="stable")[:WORST_K]
+        self.worst_code, self.worst_err = codes_in[order], err_in[:, order]
+
+        self.count += n
+        self.pending = 0
+
+    def max_error(self):
+        return float(self.worst_err.max()) if self.worst_err.size else 0.0
+
+    def save(self, path):
+        map_edges = np.linspace(self.code_lo, self.code_hi + 1, MAP_BINS + 1) / ONE
+        with np.errstate(invalid="ignore"):
+            map_mean = self.map_sum / self.map_count
+        np.savez(path,
+                 map_z=(map_edges[:-1] + map_edges[1:]) / 2,
+                 map_max_out1=self.map_max[0], map_max_out2=self.map_max[1],
+                 map_mean_out1=map_mean[0], map_mean_out2=map_mean[1],
+                 hist_out1=self.metrics.hist[0], hist_out2=self.metrics.hist[1],
+                 worst_z=self.worst_code / ONE, worst_code=self.worst_code,
+                 worst_err_out1=self.worst_err[0], worst_err_out2=self.worst_err[1],
+                 count=self.count, out_of_domain=self.out_of_domain, domain=self.domain, **self.metrics.state())
+
+
+async def _characterize(dut, tqv, name, mode, reference, invariant, code_lo, code_hi, domain):
+    cache = ResultCache.open()
+    trace = TraceRecorder.open(f"exhaustive_{name}")
+    acc = UlpAccumulator(reference, code_lo, code_hi, domain, invariant)
+
+    codes = range(code_lo, code_hi + 1, STRIDE)
+    dut._log.info(f"[{name}] {len(codes)} codes from {code_lo / ONE:.5f} to {code_hi / ONE:.5f}, chunks of {CHUNK}")
+    # every harness instance in tb.v (make INSTANCES=<n>) takes a share of each chunk
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
+
+    async def measure(tqv, code):
+        out1, out2, _ = await run_cordic(dut, tqv, mode, 1, code, width=WIDTH, cache=cache, trace=trace)
+        return out1, out2
+
+    for start in range(0, len(codes), CHUNK):
+        chunk = codes[start:start + CHUNK]
+        for code, (out1, out2) in zip(chunk, await map_concurrent(measure, chunk, tqvs)):
+            acc.add(code, out1, out2)
+            if acc.pending == 0:
+                dut._log.info(f"[{name}] {acc.count}/{len(codes)} codes, worst so far {acc.max_error():.2f} LSB")
+                if cache is not None:
+                    cache.save()
+    acc.flush()
+
+    if cache is not None:
+        cache.save()
+        dut._log.info(cache.summary())
+    if trace is not None:
+        trace.close()
+
+    OUTDIR = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", "."))) / "artifacts/cordic"
+    OUTDIR.mkdir(parents=True, exist_ok=True)
+    acc.save(OUTDIR / f"exhaustive_{name}.npz")
+
+    dut._log.info(f"\n\n---- Exhaustive {name}: {acc.count} codes, {acc.out_of_domain} outside |z| <= {domain:.4f} ----")
+    for k, out in enumerate(("out1", "out2")):
+        nonzero = np.nonzero(acc.metrics.hist[k])[0]
+        dut._log.info(f"{out} error histogram (LSB: count): {', '.join(f'{b}: {acc.metrics.hist[k][b]}' for b in nonzero)}")
+    acc.metrics.log(dut._log.info)
+    for code, e1, e2 in zip(acc.worst_code[:5], *acc.worst_err[:, :5]):
+        dut._log.info(f"worst: z={code / ONE:+.6f} (code {int(code)}) out1 {e1:.2f} LSB, out2 {e2:.2f} LSB")
+
+    if ULP_MAX is not None:
+        assert acc.max_error() <= float(ULP_MAX), \
+            f"{name}: worst in-domain error {acc.max_error():.2f} LSB exceeds CORDIC_ULP_MAX={ULP_MAX}"
+
+
+async def _setup(dut):
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+    return tqv
+
+
+@cocotb.test()
+async def test_exhaustive_circular_rotating(dut):
+    tqv = await _setup(dut)
+    # all 2^WIDTH angle codes, including the ones outside the convergence range (reported separately)
+    await _characterize(dut, tqv, "circular", Mode.CIRCULAR,
+                        lambda z: (np.cos(z), np.sin(z)), "cos²+sin²-1",
+                        -(1 << (WIDTH - 1)), (1 << (WIDTH - 1)) - 1, CIRCULAR_DOMAIN)
+
+
+@cocotb.test()
+async def test_exhaustive_hyperbolic_rotating(dut):
+    tqv = await _setup(dut)
+    limit = int(HYPERBOLIC_DOMAIN * ONE)
+    await _characterize(dut, tqv, "hyperbolic", Mode.HYPERBOLIC,
+                        lambda z: (np.cosh(z), np.sinh(z)), "cosh²-sinh²-1",
+                        -limit, limit, HYPERBOLIC_DOMAIN)
@@ -0,0 +1,264 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# Constrained-random differential fuzzing of the core against the bit-exact model in
+# cordic_model.py.
+#
+# (mode, is_rotating, A, B, alpha_one_left_shift) are drawn from distributions that
+# favour the corners: the LINEAR prescale (k_comb) edges, sign boundaries, powers of
+# two and full-scale values that overflow. The raw outputs must match the model bit
+# for bit. A mismatch is shrunk to a minimal reproducer, which is written to
+# artifacts/fuzz (run_parallel.py merges the ones of all jobs). fuzz_corpus.json is
+# replayed before the random cases; promoting a reproducer into it is a manual step:
+#
+#   python test_fuzz_differential.py artifacts/fuzz/*.json
+#
+# The random cases come from a fixed seed, so every run (and every shard of a
+# parallel run) draws the same list; CORDIC_FUZZ_SEED=random draws a new one.
+#
+# Environment variables:
+#   CORDIC_FUZZ_CASES         number of random cases (default: 100)
+#   CORDIC_FUZZ_SEED          seed (default: 1), or random for a time-based one (logged)
+#   CORDIC_FUZZ_SHRINK_STEPS  max. simulations spent on shrinking a failure (default: 64)
+#   CORDIC_FUZZ_DIR           where reproducers go (default: <CORDIC_PLOTS_DIR>/artifacts/fuzz)
+
+import cocotb
+from cocotb.clock import Clock
+
+from tqv import TinyQV
+from fixed_point import *
+from test_utils import run_cordic, shard_points, BINARY_ANGLE_BIT, EARLY_EXIT_BIT, FIXED_WIDTH
+from cordic_model import CordicModel, CIRCULAR, LINEAR, HYPERBOLIC
+from result_cache import ResultCache
+
+import json
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+WIDTH = FIXED_WIDTH
+CORPUS_FILE = Path(__file__).resolve().parent / "fuzz_corpus.json"
+
+DEFAULT_SEED = 1
+
+
+def resolve_seed(value):
+    """ CORDIC_FUZZ_SEED as an int, "random" picks a time-based one """
+    if value is None:
+        return DEFAULT_SEED
+    return time.time_ns() % (1 << 32) if value == "random" else int(value)
+
+
+N_CASES = int(os.getenv("CORDIC_FUZZ_CASES", 100))
+SEED = resolve_seed(os.getenv("CORDIC_FUZZ_SEED"))
+SHRINK_STEPS = int(os.getenv("CORDIC_FUZZ_SHRINK_STEPS", 64))
+
+MIN_VAL = -(1 << (WIDTH - 1))
+MAX_VAL = (1 << (WIDTH - 1)) - 1
+
+BINARY_ANGLE = 1 << BINARY_ANGLE_BIT
+EARLY_EXIT = 1 << EARLY_EXIT_BIT
+
+# inputs at which the rotating modes still converge, in Q2.(WIDTH-2)
+CIRCULAR_Z_MAX = int(math.pi / 2 * (1 << (WIDTH - 2)))
+HYPERBOLIC_Z_MAX = int(1.1161 * (1 << (WIDTH - 2)))
+
+
+def clamp(v):
+    return max(MIN_VAL, min(MAX_VAL, v))
+
+
+def power_of_two_near(rng, msb):
+    """ +-2^msb, nudged by one LSB, or with random low bits below the msb """
+    msb = max(0, min(WIDTH - 2, msb))
+    v = (1 << msb) + rng.choice((-1, 0, 1, rng.randrange(1 << msb) if msb else 0))
+    return clamp(v if rng.random() < 0.5 else -v)
+
+
+def draw_value(rng):
+    strategy = rng.random()
+    if strategy < 0.2:
+        return rng.choice((0, 1, -1, MAX_VAL, MIN_VAL, MAX_VAL - 1, MIN_VAL + 1))
+    if strategy < 0.5:
+        return power_of_two_near(rng, rng.randrange(WIDTH - 1))
+    return rng.randint(MIN_VAL, MAX_VAL)
+
+
+def draw_case(rng):
+    mode = rng.choices((CIRCULAR, LINEAR, HYPERBOLIC), weights=(1, 2, 1))[0]
+    is_rotating = rng.randrange(2)
+    shift = rng.randint(WIDTH - 8, WIDTH - 3) if rng.random() < 0.7 else rng.randrange(2 * WIDTH)
+    A, B = draw_value(rng), draw_value(rng)
+
+    if mode == LINEAR and rng.random() < 0.6:
+        # k_comb edges: multiply compares msb(|B|) with shift+1, divide compares msb(|B|) with msb(|A|)
+        if is_rotating:
+            B = power_of_two_near(rng, shift + rng.choice((-1, 0, 1, 2)))
+        else:
+            msb_a = rng.randrange(WIDTH - 1)
+            A = power_of_two_near(rng, msb_a)
+            B = power_of_two_near(rng, msb_a + rng.choice((-1, 0, 1, 2)))
+    elif mode != LINEAR and is_rotating and rng.random() < 0.6:
+        # inside the convergence range, including its edges and the sign boundary
+        z_max = CIRCULAR_Z_MAX if mode == CIRCULAR else HYPERBOLIC_Z_MAX
+        A = rng.choice((rng.randint(-z_max, z_max), z_max, -z_max, rng.randint(-4, 4)))
+
+    # the binary angle bit only changes circular rotations, the other modes have to ignore it
+    flags = BINARY_ANGLE if rng.random() < 0.25 else 0
+    if flags and mode == CIRCULAR and is_rotating and rng.random() < 0.5:
+        # quadrant edges, where the half-turn fold switches
+        A = clamp(rng.randrange(-2, 2) * (1 << (WIDTH - 2)) + rng.randint(-2, 2))
+    # early exit only changes the LINEAR modes, the others have to ignore it as well
+    if rng.random() < 0.25:
+        flags |= EARLY_EXIT
+
+    return {"mode": mode, "is_rotating": is_rotating, "A": A, "B": B, "shift": shift, "flags": flags}
+
+
+def shrink_candidates(case):
+    """ Simpler variants of a case, most aggressive first """
+    for key in ("A", "B"):
+        v = case[key]
+        for smaller in (0, v // 2 if v >= 0 else -((-v) // 2), abs(v), v & (v - 1) if v > 0 else v):
+            if smaller != v and MIN_VAL <= smaller <= MAX_VAL:
+                yield {**case, key: smaller}
+    if case["shift"] != 11:
+        yield {**case, "shift": 11}
+    if case["flags"] & EARLY_EXIT:
+        yield {**case, "flags": case["flags"] & ~EARLY_EXIT}
+    if case["flags"]:
+        yield {**case, "flags": 0}
+    if not case["is_rotating"]:
+        yield {**case, "is_rotating": 1}
+
+
+def describe(case):
+    return (f"mode={case['mode']} is_rotating={case['is_rotating']} A={case['A']} B={case['B']} "
+            f"shift={case['shift']} flags={case['flags']:#04x}")
+
+
+CASE_KEYS = ("mode", "is_rotating", "A", "B", "shift", "flags")
+
+
+def corpus_case(entry):
+    """ The case of a corpus entry; entries from before the config flags existed have none """
+    return {k: entry.get(k, 0) for k in CASE_KEYS}
+
+
+def load_corpus():
+    if not CORPUS_FILE.exists():
+        return []
+    return json.loads(CORPUS_FILE.read_text())
+
+
+def reproducer_file():
+    """ This job's reproducer file, sharded runs carry the shard in the name """
+    base = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", ".")))
+    directory = Path(os.getenv("CORDIC_FUZZ_DIR", base / "artifacts/fuzz"))
+    shard = os.getenv("CORDIC_SHARD", "").replace("/", "of")
+    return directory / (f"reproducers.shard{shard}.json" if shard else "reproducers.json")
+
+
+def save_reproducers(entries):
+    """ Writes the minimal reproducers of this run, fuzz_corpus.json is left alone """
+    path = reproducer_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(entries, indent=2) + "\n")
+    return path
+
+
+def promote(paths):
+    """ Appends the reproducers in the given files to fuzz_corpus.json, skipping known cases """
+    corpus = load_corpus()
+    known = [corpus_case(c) for c in corpus]
+    added = 0
+    for path in paths:
+        for entry in json.loads(Path(path).read_text()):
+            if corpus_case(entry) not in known:
+                corpus.append(entry)
+                known.append(corpus_case(entry))
+                added += 1
+    CORPUS_FILE.write_text(json.dumps(corpus, indent=2) + "\n")
+    return added
+
+
+@cocotb.test()
+async def test_fuzz_against_model(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+
+    model = CordicModel(width=WIDTH)
+    cache = ResultCache.open()
+
+    async def mismatch(case):
+        """ None when the DUT matches the model, else (expected, got) """
+        out1, out2, _ = await run_cordic(dut, tqv, case["mode"], case["is_rotating"], case["A"], case["B"],
+                                         shift=case["shift"], width=WIDTH, cache=cache, flags=case["flags"])
+        expected = model.run(case["mode"], case["is_rotating"], case["A"], case["B"], case["shift"],
+                             binary_angle=bool(case["flags"] & BINARY_ANGLE),
+                             early_exit=bool(case["flags"] & EARLY_EXIT))
+        return None if (out1, out2) == expected else (expected, (out1, out2))
+
+    # regression corpus first, then new random cases; every shard draws the same list and runs its slice
+    corpus = [corpus_case(c) for c in load_corpus()]
+    rng = random.Random(SEED)
+    cases = [draw_case(rng) for _ in range(N_CASES)]
+    dut._log.info(f"fuzzing {len(corpus)} corpus cases and {N_CASES} random cases, CORDIC_FUZZ_SEED={SEED}")
+
+    failures = []
+    reproducers = []
+    for case in shard_points(corpus + cases):
+        result = await mismatch(case)
+        if result is None:
+            continue
+
+        # shrink: keep taking the first simpler variant that still fails
+        dut._log.warning(f"mismatch on {describe(case)}: model {result[0]}, DUT {result[1]}; shrinking")
+        steps = 0
+        progress = True
+        while progress and steps < SHRINK_STEPS:
+            progress = False
+            for candidate in shrink_candidates(case):
+                steps += 1
+                candidate_result = await mismatch(candidate)
+                if candidate_result is not None:
+                    case, result = candidate, candidate_result
+                    progress = True
+                    break
+                if steps >= SHRINK_STEPS:
+                    break
+
+        dut._log.error(f"minimal reproducer: {describe(case)}: model {result[0]}, DUT {result[1]}")
+        failures.append(case)
+        if not any(corpus_case(r) == case for r in reproducers):
+            reproducers.append({**case, "expected": list(result[0]), "got": list(result[1]), "seed": SEED})
+
+    if cache is not None:
+        cache.save()
+        dut._log.info(cache.summary())
+
+    path = save_reproducers(reproducers) if reproducers else None
+    assert not failures, f"{len(failures)} mismatches against cordic_model.py, reproducers written to {path}: " + \
+                         "; ".join(describe(c) for c in failures)
+
+
+if __name__ == "__main__":
+    # promote reproducers of a failing run into the regression corpus
+    if len(sys.argv) < 2:
+        raise SystemExit(f"usage: python {Path(__file__).name} <reproducers.json>...")
+    print(f"{promote(sys.argv[1:])} new cases added to {CORPUS_FILE}")
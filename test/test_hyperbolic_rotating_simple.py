@@ -9,7 +9,7 @@ from tqv import TinyQV
 from fixed_point import *
 import math 
 from fixed_point import fixed_to_float
-from test_utils import test_sinh_cosh  
+from test_utils import test_sinh_cosh, FIXED_WIDTH
 import numpy as np 
 
 # When submitting your design, change this to the peripheral number
@@ -40,7 +40,7 @@ async def test_hyperbolic_basic(dut):
 
     
     # fixed-point format for hyperbolic rotating mode (Q2.14)
-    WIDTH = 16
+    WIDTH = FIXED_WIDTH
     INT_BITS = 2
     LSB = 2.0 ** (-(WIDTH - INT_BITS))
     
@@ -62,8 +62,8 @@ async def test_hyperbolic_basic(dut):
         #   cosh ≈ truth, sinh ≈ truth, and cosh^2 - sinh^2 ≈ 1
         out1_raw, out2_raw = await test_sinh_cosh(dut, tqv, x, width=WIDTH, rtol=rtol, atol=atol)
 
-        cosh_pred = fixed_to_float(out1_raw, 16, 2)
-        sinh_pred = fixed_to_float(out2_raw, 16, 2)
+        cosh_pred = fixed_to_float(out1_raw, WIDTH, 2)
+        sinh_pred = fixed_to_float(out2_raw, WIDTH, 2)
 
 
         # Record actual errors for a run-wide summary (handy for CI logs)
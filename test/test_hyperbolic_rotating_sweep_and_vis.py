@@ -9,12 +9,14 @@ from tqv import TinyQV
 from fixed_point import *
 import math 
 import numpy as np 
-import matplotlib.pyplot as plt 
 import os 
 from pathlib import Path
 
 from fixed_point import fixed_to_float
-from test_utils import test_sinh_cosh
+from test_utils import test_sinh_cosh, shard_points, all_instances, StreamingMetrics, FIXED_WIDTH
+from result_cache import ResultCache
+from trace_recorder import TraceRecorder
+from adaptive_sweep import run_sweep, sweep_weights
 
 # When submitting your design, change this to the peripheral number
 # in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
@@ -51,7 +53,7 @@ async def test_hyperbolic_sweep_and_vis(dut):
     assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
 
     # Fixed-point format for hyperbolic rotating mode (Q2.14)
-    WIDTH = 16
+    WIDTH = FIXED_WIDTH
     INT_BITS = 2
     FRAC_BITS = WIDTH - INT_BITS
     LSB = 2.0 ** (-FRAC_BITS)
@@ -61,119 +63,59 @@ async def test_hyperbolic_sweep_and_vis(dut):
     atol = 1e-3
     
     # Sweep the valid domain inclusively
-    xs = np.linspace(-1.1161, 1.1161, 225, dtype=np.float64)
-    sinh_true = np.sinh(xs)
-    cosh_true = np.cosh(xs)
+    xs = shard_points(np.linspace(-1.1161, 1.1161, 225, dtype=np.float64))
 
-    sinh_vals = []
-    cosh_vals = []
-    
-    
-    for x in xs:
+    # raw results of earlier runs against the same RTL are replayed from the cache
+    cache = ResultCache.open()
+    # every operation goes to a binary trace (artifacts/traces) instead of the log
+    trace = TraceRecorder.open("hyperbolic_rotating")
+
+    # one TinyQV per harness instance in tb.v (make INSTANCES=<n>), the sweep is spread over all of them
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
+
+    results = {}
+
+    async def measure(tqv, x):
         # Runs op + asserts cosh/sinh against truth + invariant check
-        out1_raw, outw_raw = await test_sinh_cosh(dut, tqv, float(x), width=WIDTH, rtol=rtol, atol=atol)
+        out1_raw, outw_raw = await test_sinh_cosh(dut, tqv, float(x), width=WIDTH, rtol=rtol, atol=atol, cache=cache, trace=trace)
         # Read back floats for metrics/plots
-        cosh_pred = fixed_to_float(out1_raw, 16, 2) 
-        sinh_pred = fixed_to_float(outw_raw, 16, 2)
+        cosh_pred = fixed_to_float(out1_raw, WIDTH, 2) 
+        sinh_pred = fixed_to_float(outw_raw, WIDTH, 2)
+        results[x] = (cosh_pred, sinh_pred)
+
+        # residual in LSBs, steers the refinement of an adaptive sweep
+        return max(abs(cosh_pred - math.cosh(x)), abs(sinh_pred - math.sinh(x))) / LSB
 
-        cosh_vals.append(cosh_pred)
-        sinh_vals.append(sinh_pred)
+    # the uniform grid, or with CORDIC_ADAPTIVE=1 a coarse grid refined where the error is high
+    xs = await run_sweep(measure, tqvs, xs, residual_threshold=4, slope_threshold=2, log=dut._log.info)
+
+    sinh_true = np.sinh(xs)
+    cosh_true = np.cosh(xs)
+    cosh_vals = [results[x][0] for x in xs]
+    sinh_vals = [results[x][1] for x in xs]
+
+    if cache is not None:
+        cache.save()
+        dut._log.info(cache.summary())
+    if trace is not None:
+        dut._log.info(f"traced {trace.close()} operations to {trace.directory}")
 
     cosh_vals = np.array(cosh_vals, dtype=np.float64)
     sinh_vals = np.array(sinh_vals, dtype=np.float64)
 
-    # Metrics
-    err_sinh = sinh_vals - sinh_true
-    err_cosh = cosh_vals - cosh_true
-    mae_sinh = float(np.mean(np.abs(err_sinh)))
-    mae_cosh = float(np.mean(np.abs(err_cosh)))
-    rmse_sinh = float(np.sqrt(np.mean(err_sinh**2)))
-    rmse_cosh = float(np.sqrt(np.mean(err_cosh**2)))
-    maxerr_sinh = float(np.max(np.abs(err_sinh)))
-    maxerr_cosh = float(np.max(np.abs(err_cosh)))
-
+    # Metrics, weighted like sweep_mean for an adaptive sweep
+    metrics = StreamingMetrics(LSB, ["sinh", "cosh"], invariants=["cosh²-sinh²-1"])
+    metrics.update({"sinh": sinh_vals - sinh_true, "cosh": cosh_vals - cosh_true}, outputs=(cosh_vals, sinh_vals),
+                   points=xs, weights=sweep_weights(xs))
+    mae_sinh, mae_cosh = metrics.mae("sinh"), metrics.mae("cosh")
     # Hyperbolic invariant residual: cosh^2 - sinh^2 - 1
-    invariant_resid = cosh_vals**2 - sinh_vals**2 - 1.0
-    rms_invariant = float(np.sqrt(np.mean(invariant_resid**2)))
-    max_invariant = float(np.max(np.abs(invariant_resid)))
-
-    dut._log.info(f"MAE(sinh)={mae_sinh:.6g}")
-    dut._log.info(f"MAE(cosh)={mae_cosh:.6g}")
-    dut._log.info(f"RMSE(sinh)={rmse_sinh:.6g}") 
-    dut._log.info(f"RMSE(cosh)={rmse_cosh:.6g}")
-    dut._log.info(f"MAXERR(sinh)={maxerr_sinh:.6g}")
-    dut._log.info(f"MAXERR(cosh)={maxerr_cosh:.6g}")
-    dut._log.info(f"RMS(cosh^2-sinh^2-1)={rms_invariant:.6g}, MAX(...)={max_invariant:.6g}, LSB={LSB:.6g}")
-
-    # Artifacts dir
+    max_invariant = metrics.max("cosh²-sinh²-1")
+    metrics.log(dut._log.info)
+
+    # raw results only, plots and CSVs are rendered offline by report.py
     OUTDIR = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", "."))) / "artifacts/cordic"
     OUTDIR.mkdir(parents=True, exist_ok=True)
-
-    # make sinh plot
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 2, 1)
-    plt.title(f"Sinh Sweep: MAE={mae_sinh:.5f}, RMSE={rmse_sinh:.5f}")
-    plt.plot(xs, sinh_true, label="True sinh")
-    plt.plot(xs, sinh_vals, "--", label="CORDIC sinh")
-    plt.xlabel("x")
-    plt.ylabel("sinh(x)")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-
-    # make plot for sinh residual 
-    plt.subplot(1, 2, 2)
-    plt.title("Residual: sinh_pred - sinh_true")
-    plt.plot(xs, err_sinh, label="Residual")
-    plt.xlabel("x")
-    plt.ylabel("Error")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.savefig(OUTDIR / "sinh.png", dpi=180, bbox_inches="tight")
-    plt.close()
-    
-    # make cosh plot
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 2, 1)
-    plt.title(f"Cosh Sweep: MAE={mae_cosh:.5f}, RMSE={rmse_cosh:.5f}")
-    plt.plot(xs, cosh_true, label="True cosh")
-    plt.plot(xs, cosh_vals, "--", label="CORDIC cosh")
-    plt.xlabel("x")
-    plt.ylabel("cosh(x)")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-
-    # make plot for cosh residual
-    plt.subplot(1, 2, 2)
-    plt.title("Residual: cosh_pred - cosh_true")
-    plt.plot(xs, err_cosh, label="Residual")
-    plt.xlabel("x")
-    plt.ylabel("Error")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.savefig(OUTDIR / "cosh.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    # Invariant plot
-    plt.figure(figsize=(7, 4))
-    plt.title(f"Hyperbolic invariant: cosh²-sinh²-1  (RMS={rms_invariant:.5e}, MAX={max_invariant:.5e})")
-    plt.plot(xs, invariant_resid, label="Residual")
-    plt.xlabel("x")
-    plt.ylabel("Residual")
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.savefig(OUTDIR / "hyperbolic_invariant.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    # CSVs
-    np.savetxt(OUTDIR / "sinh_vs_true.csv",
-               np.c_[xs, sinh_true, sinh_vals, err_sinh],
-               delimiter=",", header="x,true_sinh,cordic_sinh,residual", comments="")
-    np.savetxt(OUTDIR / "cosh_vs_true.csv",
-               np.c_[xs, cosh_true, cosh_vals, err_cosh],
-               delimiter=",", header="x,true_cosh,cordic_cosh,residual", comments="")
-    np.savetxt(OUTDIR / "hyperbolic_invariant.csv",
-               np.c_[xs, invariant_resid],
-               delimiter=",", header="x,cosh2_minus_sinh2_minus_1", comments="")
+    np.savez(OUTDIR / "hyperbolic_rotating.npz", x=xs, sinh=sinh_vals, cosh=cosh_vals, **metrics.state())
 
     # Reasonable thresholds (keep generous for CI; tighten later if you like)
     assert mae_sinh < 0.003, "Mean absolute error (sinh) too large"
@@ -8,7 +8,7 @@ from cocotb.triggers import ClockCycles
 from tqv import TinyQV
 from fixed_point import *
 import math 
-from test_utils import test_vectoring_hyperbolic, _run_vectoring_once, assert_close
+from test_utils import test_vectoring_hyperbolic, _run_vectoring_once, assert_close, FIXED_WIDTH
 import numpy as np 
 import random
 
@@ -44,7 +44,7 @@ async def test_hyperbolic_vectoring_basic(dut):
     assert await tqv.read_byte_reg(6) == 0, "status must be READY (0)"
     
     # Formats
-    WIDTH  = 16
+    WIDTH  = FIXED_WIDTH
     XY_INT = 5    # Q5.11 for X/Y/r
     Z_INT  = 2    # Q2.14 for Z
 
@@ -62,7 +62,7 @@ async def test_hyperbolic_vectoring_basic(dut):
     ]
  
     for x, y in test_vectors:
-        out1, out2, *_ = await _run_vectoring_once(dut, tqv, x, y, WIDTH=16, XY_INT=XY_INT)
+        out1, out2, *_ = await _run_vectoring_once(dut, tqv, x, y, WIDTH=WIDTH, XY_INT=XY_INT)
 
         out1 *= K
         
@@ -8,9 +8,11 @@ from cocotb.triggers import ClockCycles
 from tqv import TinyQV
 from fixed_point import *
 import math 
-from test_utils import test_vectoring_hyperbolic, _run_vectoring_once
+from test_utils import test_vectoring_hyperbolic, _run_vectoring_once, shard_points, all_instances, verbose, StreamingMetrics, FIXED_WIDTH
+from result_cache import ResultCache
+from trace_recorder import TraceRecorder
+from adaptive_sweep import run_sweep, sweep_weights
 import numpy as np 
-import matplotlib.pyplot as plt
 import os 
 from pathlib import Path
 
@@ -49,95 +51,71 @@ async def test_hyperbolic_basic(dut):
     assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
     
     
-    WIDTH = 16
+    WIDTH = FIXED_WIDTH
     XY_INT = 5
     Z_INT = 2
     K_m1 = 0.82816
     K = 1 / K_m1
 
     # Sweep s in [0.5, 10], avoid s=0 singularity for z
-    s = np.linspace(0.5, 10.0, 120, dtype=np.float64)
-    r_true = 2.0 * np.sqrt(s)           # sqrt(x^2 - y^2) = 2*sqrt(s)
-    z_true = 0.5 * np.log(s)            # atanh((s-1)/(s+1)) = 0.5*ln(s)
+    s = shard_points(np.linspace(0.5, 10.0, 120, dtype=np.float64))
+
+    # raw results of earlier runs against the same RTL are replayed from the cache
+    cache = ResultCache.open()
+    # every operation goes to a binary trace (artifacts/traces) instead of the log
+    trace = TraceRecorder.open("hyperbolic_vectoring")
+
+    # one TinyQV per harness instance in tb.v (make INSTANCES=<n>), the sweep is spread over all of them
+    tqvs = await all_instances(dut, tqv, PERIPHERAL_NUM)
 
-    r_meas = []
-    z_meas = []
-        
-    for val in s:
+    results = {}
+
+    async def measure(tqv, val):
         x, y = (val + 1.0), (val - 1.0)
-        r_out, z_out, *_ = await _run_vectoring_once(dut, tqv, x, y, WIDTH=WIDTH, XY_INT=XY_INT)
+        r_out, z_out, *_ = await _run_vectoring_once(dut, tqv, x, y, WIDTH=WIDTH, XY_INT=XY_INT, cache=cache, trace=trace)
         # Normalize r to the true magnitude r = 2*sqrt(s)
         r_norm = K * r_out
-        r_meas.append(r_norm)
-        z_meas.append(z_out)
+        results[val] = (r_norm, z_out)
+        r_err, z_err = abs(r_norm - 2.0 * math.sqrt(val)), abs(z_out - 0.5 * math.log(val))
+        if trace is not None:
+            trace.set_error(max(r_err, z_err))
+
+        if verbose(dut):
+            dut._log.debug(f"Input: {x}, {y} | Output: {r_norm}, {z_out}")
+
+        # residual in LSBs of the respective output, steers the refinement of an adaptive sweep
+        return max(r_err * 2 ** (WIDTH - XY_INT), z_err * 2 ** (WIDTH - Z_INT))
 
-        dut._log.info(f"Input: {x}, {y} | Output: {r_norm}, {z_out}")
-        
+    # the uniform grid, or with CORDIC_ADAPTIVE=1 a coarse grid refined where the error is high
+    s = await run_sweep(measure, tqvs, s, residual_threshold=8, slope_threshold=4, log=dut._log.info)
+
+    r_true = 2.0 * np.sqrt(s)           # sqrt(x^2 - y^2) = 2*sqrt(s)
+    z_true = 0.5 * np.log(s)            # atanh((s-1)/(s+1)) = 0.5*ln(s)
+    r_meas = [results[val][0] for val in s]
+    z_meas = [results[val][1] for val in s]
+
+
+    if cache is not None:
+        cache.save()
+        dut._log.info(cache.summary())
+    if trace is not None:
+        dut._log.info(f"traced {trace.close()} operations to {trace.directory}")
 
     r_meas = np.array(r_meas)
     z_meas = np.array(z_meas)
 
-    # Metrics
-    err_r = r_meas - r_true
-    err_z = z_meas - z_true
-    mae_r = float(np.mean(np.abs(err_r)))
-    mae_z = float(np.mean(np.abs(err_z)))
-    max_r = float(np.max(np.abs(err_r)))
-    max_z = float(np.max(np.abs(err_z)))
-
-    dut._log.info(f"sqrt(s) MAE={mae_r:.6g}, MAX={max_r:.6g}")
-    dut._log.info(f"|z=0.5ln(s) MAE={mae_z:.6g}, MAX={max_z:.6g}")
+    # Metrics, weighted like sweep_mean for an adaptive sweep; r is in LSBs of the normalized magnitude
+    metrics = StreamingMetrics({"2*sqrt(s)": K * 2.0 ** -(WIDTH - XY_INT), "z=0.5ln(s)": 2.0 ** -(WIDTH - Z_INT)},
+                               ["2*sqrt(s)", "z=0.5ln(s)"])
+    metrics.update({"2*sqrt(s)": r_meas - r_true, "z=0.5ln(s)": z_meas - z_true}, points=s, weights=sweep_weights(s))
+    mae_r, mae_z = metrics.mae("2*sqrt(s)"), metrics.mae("z=0.5ln(s)")
+    max_r = metrics.max("2*sqrt(s)")
+    metrics.log(dut._log.info)
 
+    # raw results only, plots and CSVs are rendered offline by report.py
     OUTDIR = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", "."))) / "artifacts/cordic"
     OUTDIR.mkdir(parents=True, exist_ok=True)
-
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 2, 1)
-    plt.title(f"2*sqrt(s) from vectoring  (MAE={mae_r:.5f})")
-    plt.plot(s, r_true, label="True 2*sqrt(s)")
-    plt.plot(s, r_meas, "--", label="CORDIC (normalized)")
-    plt.xlabel("s"); plt.ylabel("2*sqrt(s)"); plt.legend(); plt.grid(True, alpha=0.3)
-
-    plt.subplot(1, 2, 2)
-    plt.title("Residual: (2*sqrt(s))_pred - (2*sqrt(s))_true")
-    plt.plot(s, err_r, label="Residual")
-    plt.xlabel("s")
-    plt.ylabel("Error")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(OUTDIR / "sqrt.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 2, 1)
-    plt.title("z output vs 0.5*ln(s)")
-    plt.plot(s, z_true, label="0.5*ln(s)")
-    plt.plot(s, z_meas, "--", label="CORDIC z")
-    plt.xlabel("s")
-    plt.ylabel("z")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-
-    plt.subplot(1, 2, 2)
-    plt.title("Residual: z_pred - 0.5*ln(s)")
-    plt.plot(s, err_z, label="Residual")
-    plt.xlabel("s")
-    plt.ylabel("Error")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-
-    plt.tight_layout()
-    plt.savefig(OUTDIR / "ln.png", dpi=180, bbox_inches="tight")
-    plt.close()
-
-    # CSVs
-    np.savetxt(OUTDIR / "sqrt_vs_true.csv",
-               np.c_[s, r_true, r_meas, err_r],
-               delimiter=",", header="s,2sqrt_s,true_norm,err", comments="")
-    np.savetxt(OUTDIR / "z_vs_half_ln_s.csv",
-               np.c_[s, z_true, z_meas, err_z],
-               delimiter=",", header="s,0.5lns,cordic_z,err", comments="")
+    np.savez(OUTDIR / "hyperbolic_vectoring.npz", s=s, r=r_meas, z=z_meas, **metrics.state())
 
     assert mae_r < 0.01,  "Mean abs error for 2*sqrt(s) too large"
     assert max_r < 0.05,  "Max error for 2*sqrt(s) too large"
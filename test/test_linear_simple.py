@@ -8,8 +8,13 @@ from cocotb.triggers import ClockCycles
 from tqv import TinyQV
 from fixed_point import *
 import math 
-from test_utils import use_multiplication_mode_input_float, use_division_mode_float_input
+from test_utils import use_multiplication_mode_input_float, use_division_mode_float_input, FIXED_WIDTH
 import random
+import numpy as np
+
+from cordic_device import CordicDevice
+from cordic_model import TqvpCordicModel
+from linear_planner import plan_linear, run_plan, MULTIPLY, DIVIDE
 
 # When submitting your design, change this to the peripheral number
 # in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
@@ -41,14 +46,14 @@ async def test_multiplication(dut):
     assert await tqv.read_byte_reg(6) == 0, "status must be READY (0)"
     
     # DUT numeric formats
-    WIDTH = 16
+    WIDTH = FIXED_WIDTH
     XY_INT = 5   # out1/out2 integer bits for X/Y domain
     Z_INT  = 5   # Z integer bits (if used by DUT)
     FRAC   = WIDTH - XY_INT
     LSB    = 2**(-(WIDTH- XY_INT))
     
-    # alpha-one bit position to test
-    alpha_positions = [9,10,11]
+    # alpha-one bit position to test: Q5.x and two below it (9, 10, 11 for 16 bits)
+    alpha_positions = [FRAC - 2, FRAC - 1, FRAC]
     
     # Basic vectors of hand-picked cases
     cases = [
@@ -115,14 +120,14 @@ async def test_division(dut):
     assert await tqv.read_byte_reg(6) == 0, "status must be READY (0)"
     
     # DUT numeric formats
-    WIDTH = 16
+    WIDTH = FIXED_WIDTH
     XY_INT = 5   # out1/out2 integer bits for X/Y domain
     Z_INT  = 5   # Z integer bits (if used by DUT)
     FRAC   = WIDTH - XY_INT
     LSB    = 2**(-(WIDTH- XY_INT))
     
     
-    alpha_one_position = 11
+    alpha_one_position = FRAC   # Q5.11 for 16 bits
     # basic cases 
     basic = [
         (0.6, 1.5),
@@ -147,4 +152,42 @@ async def test_division(dut):
         b = random.uniform(0.2, 5.0)
         xr, _ = await use_division_mode_float_input(dut, tqv, a, b, alpha_one_position,
                                                     width=WIDTH, tol=1e-2)
-        q = fixed_to_float(xr, WIDTH, XY_INT)
\ No newline at end of file
+        q = fixed_to_float(xr, WIDTH, XY_INT)
+
+@cocotb.test()
+async def test_planned_linear(dut):
+    dut._log.info("Start")
+
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : shift picked by linear_planner")
+
+    WIDTH = FIXED_WIDTH
+    rng = np.random.default_rng(7)
+    # magnitudes from 1/16 to 16, products up to 256, quotients up to 64
+    a = rng.uniform(-1, 1, 24) * 2.0 ** rng.integers(-4, 5, 24)
+    b = rng.uniform(-1, 1, 24) * 2.0 ** rng.integers(-4, 5, 24)
+    b_div = np.where(np.abs(b) < 0.25, 0.75, b)
+
+    for op, divisor, exact in ((MULTIPLY, b, a * b), (DIVIDE, b_div, a / b_div)):
+        errors = {}
+        for max_shifts in (1, 3):
+            plan = plan_linear(op, a, divisor, width=WIDTH, max_shifts=max_shifts)
+            dev = CordicDevice(tqv, width=WIDTH)
+            got = await run_plan(dev, plan)
+            model = await run_plan(CordicDevice(TqvpCordicModel(width=WIDTH), width=WIDTH), plan)
+
+            assert np.array_equal(got, model), f"{op}: harness and model differ"
+            err = np.abs(got - exact)
+            bad = np.flatnonzero(err > plan.error_bound())
+            assert len(bad) == 0, (f"{op}, shift {plan.shifts[bad[0]]}: {a[bad[0]]:.6g}, {divisor[bad[0]]:.6g} -> "
+                                   f"{got[bad[0]]:.6g}, expected {exact[bad[0]]:.6g}")
+            assert dev.stats["shift_writes"] == len(plan.groups) <= max_shifts, \
+                f"{op}: {dev.stats['shift_writes']} shift writes for {len(plan.groups)} shift(s)"
+            errors[max_shifts] = np.median(err)
+            dut._log.info(f"[{op}] max_shifts={max_shifts}: shifts {sorted(plan.groups)}, "
+                          f"median error {errors[max_shifts]:.6g}, {dev.stats['shift_writes']} shift writes")
+        assert errors[3] <= errors[1], f"{op}: more shifts should not lose precision"
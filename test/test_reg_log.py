@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: © 2025 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+# Register access log and replay (reg_log.py): a short session of every mode is recorded
+# through TinyQV, read back and replayed on the register-level model and on the harness
+# itself, and neither may read anything else than the log. A log with one read changed
+# has to give exactly that mismatch.
+#
+# CORDIC_REGLOG_REPLAY=<log> additionally replays a recorded log on the harness, e.g. one
+# of a regression run against a changed RTL.
+
+import os
+
+import cocotb
+from cocotb.clock import Clock
+
+from tqv import TinyQV
+from test_utils import (test_sin_cos, test_sinh_cosh, _run_vectoring_once, use_multiplication_mode_input_float,
+                        use_division_mode_float_input, run_cordic, wait_done, all_instances, Mode, FIXED_WIDTH)
+import numpy as np
+
+from cordic_device import CordicDevice
+from cordic_model import TqvpCordicModel, REG_A, REG_OUT1
+from reg_log import RegisterLog, load_log, replay, describe, default_reglog_dir, WRITE, READ, RESET
+
+# When submitting your design, change this to the peripheral number
+# in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
+# The peripheral number is not used by the test harness.
+PERIPHERAL_NUM = 0
+
+REPLAY_LOG = os.getenv("CORDIC_REGLOG_REPLAY")
+
+
+def assert_no_mismatches(dut, name, records, stats):
+    for index, got in stats["mismatches"][:10]:
+        dut._log.error(f"{name}: {describe(records[index], index)}, replay read {got:#x}")
+    assert not stats["mismatches"], f"{name}: {len(stats['mismatches'])} read(s) differ from the log"
+    accesses = stats["writes"] + stats["reads"]
+    dut._log.info(f"{name}: {accesses} accesses, {stats['skipped_polls']} BUSY polls skipped, "
+                  f"{accesses / max(stats['wall_s'], 1e-9):.0f} accesses/s")
+
+
+@cocotb.test()
+async def test_reg_log(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    path = default_reglog_dir() / "test_reg_log.reglog"
+    log = RegisterLog(path, FIXED_WIDTH)
+    tqv = TinyQV(dut, PERIPHERAL_NUM, log=log)
+    await tqv.reset()
+    dut._log.info("Testing Project Behaviour : register log and replay")
+
+    assert await tqv.read_word_reg(0) == 0xbadcaffe, "when reading from reg 0, we should see magic string '0xbadcaffe'"
+    assert await tqv.read_byte_reg(6) == 0, "status register should be 0 (READY TO BE RUN)"
+
+    for angle in (-75, -10, 0, 30, 89):
+        await test_sin_cos(dut, tqv, angle_deg=angle)
+    await test_sin_cos(dut, tqv, angle_deg=200, binary_angle=True)
+    for x in (-0.9, 0.25, 1.0):
+        await test_sinh_cosh(dut, tqv, x)
+    await _run_vectoring_once(dut, tqv, 3.0, 1.0)
+    await use_multiplication_mode_input_float(dut, tqv, 1.5, -2.25, FIXED_WIDTH - 5)
+    await use_division_mode_float_input(dut, tqv, 2.0, -1.5, FIXED_WIDTH - 5)
+    # an 8-bit write only changes the low byte of A, the replay has to keep the high ones
+    await run_cordic(dut, tqv, Mode.CIRCULAR, 1, 0x1234 << (FIXED_WIDTH - 16))
+    await tqv.write_byte_reg(REG_A, 0x56)
+    await tqv.write_byte_reg(0, 0b1001)
+    await wait_done(dut, tqv)
+    await tqv.read_hword_reg(4)
+    # the batched accesses of CordicDevice: skipped writes, one output read
+    await CordicDevice(tqv).mul(np.array([0.5, 0.5, 3.0, -7.25]), np.array([2.0, 2.0, 0.125, 0.5]))
+
+    total = log.close()
+    width, records = load_log(path)
+    dut._log.info(f"{total} accesses recorded to {path} ({path.stat().st_size} bytes)")
+    assert width == FIXED_WIDTH, f"log header holds width {width}"
+    assert len(records) == total, f"{len(records)} records read back, {total} recorded"
+    kinds = np.bincount(records["kind"], minlength=3)
+    assert kinds[RESET] == 1 and kinds[WRITE] > 0 and kinds[READ] > 0, f"unexpected record kinds {kinds}"
+    assert np.all(np.diff(records["t_ns"].astype(np.int64)) >= 0), "timestamps go backwards"
+
+    stats = await replay(records, TqvpCordicModel(width=FIXED_WIDTH))
+    assert_no_mismatches(dut, "model", records, stats)
+
+    stats = await replay(records, TinyQV(dut, PERIPHERAL_NUM))
+    assert_no_mismatches(dut, "harness", records, stats)
+
+    # one output read changed: the replay has to find exactly that one
+    changed = records.copy()
+    index = int(np.flatnonzero((changed["kind"] == READ) & (changed["reg"] == REG_OUT1))[3])
+    changed["value"][index] ^= 1
+    stats = await replay(changed, TqvpCordicModel(width=FIXED_WIDTH))
+    assert [i for i, _ in stats["mismatches"]] == [index], f"expected a mismatch at {index} only, got {stats['mismatches']}"
+
+
+@cocotb.test(skip=REPLAY_LOG is None)
+async def test_reg_log_replay(dut):
+    dut._log.info("Start")
+
+    # Set the clock period to 100 ns (10 MHz)
+    clock = Clock(dut.clk, 100, units="ns")
+    cocotb.start_soon(clock.start())
+
+    tqv = TinyQV(dut, PERIPHERAL_NUM)
+    await tqv.reset()
+    width, records = load_log(REPLAY_LOG)
+    assert width == FIXED_WIDTH, f"{REPLAY_LOG} was recorded on a {width}-bit build, this one is {FIXED_WIDTH}-bit"
+    dut._log.info(f"Replaying {len(records)} records of {REPLAY_LOG}")
+
+    stats = await replay(records, await all_instances(dut, tqv, PERIPHERAL_NUM))
+    assert_no_mismatches(dut, REPLAY_LOG, records, stats)
@@ -0,0 +1,84 @@
+# Unit tests of test_utils.StreamingMetrics on synthetic arrays, no simulator needed:
+#
+#   python -m pytest test_streaming_metrics.py
+#
+# (not a cocotb module, it is not in the MODULE list of the Makefile)
+
+import math
+
+import numpy as np
+import pytest
+
+from test_utils import StreamingMetrics
+
+LSB = 2.0 ** -14
+CHANNELS = ["sin", "cos"]
+INVARIANT = "cos²+sin²-1"
+
+
+def synthetic_sweep(n=181, seed=3):
+    """ An irregular grid (like an adaptive sweep) with its interval weights, and outputs a few LSBs off """
+    rng = np.random.default_rng(seed)
+    degs = np.sort(rng.uniform(-90.0, 90.0, n))
+    edges = np.concatenate([degs[:1], (degs[1:] + degs[:-1]) / 2, degs[-1:]])
+    weights = np.diff(edges)
+    rad = np.deg2rad(degs)
+    sins = np.sin(rad) + rng.integers(-6, 7, n) * LSB
+    coss = np.cos(rad) + rng.integers(-6, 7, n) * LSB
+    return degs, weights, sins, coss, np.sin(rad), np.cos(rad)
+
+
+def streamed(degs, weights, sins, coss, sin_true, cos_true, selections):
+    metrics = StreamingMetrics(LSB, CHANNELS, invariants=[INVARIANT])
+    for sel in selections:
+        metrics.update({"sin": sins[sel] - sin_true[sel], "cos": coss[sel] - cos_true[sel]},
+                       outputs=(coss[sel], sins[sel]), points=degs[sel], weights=weights[sel])
+    return metrics
+
+
+def test_means_match_weighted_average():
+    degs, weights, sins, coss, sin_true, cos_true = sweep = synthetic_sweep()
+    metrics = streamed(*sweep, [np.arange(len(degs))])
+    for name, err in (("sin", sins - sin_true), ("cos", coss - cos_true)):
+        assert math.isclose(metrics.mae(name), np.average(np.abs(err), weights=weights), rel_tol=1e-12)
+        assert math.isclose(metrics.rmse(name), math.sqrt(np.average(err * err, weights=weights)), rel_tol=1e-12)
+        assert metrics.max(name) == np.abs(err).max()
+        assert metrics.summary()[name]["worst_point"] == degs[np.argmax(np.abs(err))]
+    assert metrics.max(INVARIANT) == np.abs(coss * coss + sins * sins - 1.0).max()
+    assert metrics.hist.sum(axis=1).tolist() == [len(degs)] * 3
+
+
+def test_batches_and_shards_merge_to_the_whole_sweep():
+    sweep = synthetic_sweep()
+    index = np.arange(len(sweep[0]))
+    whole = streamed(*sweep, [index])
+
+    # two shards, each streamed in two batches and saved / restored like a .npz round trip
+    halves = [StreamingMetrics.from_state(streamed(*sweep, np.array_split(sel, 2)).state())
+              for sel in np.array_split(index, 2)]
+    merged = halves[0].merge(halves[1])
+
+    assert np.array_equal(merged.hist, whole.hist)
+    assert np.array_equal(merged.max_abs, whole.max_abs)
+    assert np.array_equal(merged.worst_point, whole.worst_point)
+    assert np.array_equal(merged.count, whole.count)
+    for name in CHANNELS + [INVARIANT]:
+        assert math.isclose(merged.mae(name), whole.mae(name), rel_tol=1e-12)
+        assert math.isclose(merged.rmse(name), whole.rmse(name), rel_tol=1e-12)
+
+
+def test_merge_rejects_other_channels():
+    with pytest.raises(ValueError):
+        StreamingMetrics(LSB, CHANNELS).merge(StreamingMetrics(LSB, ["sinh", "cosh"]))
+
+
+def test_channel_names_without_commas():
+    with pytest.raises(ValueError):
+        StreamingMetrics(LSB, ["theta, fixed format"])
+
+
+def test_invariants_need_the_outputs():
+    with pytest.raises(ValueError):
+        StreamingMetrics(LSB, CHANNELS, invariants=["unknown"])
+    with pytest.raises(ValueError):
+        StreamingMetrics(LSB, CHANNELS, invariants=[INVARIANT]).update({"sin": np.zeros(3)})
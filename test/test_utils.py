@@ -1,20 +1,134 @@
 from fixed_point import *
 import math 
+import os
+import functools
+import contextlib
+import logging
+import numpy as np
+import cocotb
 from cocotb.triggers import ClockCycles
+from cocotb.utils import get_sim_time
 from enum import IntEnum
 
+from tqv import TinyQV
+from trace_recorder import describe
+from lockstep import LockstepMonitor
+from profiler import profiled
+from cordic_model import CordicModel, default_fixed_width
+
 # When submitting your design, change this to the peripheral number
 # in peripherals.v.  e.g. if your design is i_user_peri05, set this to 5.
 # The peripheral number is not used by the test harness.
 PERIPHERAL_NUM = 0
 
+# FIXED_WIDTH of the build (make WIDTH=<n>), the default width of the helpers below
+FIXED_WIDTH = default_fixed_width()
+
+
+def shard_points(points):
+    """ Keep only this process' slice of a sweep.
+
+    run_parallel.py splits the sweeps by setting CORDIC_SHARD=index/count, each
+    shard gets one contiguous chunk of the points. Without it, all points are kept."""
+    spec = os.getenv("CORDIC_SHARD")
+    if not spec:
+        return points
+
+    index, count = (int(v) for v in spec.split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"invalid CORDIC_SHARD={spec}, expected index/count with 0 <= index < count")
+    return np.array_split(np.asarray(points), count)[index]
+
+async def all_instances(dut, tqv, peripheral_num=PERIPHERAL_NUM):
+    """ [tqv] followed by a reset TinyQV for every further harness instance of tb.v.
+
+    tb.v holds N_DUTS independent harness + CORDIC instances (make INSTANCES=<n>, default 1),
+    they only share the clock. The list goes to map_concurrent / run_sweep (adaptive_sweep.py). """
+    try:
+        count = int(dut.n_duts.value)
+    except AttributeError:
+        count = 1
+    tqvs = [tqv]
+    for instance in range(1, count):
+        extra = TinyQV(dut, peripheral_num, instance=instance)
+        await extra.reset()
+        tqvs.append(extra)
+    return tqvs
+
+async def map_concurrent(fn, items, tqvs):
+    """ await fn(tqv, item) for every item, returns the results in the order of items.
+
+    Every instance in tqvs gets its own cocotb task that keeps taking the next item, so with
+    INSTANCES=<n> up to n operations are in flight in one simulation. With a single instance
+    this is a plain loop. """
+    items = list(items)
+    if len(tqvs) == 1:
+        return [await fn(tqvs[0], item) for item in items]
+
+    results = [None] * len(items)
+    pending = iter(enumerate(items))
+
+    async def worker(tqv):
+        for index, item in pending:
+            results[index] = await fn(tqv, item)
+
+    tasks = [cocotb.start_soon(worker(tqv)) for tqv in tqvs]
+    for task in tasks:
+        await task
+    return results
+
+def waves_windowed():
+    """ True when the run was started with DUMP=window, i.e. tb.v only dumps while dump_enable is high """
+    return "dump_window" in cocotb.plusargs
+
+@contextlib.asynccontextmanager
+async def capture_waves(dut):
+    """ Dump waveforms only for the operations run inside this block (needs DUMP=window, no-op otherwise). """
+    if not waves_windowed():
+        yield
+        return
+
+    dut.dump_enable.value = 1
+    try:
+        yield
+    finally:
+        dut.dump_enable.value = 0
+
+def verbose(dut):
+    """ True when the per-operation details should be logged (COCOTB_LOG_LEVEL=DEBUG).
+    Otherwise the helpers below only record to the trace and log when a check fails. """
+    return dut._log.isEnabledFor(logging.DEBUG)
+
+def waves_on_failure(op):
+    """ Decorator for the operation helpers below: when a check fails, log the traced operation and,
+    with DUMP=window, run it once more inside capture_waves, so that the dump holds exactly the failing operation. """
+    @functools.wraps(op)
+    async def wrapper(dut, tqv, *args, **kwargs):
+        try:
+            return await op(dut, tqv, *args, **kwargs)
+        except AssertionError:
+            trace = kwargs.get("trace")
+            if trace is not None and trace.last is not None:
+                dut._log.error(f"{op.__name__} failed on {describe(trace.last)}")
+            if waves_windowed():
+                dut._log.warning(f"{op.__name__} failed, running it again with waveform dumping enabled")
+                async with capture_waves(dut):
+                    try:
+                        # the re-run is not traced, the record above already covers it, and bypasses the
+                        # cache, which holds the failing result by now and would answer without simulating
+                        await op(dut, tqv, *args, **{**kwargs, "trace": None, "cache": None})
+                    except AssertionError:
+                        pass
+            raise
+    return wrapper
 
 def angle_to_rad(angle):
     return angle * math.pi / 180.
 
 def assert_close(dut, name, pred, true, rtol=1e-3, atol=1e-3):
     
-    dut._log.info(f"checking for {name} : predicted = {pred:.5f}, true = {true:.5f}, rtol={rtol}, atol={atol}")
+    if verbose(dut):
+        dut._log.debug(f"checking for {name} : predicted = {pred:.5f}, true = {true:.5f}, rtol={rtol}, atol={atol}")
 
     if not math.isfinite(pred) or not math.isfinite(true):
         raise AssertionError(f"{name}: non-finite value (pred={pred}, true={true})")
@@ -32,6 +146,135 @@ def is_close_rtol(pred, true, r_tol = 1e-2):
 def is_close_atol(pred, true, a_tol = 1e-2):
     return abs(pred - true)  < a_tol
 
+# the invariants StreamingMetrics can track, as (out1, out2) -> residual
+INVARIANTS = {
+    "cos²+sin²-1": lambda cos, sin: cos * cos + sin * sin - 1.0,
+    "cosh²-sinh²-1": lambda cosh, sinh: cosh * cosh - sinh * sinh - 1.0,
+}
+
+class StreamingMetrics:
+    """ Error metrics of a sweep in constant memory: per channel (an output error or an invariant
+    residual of INVARIANTS) the weighted sums for MAE and RMSE, the max |error| and the point it
+    was seen at, and a histogram of |error| in LSBs (hist_bins-1 LSBs and more in the last bin).
+    lsb is the LSB of every channel, or a dict channel -> LSB for channels of different formats.
+
+    update() takes a batch of points as arrays; weights, e.g. adaptive_sweep.sweep_weights, make
+    the means equal sweep_mean. Two instances over disjoint points merge() into the metrics of
+    all of them (counts, maxima and histograms exactly, the sums up to rounding), so shards can
+    save state() into their .npz and run_parallel.py combines them. """
+
+    PREFIX = "metrics_"
+
+    def __init__(self, lsb, channels, invariants=(), hist_bins=64):
+        unknown = [name for name in invariants if name not in INVARIANTS]
+        if unknown:
+            raise ValueError(f"unknown invariant(s) {unknown}, expected some of {list(INVARIANTS)}")
+        self.channels = list(channels) + list(invariants)
+        self.invariants = list(invariants)
+        if any("," in name for name in self.channels):
+            raise ValueError(f"channel names can't contain ',', state() joins them with it: {self.channels}")
+        n = len(self.channels)
+        if isinstance(lsb, dict):
+            self.lsb = np.array([lsb[name] for name in self.channels], dtype=np.float64)
+        else:
+            self.lsb = np.full(n, float(lsb))
+        self.count = np.zeros(n, dtype=np.int64)
+        self.weight = np.zeros(n)
+        self.sum_abs = np.zeros(n)
+        self.sum_sq = np.zeros(n)
+        self.max_abs = np.zeros(n)
+        self.worst_point = np.full(n, np.nan)
+        self.hist = np.zeros((n, hist_bins), dtype=np.int64)
+
+    def update(self, errors, outputs=None, points=None, weights=None):
+        """ errors: channel -> error array of the batch (in output units); outputs: the (out1, out2)
+        arrays the invariants are computed from; points: the sweep inputs, for worst_point """
+        errors = dict(errors)
+        if self.invariants:
+            if outputs is None:
+                raise ValueError(f"the invariants {self.invariants} need the outputs of the batch")
+            out1, out2 = (np.asarray(v, dtype=np.float64) for v in outputs)
+            errors.update({name: INVARIANTS[name](out1, out2) for name in self.invariants})
+        for k, name in enumerate(self.channels):
+            if name not in errors:
+                continue
+            err = np.abs(np.asarray(errors[name], dtype=np.float64)).ravel()
+            if err.size == 0:
+                continue
+            w = np.ones_like(err) if weights is None else np.asarray(weights, dtype=np.float64).ravel()
+            self.count[k] += err.size
+            self.weight[k] += w.sum()
+            self.sum_abs[k] += np.dot(w, err)
+            self.sum_sq[k] += np.dot(w, err * err)
+            worst = int(np.argmax(err))
+            if err[worst] > self.max_abs[k] or self.count[k] == err.size:
+                self.max_abs[k] = err[worst]
+                self.worst_point[k] = np.nan if points is None else np.asarray(points, dtype=np.float64).ravel()[worst]
+            lsbs = np.minimum(np.rint(err / self.lsb[k]), self.hist.shape[1] - 1).astype(np.int64)
+            self.hist[k] += np.bincount(lsbs, minlength=self.hist.shape[1])
+
+    def merge(self, other):
+        """ Add the metrics of other (same channels, LSB and bins) to these; returns self """
+        if other.channels != self.channels or not np.array_equal(other.lsb, self.lsb) or other.hist.shape != self.hist.shape:
+            raise ValueError("only metrics of the same channels, LSB and histogram bins can be merged")
+        worse = (other.max_abs > self.max_abs) | ((self.count == 0) & (other.count > 0))
+        self.max_abs = np.where(worse, other.max_abs, self.max_abs)
+        self.worst_point = np.where(worse, other.worst_point, self.worst_point)
+        self.count += other.count
+        self.weight += other.weight
+        self.sum_abs += other.sum_abs
+        self.sum_sq += other.sum_sq
+        self.hist += other.hist
+        return self
+
+    def _index(self, channel):
+        return self.channels.index(channel)
+
+    def mae(self, channel):
+        k = self._index(channel)
+        return float(self.sum_abs[k] / self.weight[k]) if self.weight[k] else math.nan
+
+    def rmse(self, channel):
+        k = self._index(channel)
+        return float(math.sqrt(self.sum_sq[k] / self.weight[k])) if self.weight[k] else math.nan
+
+    def max(self, channel):
+        return float(self.max_abs[self._index(channel)])
+
+    def summary(self):
+        """ {channel: {"MAE", "RMSE", "MAX", "worst_point", "count"}} in output units """
+        return {name: {"MAE": self.mae(name), "RMSE": self.rmse(name), "MAX": self.max(name),
+                       "worst_point": float(self.worst_point[k]), "count": int(self.count[k])}
+                for k, name in enumerate(self.channels)}
+
+    def log(self, log):
+        """ One line per channel, in output units and in LSBs """
+        for lsb, (name, m) in zip(self.lsb, self.summary().items()):
+            log(f"{name:<14} MAE={m['MAE']:.6g} ({m['MAE'] / lsb:.3f} LSB), RMSE={m['RMSE']:.6g} "
+                f"({m['RMSE'] / lsb:.3f} LSB), MAX={m['MAX']:.6g} ({m['MAX'] / lsb:.3f} LSB) "
+                f"at {m['worst_point']:.6g}, {m['count']} points")
+
+    def state(self):
+        """ The arrays to np.savez next to the raw results, keys starting with PREFIX """
+        p = self.PREFIX
+        return {p + "channels": ",".join(self.channels), p + "invariants": ",".join(self.invariants),
+                p + "lsb": self.lsb, p + "count": self.count, p + "weight": self.weight,
+                p + "sum_abs": self.sum_abs, p + "sum_sq": self.sum_sq, p + "max_abs": self.max_abs,
+                p + "worst_point": self.worst_point, p + "hist": self.hist}
+
+    @classmethod
+    def from_state(cls, data):
+        """ The metrics a state() was saved from, data is a dict or an opened .npz """
+        p = cls.PREFIX
+        invariants = [name for name in str(data[p + "invariants"]).split(",") if name]
+        channels = [name for name in str(data[p + "channels"]).split(",") if name]
+        metrics = cls(dict(zip(channels, np.asarray(data[p + "lsb"], dtype=np.float64))),
+                      channels[:len(channels) - len(invariants)], invariants,
+                      hist_bins=np.asarray(data[p + "hist"]).shape[1])
+        for key in ("count", "weight", "sum_abs", "sum_sq", "max_abs", "worst_point", "hist"):
+            setattr(metrics, key, np.array(data[p + key], dtype=getattr(metrics, key).dtype))
+        return metrics
+
 def format_to_fixed_width(value, width):
     return format(value, f'0{width}b')
 
@@ -44,15 +287,24 @@ class Mode(IntEnum):
 # BITS for mode
 MODE_BITS           = 1
 IS_ROTATING_BIT     = 3 
-
-
-def pack_config(mode : Mode, is_rotating , start):
-    v = 0
+# CIRCULAR rotate: A is a binary angle (2^width = one full turn) instead of Q2.(width-2) radians
+BINARY_ANGLE_BIT    = 4
+# LINEAR: done as soon as the residual is zero instead of after all iterations
+EARLY_EXIT_BIT      = 5
+# on a start: A = out1, B = out2 of the last operation (chaining, cordic_chain.py)
+FORWARD_A_BIT       = 6
+FORWARD_B_BIT       = 7
+
+
+def pack_config(mode : Mode, is_rotating , start, flags=0):
+    # flags: the option bits above the mode, e.g. 1 << BINARY_ANGLE_BIT
+    v = int(flags)
     v |= int(mode) << MODE_BITS
     v |= int(is_rotating) << IS_ROTATING_BIT
     v |= int(start) 
     return v
 
+@profiled
 async def wait_done(dut,tqv, busy_val = 1, done_val = 2, 
                     status_addr=6, max_cycles_before_timeout=100):
     """ Poll status register until DONE or timeout. check BUSY"""
@@ -71,36 +323,117 @@ async def wait_done(dut,tqv, busy_val = 1, done_val = 2,
 
     raise TimeoutError(f"Timeout waiting for DONE status (status={status}).")
 
-async def read_out_pair_signed(dut, tqv, width=16):
-    out1 = await tqv.read_hword_reg(4)
-    out2 = await tqv.read_hword_reg(5)
+@profiled
+async def read_out_pair_signed(dut, tqv, width=FIXED_WIDTH):
+    # wider outputs need a 32-bit read, the registers are zero-extended to the bus
+    read = tqv.read_hword_reg if width <= 16 else tqv.read_word_reg
+    out1 = await read(4)
+    out2 = await read(5)
 
     return sign_extend(out1, width), sign_extend(out2, width)
 
-async def test_sin_cos(dut, tqv, angle_deg, width=16, rtol=0.01, atol=0.01):
+@profiled
+async def run_cordic(dut, tqv, mode, is_rotating, A, B=None, shift=None, width=FIXED_WIDTH, cache=None, trace=None, flags=0):
+    """ Run one operation on raw register values: write A (and B / shift when given), start,
+    wait for DONE and read both outputs. Returns (out1, out2, done_after), outputs sign-extended.
+    flags are the config option bits (e.g. 1 << BINARY_ANGLE_BIT) written together with the start.
+
+    With a ResultCache (result_cache.py), a point simulated before with the same design is
+    returned from the cache instead, unless it was picked for re-verification.
+    With a TraceRecorder (trace_recorder.py), the operation is appended to the trace.
+    With CORDIC_LOCKSTEP=1, every iteration is checked against cordic_model.py (lockstep.py). """
+    key = cached = None
+    t_start = get_sim_time(units="ns")
+    if cache is not None:
+        key = cache.key(mode, is_rotating, A, B, shift, width=width, flags=flags)
+        cached = cache.get(key)
+        if cached is not None and not cache.should_verify():
+            if trace is not None:
+                trace.record(mode, is_rotating, A, B, shift, *cached, t_start, t_start, cached=True, flags=flags)
+            return cached
+
+    await tqv.write_word_reg(1, A & ((1 << width) - 1))
+    if B is not None:
+        await tqv.write_word_reg(2, B & ((1 << width) - 1))
+    if shift is not None:
+        await tqv.write_byte_reg(3, shift)
+
+    lockstep = LockstepMonitor.attach(dut, tqv)
+    config_to_write = pack_config(mode, is_rotating=is_rotating, start=1, flags=flags)
+    if verbose(dut):
+        dut._log.debug(f"Configuring CORDIC with {config_to_write:#04x} ({bin(config_to_write)}) (mode={int(mode)}, is_rotating={int(is_rotating)}, start=1)")
+    await tqv.write_byte_reg(0, config_to_write)
+
+    done_after = await wait_done(dut, tqv, busy_val=1, done_val=2, status_addr=6)
+    t_done = get_sim_time(units="ns")
+    if verbose(dut):
+        dut._log.debug(f"Started CORDIC, done after {done_after} cycles")
+
+    out1_raw, out2_raw = await read_out_pair_signed(dut, tqv, width=width)
+    result = (out1_raw, out2_raw, done_after)
+
+    if lockstep is not None:
+        lockstep.check()
+    if trace is not None:
+        trace.record(mode, is_rotating, A, B, shift, *result, t_start, t_done, flags=flags)
+
+    if cache is not None:
+        if cached is not None:
+            cache.check(key, cached, result)
+        cache.put(key, result)
+    return result
+
+@profiled
+async def run_cordic_timed(dut, tqv, mode, is_rotating, A, B=None, shift=None, width=FIXED_WIDTH, flags=0, max_cycles=100):
+    """ run_cordic timed by the done pulse (user_interrupt) instead of the status register, which is
+    only read every few hundred clocks. Returns (out1, out2, cycles), cycles being the clocks from the
+    start to done, CordicModel.cycles. Neither cached nor traced: the timing is what is measured. """
+    await tqv.write_word_reg(1, A & ((1 << width) - 1))
+    if B is not None:
+        await tqv.write_word_reg(2, B & ((1 << width) - 1))
+    if shift is not None:
+        await tqv.write_byte_reg(3, shift)
+
+    lockstep = LockstepMonitor.attach(dut, tqv)
+    await tqv.write_byte_reg(0, pack_config(mode, is_rotating=is_rotating, start=1, flags=flags))
+    # the done pulse reads high cycles + 1 clocks after the config write returns
+    cycles = -1
+    while not await tqv.is_interrupt_asserted():
+        if cycles == max_cycles:
+            raise TimeoutError(f"no done pulse within {max_cycles} cycles")
+        await ClockCycles(dut.clk, 1)
+        cycles += 1
+
+    out1, out2 = await read_out_pair_signed(dut, tqv, width=width)
+    if lockstep is not None:
+        lockstep.check()
+    return out1, out2, cycles
+
+@profiled
+@waves_on_failure
+async def test_sin_cos(dut, tqv, angle_deg, width=FIXED_WIDTH, rtol=0.01, atol=0.01, cache=None, trace=None, binary_angle=False):
     
     angle_rad = angle_to_rad(angle_deg)
-    angle_fixed_point = float_to_fixed(angle_rad, 16, 2)  # 16 bits, 2 integer bits
-    dut._log.info(f"[CIRC ROT] angle={angle_deg:.3f}° rad={angle_rad:.6f} z={format_bin(angle_fixed_point, width)}")
-    await tqv.write_word_reg(1, angle_fixed_point)
-
+    if binary_angle:
+        # fraction of a full turn, any angle (wraps around)
+        angle_fixed_point = float_to_turns(angle_rad, width)
+    else:
+        angle_fixed_point = float_to_fixed(angle_rad, width, 2)  # 2 integer bits
+    if verbose(dut):
+        dut._log.debug(f"[CIRC ROT] angle={angle_deg:.3f}° rad={angle_rad:.6f} z={format_bin(angle_fixed_point, width)}")
 
     # configure the cordic : set the mode to ROTATING, CIRCULAR, and running
     # this corresponds to setting it to       {1'b1,,  2'b00,         1'b1 }    
-    config_to_write = pack_config(Mode.CIRCULAR, is_rotating=1, start=1)    
-    dut._log.info(f"Configuring CORDIC with {config_to_write:#04x} ({bin(config_to_write)}) (mode={int(Mode.CIRCULAR)}, is_rotating=1, start=1)")
-    await tqv.write_byte_reg(0, config_to_write)
-    
-    done_after = await wait_done(dut, tqv, busy_val=1, done_val=2, status_addr=6, max_cycles_before_timeout=20)
-    dut._log.info(f"Started CORDIC, done after {done_after} cycles")
-    
-    out1_raw, out2_raw = await read_out_pair_signed(dut, tqv, width=width)  
+    out1_raw, out2_raw, _ = await run_cordic(dut, tqv, Mode.CIRCULAR, 1, angle_fixed_point, width=width, cache=cache, trace=trace,
+                                             flags=int(binary_angle) << BINARY_ANGLE_BIT)
     
     # conver to floating point for easier comparison
-    cos_predicted = fixed_to_float(out1_raw, 16, 2)
-    sin_predicted = fixed_to_float(out2_raw, 16, 2)
+    cos_predicted = fixed_to_float(out1_raw, width, 2)
+    sin_predicted = fixed_to_float(out2_raw, width, 2)
     sin_true = math.sin(angle_rad)
     cos_true = math.cos(angle_rad)
+    if trace is not None:
+        trace.set_error(max(abs(cos_predicted - cos_true), abs(sin_predicted - sin_true)))
 
     # Check outputs
     assert_close(dut, f"cos({angle_deg})", cos_predicted, cos_true, rtol=rtol, atol=atol)
@@ -110,28 +443,25 @@ async def test_sin_cos(dut, tqv, angle_deg, width=16, rtol=0.01, atol=0.01):
     assert_invariant("circular", cos_predicted*cos_predicted + sin_predicted*sin_predicted, 1.0, tol=5e-3)
     return out1_raw, out2_raw
 
-async def test_sinh_cosh(dut, tqv, x, width=16, rtol=0.01, atol=0.01):
+@profiled
+@waves_on_failure
+async def test_sinh_cosh(dut, tqv, x, width=FIXED_WIDTH, rtol=0.01, atol=0.01, cache=None, trace=None):
 
-    angle_fixed_point = float_to_fixed(x, 16, 2)  # 16 bits, 2 integer bits
-    dut._log.info(f"[HYPERBOLIC ROT] inp={x:.4f} z={format_bin(angle_fixed_point, width)}")
-    await tqv.write_word_reg(1, angle_fixed_point)
+    angle_fixed_point = float_to_fixed(x, width, 2)  # 2 integer bits
+    if verbose(dut):
+        dut._log.debug(f"[HYPERBOLIC ROT] inp={x:.4f} z={format_bin(angle_fixed_point, width)}")
 
     # configure the cordic : set the mode to ROTATING, hyperbolic, and running
     # this corresponds to setting it to       {1'b1,  2'b10,         1'b1 }
-    config_to_write = pack_config(Mode.HYPERBOLIC, is_rotating=1, start=1)
-    dut._log.info(f"Configuring CORDIC with {config_to_write:#04x} ({bin(config_to_write)}) (mode={int(Mode.HYPERBOLIC)}, is_rotating=1, start=1)")
-    await tqv.write_byte_reg(0, config_to_write)
-   
-    done_after = await wait_done(dut, tqv, busy_val=1, done_val=2, status_addr=6, max_cycles_before_timeout=20)
-    dut._log.info(f"Started CORDIC, done after {done_after} cycles")
-
-    out1_raw, out2_raw = await read_out_pair_signed(dut, tqv, width=width)  
+    out1_raw, out2_raw, _ = await run_cordic(dut, tqv, Mode.HYPERBOLIC, 1, angle_fixed_point, width=width, cache=cache, trace=trace)
 
     # conver to floating point for easier comparison
-    cosh_predicted = fixed_to_float(out1_raw, 16, 2)
-    sinh_predicted = fixed_to_float(out2_raw, 16, 2)
+    cosh_predicted = fixed_to_float(out1_raw, width, 2)
+    sinh_predicted = fixed_to_float(out2_raw, width, 2)
     sinh_true = math.sinh(x)
     cosh_true = math.cosh(x)
+    if trace is not None:
+        trace.set_error(max(abs(cosh_predicted - cosh_true), abs(sinh_predicted - sinh_true)))
 
     # Check outputs
     assert_close(dut, f"cosh({x})", cosh_predicted, cosh_true, rtol=rtol, atol=atol)
@@ -141,8 +471,10 @@ async def test_sinh_cosh(dut, tqv, x, width=16, rtol=0.01, atol=0.01):
     assert_invariant("hyperbolic", cosh_predicted*cosh_predicted - sinh_predicted*sinh_predicted, 1.0, tol=5e-3)
     return out1_raw, out2_raw
 
+@profiled
+@waves_on_failure
 async def use_multiplication_mode_input_float(dut, tqv, a, b, alpha_one_position, 
-                                              width=16, rtol=1e-2, atol=1e-3):
+                                              width=FIXED_WIDTH, rtol=1e-2, atol=1e-3, cache=None, trace=None):
     
     XY_INT = width - alpha_one_position
     Z_INT = width - alpha_one_position
@@ -150,35 +482,30 @@ async def use_multiplication_mode_input_float(dut, tqv, a, b, alpha_one_position
     A = float_to_fixed(a, width=width, integer_part=XY_INT)
     B = float_to_fixed(b, width=width, integer_part=Z_INT)
 
-    await tqv.write_word_reg(1, A)
-    await tqv.write_word_reg(2, B)
-    await tqv.write_byte_reg(3, alpha_one_position)
-
     # configure the cordic : set the mode to ROTATING, LINEAR, and running
     # this corresponds to setting it to       {1'b1,,  2'b00,         1'b1 }
-    
-    config_to_write = pack_config(Mode.LINEAR, is_rotating=1, start=1) 
-    dut._log.info(f"[LIN ROT MUL] a={a}, b={b}, A={format_bin(A,width)}, B={format_bin(B,width)}, alpha_pos={alpha_one_position}")
-    dut._log.info(f"input to module is A={A}(float={a}, fixed={float_to_fixed(A, width, XY_INT)}), B={B}(float={b}, fixed={float_to_fixed(B, width, Z_INT)})")
-    await tqv.write_byte_reg(0, config_to_write)
-    
-    await wait_done(dut, tqv)
-   
-    x_raw, y_raw = await read_out_pair_signed(dut, tqv, width=width)
+    if verbose(dut):
+        dut._log.debug(f"[LIN ROT MUL] a={a}, b={b}, A={format_bin(A,width)}, B={format_bin(B,width)}, alpha_pos={alpha_one_position}")
+        dut._log.debug(f"input to module is A={A}(float={a}, fixed={float_to_fixed(A, width, XY_INT)}), B={B}(float={b}, fixed={float_to_fixed(B, width, Z_INT)})")
+    x_raw, y_raw, _ = await run_cordic(dut, tqv, Mode.LINEAR, 1, A, B, shift=alpha_one_position, width=width, cache=cache, trace=trace)
     x_f = fixed_to_float(x_raw, width, XY_INT)
     y_f = fixed_to_float(y_raw, width, XY_INT)
 
-    dut._log.info(f"in floating point a={a}, b={b}, prod={a * b}")
-    dut._log.info(f"output from module is out1={x_raw}(float={x_f}, fixed=), out2={y_raw}(float={y_f})")
+    if verbose(dut):
+        dut._log.debug(f"in floating point a={a}, b={b}, prod={a * b}")
+        dut._log.debug(f"output from module is out1={x_raw}(float={x_f}, fixed=), out2={y_raw}(float={y_f})")
 
     prod_true = a * b
+    if trace is not None:
+        trace.set_error(abs(x_f - prod_true))
 
     # compare to
     assert_close(dut, f"mul({fixed_to_float(A, width, XY_INT)}, {fixed_to_float(B, width, Z_INT)})", x_f, prod_true, rtol=rtol, atol=atol)
-    dut._log.info(f"\n")
     return x_raw, y_raw
 
-async def use_division_mode_float_input(dut, tqv, a, b, alpha_one_position, width=16, tol_mode="rel", tol=0.01):
+@profiled
+@waves_on_failure
+async def use_division_mode_float_input(dut, tqv, a, b, alpha_one_position, width=FIXED_WIDTH, tol_mode="rel", tol=0.01, cache=None, trace=None):
 
     XY_INT = width - alpha_one_position
     Z_INT  = width - alpha_one_position
@@ -187,37 +514,30 @@ async def use_division_mode_float_input(dut, tqv, a, b, alpha_one_position, widt
     A = float_to_fixed(a, width=width, integer_part=XY_INT)
     B = float_to_fixed(b, width=width, integer_part=Z_INT) 
 
-    dut._log.info(f"[LIN ROT MUL] a={a}, b={b}, A={format_bin(A,width)}, B={format_bin(B,width)}, alpha_pos={alpha_one_position}")
-    dut._log.info(f"input to module is A={A}(float={a}, fixed={float_to_fixed(A, width, XY_INT)}), B={B}(float={b}, fixed={float_to_fixed(B, width, Z_INT)})")    
-    await tqv.write_word_reg(1, A)
-    await tqv.write_word_reg(2, B)
-    await tqv.write_byte_reg(3, alpha_one_position)
-    
-    cfg = pack_config(Mode.LINEAR, is_rotating=0, start=1)
-
-    dut._log.info(f"[LIN VEC DIV] a={a}, b={b}, A={format_bin(A,width)}, B={format_bin(B,width)}, alpha_pos={alpha_one_position}")
-    await tqv.write_byte_reg(0, cfg)
-    await wait_done(dut, tqv)
-    
-    x_raw, y_raw = await read_out_pair_signed(dut, tqv, width=width)
+    if verbose(dut):
+        dut._log.debug(f"input to module is A={A}(float={a}, fixed={float_to_fixed(A, width, XY_INT)}), B={B}(float={b}, fixed={float_to_fixed(B, width, Z_INT)})")    
+        dut._log.debug(f"[LIN VEC DIV] a={a}, b={b}, A={format_bin(A,width)}, B={format_bin(B,width)}, alpha_pos={alpha_one_position}")
+    x_raw, y_raw, _ = await run_cordic(dut, tqv, Mode.LINEAR, 0, A, B, shift=alpha_one_position, width=width, cache=cache, trace=trace)
     x_f = fixed_to_float(x_raw, width, XY_INT)
     y_f = fixed_to_float(y_raw, width, XY_INT)
     
     div_true = b / a
+    if trace is not None:
+        trace.set_error(abs(x_f - div_true))
 
-    dut._log.info(f"in floating point a={a}, b={b}, div={b/a}")
-    dut._log.info(f"output from module is out1={x_raw}(float={x_f}, fixed=), out2={y_raw}(float={y_f})")
+    if verbose(dut):
+        dut._log.debug(f"in floating point a={a}, b={b}, div={b/a}")
+        dut._log.debug(f"output from module is out1={x_raw}(float={x_f}, fixed=), out2={y_raw}(float={y_f})")
     
     # compare against output
     assert_close(dut, f"div({fixed_to_float(B, width, Z_INT)}, {fixed_to_float(A, width, XY_INT)})", x_f, div_true, rtol=tol if tol_mode=="rel" else 0, atol=tol if tol_mode=="abs" else 0)
-    dut._log.info(f"\n")
     return x_raw, y_raw
 
 async def test_vectoring_hyperbolic(dut, tqv, a, b, alpha_one_position, 
-                                    width=16, XY_INT=5, Z_INT=5, rtol=1e-2, atol=1e-3):
+                                    width=FIXED_WIDTH, XY_INT=5, Z_INT=5, rtol=1e-2, atol=1e-3):
 
-    x_float = float_to_fixed(a, 16, XY_INT)  # 16 bits, 5 integer bits
-    y_float = float_to_fixed(b, 16, Z_INT)   # 16 bits, 5 integer bits
+    x_float = float_to_fixed(a, width, XY_INT)  # 5 integer bits
+    y_float = float_to_fixed(b, width, Z_INT)   # 5 integer bits
 
     # write the valeus 
     await tqv.write_word_reg(1, x_float)
@@ -239,27 +559,68 @@ async def test_vectoring_hyperbolic(dut, tqv, a, b, alpha_one_position,
     out1_raw, out2_raw = await read_out_pair_signed(dut, tqv, width=width)  
 
     # convert to floating point for easier comparison
-    out1_float = fixed_to_float(out1_raw, 16, width=width)
-    out2_float = fixed_to_float(out2_raw, 16, width=width)
+    out1_float = fixed_to_float(out1_raw, width, XY_INT)
+    out2_float = fixed_to_float(out2_raw, width, 2)
 
     return  out1_raw, out1_float, out2_raw, out2_float
 
-async def _run_vectoring_once(dut, tqv, x_float, y_float, WIDTH=16, XY_INT=5):
+@profiled
+async def _run_vectoring_once(dut, tqv, x_float, y_float, WIDTH=FIXED_WIDTH, XY_INT=5, cache=None, trace=None):
     
     A = float_to_fixed(x_float, WIDTH, XY_INT)
     B = float_to_fixed(y_float, WIDTH, XY_INT)
     
-    await tqv.write_word_reg(1, A) # write first input 
-    await tqv.write_word_reg(2, B) # write second input
-    
-    # Configure Hyperbolic Vectoring mode
-    cfg = pack_config(Mode.HYPERBOLIC, is_rotating=0, start=1)
-    await tqv.write_byte_reg(0, cfg)
-    await wait_done(dut, tqv)
-    
-    # read results 
-    out1_raw, out2_raw = await read_out_pair_signed(dut, tqv, width=WIDTH)
+    # Configure Hyperbolic Vectoring mode, write both inputs and read the results
+    out1_raw, out2_raw, _ = await run_cordic(dut, tqv, Mode.HYPERBOLIC, 0, A, B, width=WIDTH, cache=cache, trace=trace)
     
     r_out = fixed_to_float(out1_raw, WIDTH, XY_INT)  # decode with XY format
-    z_out = fixed_to_float(out2_raw, WIDTH, 2)   # decode with Z format (Q2.14)
-    return r_out, z_out, out1_raw, out2_raw
\ No newline at end of file
+    z_out = fixed_to_float(out2_raw, WIDTH, 2)   # decode with Z format (Q2.(WIDTH-2))
+    return r_out, z_out, out1_raw, out2_raw
+
+# the iterations grow (x, y) by up to the gain K_C, cartesian_to_polar keeps this much of the range free on top
+POLAR_HEADROOM = 0.98
+
+@profiled
+async def cartesian_to_polar(dut, tqvs, xs, ys, width=FIXED_WIDTH, scale=None, cache=None, trace=None):
+    """ (r, theta) of the points (xs[i], ys[i]) in circular vectoring mode, as float arrays with
+    theta in [-pi, pi]. The points are spread over the harness instances in tqvs (all_instances).
+
+    The core only converges for x >= 0, so a point with x < 0 is mirrored through the origin and
+    theta turned back by pi afterwards. out1 is K_C * r, the gain is divided out here.
+    scale picks the fixed-point format of A and B: None scales every point on its own so that K_C * r
+    fills the register (most precise), a number scales all points alike, raw = round(v * scale),
+    e.g. 2 ** 11 for Q5.11; a point that would overflow at that scale raises ValueError. """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if xs.shape != ys.shape:
+        raise ValueError(f"xs and ys differ in shape: {xs.shape} vs {ys.shape}")
+
+    mirrored = xs < 0
+    xm = np.where(mirrored, -xs, xs)
+    ym = np.where(mirrored, -ys, ys)
+    magnitude = np.hypot(xm, ym)
+
+    gain = CordicModel(width=width).circular_gain()
+    r_max = POLAR_HEADROOM * ((1 << (width - 1)) - 1) / gain
+    if scale is None:
+        scales = r_max / np.where(magnitude > 0, magnitude, r_max)
+    else:
+        scales = np.full(xs.shape, float(scale))
+        overflow = magnitude * scales > r_max
+        if np.any(overflow):
+            raise ValueError(f"{np.count_nonzero(overflow)} points overflow at scale {scale}: "
+                             f"|(x, y)| has to stay below {r_max / float(scale):.6g}")
+    A = np.rint(xm * scales).astype(np.int64)
+    B = np.rint(ym * scales).astype(np.int64)
+
+    async def convert(tqv, point):
+        out1, out2, _ = await run_cordic(dut, tqv, Mode.CIRCULAR, 0, int(point[0]), int(point[1]),
+                                         width=width, cache=cache, trace=trace)
+        return out1, out2
+
+    outs = np.array(await map_concurrent(convert, list(zip(A.ravel(), B.ravel())), tqvs), dtype=np.float64).reshape(-1, 2)
+    r = outs[:, 0] / (gain * scales.ravel())
+    theta = outs[:, 1] / (1 << (width - 2))
+    theta = np.where(mirrored.ravel(), np.where(ys.ravel() >= 0, theta + math.pi, theta - math.pi), theta)
+    return r.reshape(xs.shape), theta.reshape(xs.shape)
+
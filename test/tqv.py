@@ -2,66 +2,87 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from cocotb.triggers import ClockCycles
+from cocotb.utils import get_sim_time
 
 from tqv_reg import spi_write_cpha0, spi_read_cpha0
+from reg_log import RegisterLog, WRITE, READ, RESET
 
 # This class provides access to the peripheral's registers.
 # This implementation uses the SPI interface embedded in this project,
 # but when the peripheral is added to TinyQV a different implementation
 # is used that reads and writes the registers using Risc-V commands:
 # https://github.com/MichaelBell/ttsky25a-tinyQV/blob/main/test/tqv.py
+#
+# tb.v can hold several independent harness instances (make INSTANCES=<n>), instance
+# selects which one this object talks to. Instance 0 is wired to the top level signals.
+#
+# log is a reg_log.RegisterLog that gets every access; by default the one of
+# CORDIC_REGLOG, shared by every TinyQV of the process, or none.
 class TinyQV:
-    def __init__(self, dut, peripheral_num):
+    def __init__(self, dut, peripheral_num, instance=0, log=None):
         self.dut = dut
+        self.instance = instance
+        self.io = dut if instance == 0 else dut.extra[instance]
+        self.log = RegisterLog.open() if log is None else log
+
+    async def _logged(self, kind, reg, size, access, value=0):
+        if self.log is None:
+            return await access
+        t_ns = get_sim_time(units="ns")
+        result = await access
+        self.log.record(kind, self.instance, reg, size, value if result is None else result, t_ns)
+        return result
 
     # Reset the design, this reset will initialize TinyQV and connect
     # all inputs and outputs to your peripheral.
     async def reset(self):
         self.dut._log.info("Reset")
-        self.dut.ena.value = 1
-        self.dut.ui_in.value = 0
-        self.dut.uio_in.value = 0
-        self.dut.rst_n.value = 0
+        if self.log is not None:
+            self.log.record(RESET, self.instance, 0, 0, 0, get_sim_time(units="ns"))
+        self.io.ena.value = 1
+        self.io.ui_in.value = 0
+        self.io.uio_in.value = 0
+        self.io.rst_n.value = 0
         await ClockCycles(self.dut.clk, 10)
-        self.dut.rst_n.value = 1  
-        assert self.dut.uio_oe.value == 0b00001011
+        self.io.rst_n.value = 1  
+        assert self.io.uio_oe.value == 0b00001011
 
     # Write a value to a byte register in your design
     # reg is the address of the register in the range 0-15
     # value is the value to be written, in the range 0-255
     async def write_byte_reg(self, reg, value):
-        await spi_write_cpha0(self.dut.clk, self.dut.uio_in, reg, value, 0)
+        await self._logged(WRITE, reg, 1, spi_write_cpha0(self.dut.clk, self.io.uio_in, reg, value, 0), value)
 
     # Read the value of a byte register from your design
     # reg is the address of the register in the range 0-15
     # The returned value is the data read from the register, in the range 0-255
     async def read_byte_reg(self, reg):
-        return await spi_read_cpha0(self.dut.clk, self.dut.uio_in, self.dut.uio_out, self.dut.uio_out[1], reg, 0, 0)
+        return await self._logged(READ, reg, 1, spi_read_cpha0(self.dut.clk, self.io.uio_in, self.io.uio_out, self.io.uio_out[1], reg, 0, 0))
 
     # Write a value to a half word register in your design
     # reg is the address of the register in the range 0-15
     # value is the value to be written, in the range 0-65535
     async def write_hword_reg(self, reg, value):
-        await spi_write_cpha0(self.dut.clk, self.dut.uio_in, reg, value, 1)
+        await self._logged(WRITE, reg, 2, spi_write_cpha0(self.dut.clk, self.io.uio_in, reg, value, 1), value)
 
     # Read the value of a half word register from your design
     # reg is the address of the register in the range 0-15
     # The returned value is the data read from the register, in the range 0-65535
     async def read_hword_reg(self, reg):
-        return await spi_read_cpha0(self.dut.clk, self.dut.uio_in, self.dut.uio_out, self.dut.uio_out[1], reg, 0, 1)
+        return await self._logged(READ, reg, 2, spi_read_cpha0(self.dut.clk, self.io.uio_in, self.io.uio_out, self.io.uio_out[1], reg, 0, 1))
 
     # Write a value to a word register in your design
     # reg is the address of the register in the range 0-15
     # value is the value to be written
     async def write_word_reg(self, reg, value):
-        await spi_write_cpha0(self.dut.clk, self.dut.uio_in, reg, value, 2)
+        await self._logged(WRITE, reg, 4, spi_write_cpha0(self.dut.clk, self.io.uio_in, reg, value, 2), value)
 
     # Read the value of a word register from your design
     # reg is the address of the register in the range 0-15
     # The returned value is the data read from the register
     async def read_word_reg(self, reg):
-        return await spi_read_cpha0(self.dut.clk, self.dut.uio_in, self.dut.uio_out, self.dut.uio_out[1], reg, 0, 2)
+        return await self._logged(READ, reg, 4, spi_read_cpha0(self.dut.clk, self.io.uio_in, self.io.uio_out, self.io.uio_out[1], reg, 0, 2))
     
     # Check whether the user interrupt is asserted
     async def is_interrupt_asserted(self):
-        return self.dut.uio_out[0].value == 1
+        return self.io.uio_out[0].value == 1
@@ -5,6 +5,8 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles
 
+from profiler import profiled
+
 def get_bit(value, bit_index):
   temp = value & (1 << bit_index)
   return temp
@@ -54,6 +56,7 @@ def spi_miso_read(port):
 
 SPI_HALF_CYCLE_DELAY = 2
 
+@profiled
 async def spi_write_cpha0 (clk, port, address, data, width):
 
   temp = port.value;
@@ -151,6 +154,7 @@ async def spi_write_cpha0 (clk, port, address, data, width):
   await ClockCycles(clk, SPI_HALF_CYCLE_DELAY)  
 
 
+@profiled
 async def spi_read_cpha0 (clk, port_in, port_out, data_ready, address, data, width):
   
   temp = port_in.value;
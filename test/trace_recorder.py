@@ -0,0 +1,139 @@
+# Binary per-operation trace of the sweeps.
+#
+# Every CORDIC operation run through run_cordic (test_utils.py) appends one fixed-size
+# record to a preallocated NumPy buffer: the register-level inputs, the raw outputs,
+# the simulation time at start and done, the number of status polls and the error of
+# the result against the float reference. Full buffers are written out as numbered
+# .npy chunks, so a long sweep never holds more than one chunk in memory and the
+# data can be analysed afterwards without parsing logs:
+#
+#   from trace_recorder import load_trace
+#   trace = load_trace("artifacts/traces", "circular_rotating")
+#   print(trace["error"].max())
+#
+# Environment variables:
+#   CORDIC_TRACE=off     do not record
+#   CORDIC_TRACE_DIR     where the chunks go (default: <CORDIC_PLOTS_DIR>/artifacts/traces)
+#   CORDIC_TRACE_CHUNK   records per chunk (default: 4096)
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+TRACE_DTYPE = np.dtype([
+    ("mode",        np.uint8),
+    ("is_rotating", np.uint8),
+    ("has_b",       np.uint8),     # B was written for this operation
+    ("cached",      np.uint8),     # outputs came from the result cache, not the simulator
+    ("shift",       np.int8),      # alpha_one_left_shift, -1 when it was not written
+    ("flags",       np.uint8),     # config option bits written with the start (binary angle, ...)
+    # raw register values: up to 32 bits, and the binary angles of a 32-bit build are unsigned
+    ("a",           np.int64),
+    ("b",           np.int64),
+    ("out1",        np.int64),
+    ("out2",        np.int64),
+    ("polls",       np.uint32),    # status polls until DONE (wait_done)
+    ("t_start_ns",  np.float64),
+    ("t_done_ns",   np.float64),
+    ("error",       np.float64),   # max abs error against the reference, NaN when not checked
+])
+
+MODE_NAMES = {0: "circular", 1: "linear", 2: "hyperbolic"}
+
+
+def default_trace_dir():
+    base = Path(os.getenv("CORDIC_PLOTS_DIR", os.getenv("GITHUB_WORKSPACE", ".")))
+    return Path(os.getenv("CORDIC_TRACE_DIR", base / "artifacts/traces"))
+
+
+def describe(record):
+    """ One-line human-readable form of a record, used when an operation fails """
+    b = int(record["b"]) if record["has_b"] else "-"
+    shift = int(record["shift"]) if record["shift"] >= 0 else "-"
+    source = "cache" if record["cached"] else f"{int(record['polls'])} polls"
+    flags = f" flags={int(record['flags']):#04x}" if record["flags"] else ""
+    return (f"{MODE_NAMES.get(int(record['mode']), record['mode'])} "
+            f"{'rotating' if record['is_rotating'] else 'vectoring'}{flags}: "
+            f"A={int(record['a'])} B={b} shift={shift} -> out1={int(record['out1'])} out2={int(record['out2'])} "
+            f"({source}, t={record['t_start_ns']:.0f}..{record['t_done_ns']:.0f} ns, error={record['error']:.3g})")
+
+
+class TraceRecorder:
+    """ Appends TRACE_DTYPE records to a preallocated buffer, flushing it to
+    <directory>/<name>-<chunk>.npy whenever it fills up. """
+
+    def __init__(self, directory, name, chunk_size=4096):
+        self.directory = Path(directory)
+        self.name = name
+        self.buffer = np.zeros(chunk_size, dtype=TRACE_DTYPE)
+        self.count = 0
+        self.chunks = 0
+        self.total = 0
+
+        # start from a clean slate, chunks of an earlier run would be mixed in otherwise
+        for old in self.directory.glob(f"{name}-*.npy"):
+            old.unlink()
+
+    @classmethod
+    def open(cls, name):
+        """ Recorder for one sweep, or None when disabled with CORDIC_TRACE=off.
+
+        Sharded runs (CORDIC_SHARD=i/N) get the shard in the name, so shards never share files. """
+        if os.getenv("CORDIC_TRACE", "on").lower() in ("off", "0", "no"):
+            return None
+        shard = os.getenv("CORDIC_SHARD")
+        if shard:
+            index, count = shard.split("/")
+            name = f"{name}.shard{index}of{count}"
+        return cls(default_trace_dir(), name, chunk_size=int(os.getenv("CORDIC_TRACE_CHUNK", 4096)))
+
+    def record(self, mode, is_rotating, A, B, shift, out1, out2, polls, t_start_ns, t_done_ns, cached=False, flags=0):
+        if self.count == len(self.buffer):
+            self.flush()
+        row = self.buffer[self.count]
+        row["mode"] = int(mode)
+        row["is_rotating"] = int(is_rotating)
+        row["has_b"] = B is not None
+        row["cached"] = cached
+        row["shift"] = -1 if shift is None else shift
+        row["flags"] = flags
+        row["a"] = A
+        row["b"] = 0 if B is None else B
+        row["out1"] = out1
+        row["out2"] = out2
+        row["polls"] = polls
+        row["t_start_ns"] = t_start_ns
+        row["t_done_ns"] = t_done_ns
+        row["error"] = np.nan
+        self.count += 1
+        self.total += 1
+
+    def set_error(self, error):
+        """ Attach the reference error to the last record """
+        self.buffer[self.count - 1]["error"] = error
+
+    @property
+    def last(self):
+        return self.buffer[self.count - 1] if self.count else None
+
+    def flush(self):
+        if self.count == 0:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        np.save(self.directory / f"{self.name}-{self.chunks:04d}.npy", self.buffer[:self.count])
+        self.chunks += 1
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        return self.total
+
+
+def load_trace(directory, name):
+    """ All records of one sweep (including every shard of it), in chunk order """
+    directory = Path(directory)
+    chunks = sorted(directory.glob(f"{name}-*.npy")) + sorted(directory.glob(f"{name}.shard*-*.npy"))
+    if not chunks:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.concatenate([np.load(path) for path in chunks])